@@ -190,7 +190,7 @@ def contact_us_view(request):
 
 def user_dashboard_view(request):
     user = request.user
-    user_blog_posts = BlogPost.objects.filter(author=user).select_related('author','category').prefetch_related('comments').order_by('-created_at')
+    user_blog_posts = BlogPost.objects.filter(author=user).select_related('author','category').order_by('-created_at')
     
     # forum section
     user_questions = Question.objects.filter(author=user).prefetch_related('answers').order_by('-created_at')
@@ -214,8 +214,14 @@ def user_dashboard_view(request):
         like_count=Count('likes')
         ).aggregate(total_likes=Sum('like_count'))['total_likes'] or 0
         
-    total_views = user_blog_posts.aggregate(total=Sum('views'))['total'] or 0
-    total_quality = user_blog_posts.aggregate(total=Sum('content_quality'))['total'] or 0
+    totals = user_blog_posts.aggregate(
+        views=Sum('views'),
+        quality=Sum('content_quality'),
+        comments=Sum('comment_count'),
+        replies=Sum('reply_count'),
+    )
+    total_views = totals['views'] or 0
+    total_quality = totals['quality'] or 0
     
     
     last_week_start = timezone.now() - timedelta(days=7)
@@ -235,11 +241,7 @@ def user_dashboard_view(request):
     )
     
 
-    comment_count = Comment.objects.filter(post__author=user).count()
-    reply_count = Comment.objects.filter(post__author=user).annotate(
-        num_replies=Count('replies')
-    ).aggregate(total_replies=Sum('num_replies'))['total_replies'] or 0
-    total_comments = comment_count + reply_count
+    total_comments = (totals['comments'] or 0) + (totals['replies'] or 0)
 
 
 
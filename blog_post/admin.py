@@ -1,5 +1,6 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
+from blog_post import moderation_queue
 from blog_post.models import (
     Post_view_ip,
     Category,
@@ -9,6 +10,7 @@ from blog_post.models import (
     Like,
     SubCategory,
     compnay_logo,
+    ModerationJob,
 )
 from django.utils.html import format_html
 from unfold.contrib.import_export.forms import ExportForm, ImportForm
@@ -174,7 +176,16 @@ class BlogPostAdmin(ModelAdmin, ImportExportModelAdmin):
     inlines = [BlogAdditionalImageInline]
     # If you have ReviewInline, add it: inlines = [ReviewInline, BlogAdditionalImageInline]
     
-    readonly_fields = ("content_hash", "image_hash", "created_at", "updated_at")
+    # views is a counter, saving the form must not write it back
+    readonly_fields = ("views", "content_hash", "image_hash", "created_at", "updated_at")
+    actions = ["moderate_again"]
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            # only what the form changed, counters moved meanwhile are kept
+            obj.save(update_fields=BlogPost.update_fields_for(form.changed_data))
+        else:
+            super().save_model(request, obj, form, change)
 
     fieldsets = (
         ("Basic Info", {
@@ -211,6 +222,16 @@ class BlogPostAdmin(ModelAdmin, ImportExportModelAdmin):
 
     image_preview.short_description = "Preview"
 
+    @admin.action(description="Moderate again (ask Groq, ignore the stored result)")
+    def moderate_again(self, request, queryset):
+        # back to pending so the new verdict decides, the worker publishes or rejects
+        posts = list(queryset)
+        for post in posts:
+            post.status = "pending"
+            post.save(update_fields=["status"])
+            moderation_queue.enqueue(post, refresh=True)
+        self.message_user(request, f"{len(posts)} post(s) queued for moderation.")
+
 
 
 # ADDITIONAL IMAGES ADMIN
@@ -272,4 +293,12 @@ class PostViewIpAdmin(ModelAdmin):
     ordering = ("-viewed_at",)
 
 
-
+# MODERATION QUEUE ADMIN
+@admin.register(ModerationJob)
+class ModerationJobAdmin(ModelAdmin):
+    list_display = ("post", "status", "outcome", "attempts", "refresh", "run_after", "leased_by", "created_at")
+    list_filter = ("status", "outcome", "refresh")
+    search_fields = ("post__title",)
+    readonly_fields = ("leased_by", "leased_until", "last_error", "created_at", "finished_at")
+    autocomplete_fields = ("post",)
+    ordering = ("-created_at",)
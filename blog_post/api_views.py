@@ -3,11 +3,12 @@ from rest_framework import viewsets, generics, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from django.core.paginator import Paginator
+from functools import partial
 
 from .models import (
     Category, SubCategory, BlogPost, BlogAdditionalImage, 
@@ -17,9 +18,11 @@ from .serializers import (
     CategorySerializer, SubCategorySerializer, 
     BlogPostListSerializer, BlogPostDetailSerializer,
     BlogPostCreateSerializer, LikeSerializer, ReviewSerializer,
-    PostViewIpSerializer, CompanyLogoSerializer
+    PostViewIpSerializer, CompanyLogoSerializer, BlogPostSearchSerializer
 )
 from accounts.models import CustomUserModel
+from . import conditional, search, view_buffer
+from .pagination import KeysetCursorPagination
 
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
@@ -36,7 +39,7 @@ class SubCategoryViewSet(viewsets.ModelViewSet):
     lookup_field = 'slug'
     
     def get_queryset(self):
-        queryset = SubCategory.objects.all()
+        queryset = SubCategory.objects.select_related('category')
         category_slug = self.request.query_params.get('category', None)
         
         if category_slug:
@@ -44,9 +47,27 @@ class SubCategoryViewSet(viewsets.ModelViewSet):
         
         return queryset
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class ConditionalListMixin:
+    """Post lists answering conditional GETs from the page, before serializing it."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        posts = list(queryset) if page is None else page
+        return conditional.respond(
+            request, conditional.post_rows(posts), partial(self.list_response, posts, page is not None)
+        )
+
+    def list_response(self, posts, paginated):
+        serializer = self.get_serializer(posts, many=True)
+        if paginated:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+class BlogPostViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     queryset = BlogPost.objects.filter(status="published")
     lookup_field = 'slug'
+    pagination_class = KeysetCursorPagination
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -61,7 +82,12 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         return [permissions.AllowAny()]
     
     def get_queryset(self):
-        queryset = BlogPost.objects.filter(status="published")
+        fields = None
+        if self.action in ['list', 'retrieve']:
+            fields = BlogPostListSerializer.wanted_fields(self.request, self)
+        queryset = BlogPost.objects.filter(status="published").for_api(fields)
+        if self.action == 'retrieve' and (fields is None or 'additional_images' in fields):
+            queryset = queryset.prefetch_related('additional_images')
         
         # Filter by category
         category_slug = self.request.query_params.get('category', None)
@@ -83,21 +109,24 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         if tag:
             queryset = queryset.filter(tags__name=tag)
         
-        # Search
-        search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | 
-                Q(description__icontains=search) |
-                Q(subtitle__icontains=search)
-            )
+        # Search (full-text, see search.py)
+        search_query = self.request.query_params.get('search', None)
+        if search_query:
+            queryset = search.filter_queryset(queryset, search_query)
         
         # Ordering
         order_by = self.request.query_params.get('order_by', '-created_at')
         if order_by in ['created_at', '-created_at', 'views', '-views']:
             queryset = queryset.order_by(order_by)
         
-        return queryset.select_related('category', 'subcategory', 'author').prefetch_related('tags')
+        return queryset
+    
+    def retrieve(self, request, *args, **kwargs):
+        return conditional.respond(
+            request,
+            conditional.post_page(request, kwargs[self.lookup_field]),
+            partial(super().retrieve, request, *args, **kwargs),
+        )
     
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -126,10 +155,42 @@ class BlogPostViewSet(viewsets.ModelViewSet):
             except Like.DoesNotExist:
                 return Response({'error': 'Not liked yet'}, status=status.HTTP_404_NOT_FOUND)
     
+    @action(detail=False, methods=['get'], url_path='latest-by-category')
+    def latest_by_category(self, request):
+        """Latest ``per_category`` posts (max 10) of every category, or of ``?categories=a,b``."""
+        try:
+            per_category = max(1, min(int(request.query_params.get('per_category', 1)), 10))
+        except ValueError:
+            per_category = 1
+
+        queryset = BlogPost.objects.filter(status="published", category__isnull=False)
+        category_slugs = request.query_params.get('categories', None)
+        if category_slugs:
+            queryset = queryset.filter(category__slug__in=category_slugs.split(','))
+
+        posts = queryset.latest_per('category', per_category).for_api(
+            BlogPostListSerializer.wanted_fields(request, self)
+        )
+        serializer = BlogPostListSerializer(posts, many=True, context={'request': request})
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'], url_path='search')
+    def search_posts(self, request):
+        """Published posts matching ``?q=``, best match first, with highlights."""
+        results = search.SearchResults(
+            request.query_params.get('q', '').strip(),
+            BlogPost.objects.for_api(BlogPostSearchSerializer.wanted_fields(request, self)),
+        )
+        # ranked results are paged by number, not by cursor
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(results, request, view=self)
+        serializer = BlogPostSearchSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+    
     @action(detail=True, methods=['get'])
     def likes(self, request, slug=None):
         blog_post = self.get_object()
-        likes = blog_post.likes.all()
+        likes = blog_post.likes.select_related('user')
         serializer = LikeSerializer(likes, many=True)
         return Response(serializer.data)
     
@@ -145,17 +206,13 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         blog_post = self.get_object()
         ip_address = self.get_client_ip(request)
         
-        # Record view
-        view, created = Post_view_ip.objects.get_or_create(
-            post=blog_post,
-            user=request.user if request.user.is_authenticated else None,
-            ip_address=ip_address if not request.user.is_authenticated else None
+        # Record view (written to the db in batches)
+        view_buffer.record_view(
+            blog_post.pk,
+            user_id=request.user.pk if request.user.is_authenticated else None,
+            ip_address=ip_address,
         )
         
-        if created:
-            blog_post.views += 1
-            blog_post.save()
-        
         return Response({'status': 'view recorded'}, status=status.HTTP_201_CREATED)
     
     def get_client_ip(self, request):
@@ -168,9 +225,10 @@ class LikeViewSet(viewsets.ModelViewSet):
     queryset = Like.objects.all() 
     serializer_class = LikeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetCursorPagination
     
     def get_queryset(self):
-        return Like.objects.filter(user=self.request.user)
+        return Like.objects.filter(user=self.request.user).select_related('user')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -178,10 +236,11 @@ class LikeViewSet(viewsets.ModelViewSet):
 class ReviewViewSet(viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetCursorPagination
     
     def get_queryset(self):
         post_slug = self.request.query_params.get('post', None)
-        queryset = Review.objects.all()
+        queryset = Review.objects.select_related('user')
         
         if post_slug:
             queryset = queryset.filter(post__slug=post_slug)
@@ -196,37 +255,40 @@ class CompanyLogoViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CompanyLogoSerializer
 
 # Additional API Views
-class PopularBlogsAPIView(generics.ListAPIView):
+class PostListAPIView(ConditionalListMixin, generics.ListAPIView):
+    """Post lists that only load what the requested fields need."""
     serializer_class = BlogPostListSerializer
+
+    def posts(self):
+        fields = self.serializer_class.wanted_fields(self.request, self)
+        return BlogPost.objects.filter(status="published").for_api(fields)
+
+class PopularBlogsAPIView(PostListAPIView):
     
     def get_queryset(self):
-        return BlogPost.objects.filter(
-            status="published",
+        return self.posts().filter(
             views__gte=100
         ).order_by('-views', '-created_at')[:10]
 
-class LatestBlogsAPIView(generics.ListAPIView):
-    serializer_class = BlogPostListSerializer
+class LatestBlogsAPIView(PostListAPIView):
     
     def get_queryset(self):
-        return BlogPost.objects.filter(status="published").order_by('-created_at')[:10]
+        return self.posts().order_by('-created_at')[:10]
 
-class CategoryBlogsAPIView(generics.ListAPIView):
-    serializer_class = BlogPostListSerializer
+class CategoryBlogsAPIView(PostListAPIView):
+    pagination_class = KeysetCursorPagination
     
     def get_queryset(self):
         category_slug = self.kwargs.get('slug')
-        return BlogPost.objects.filter(
-            status="published",
+        return self.posts().filter(
             category__slug=category_slug
         ).order_by('-created_at')
 
-class UserBlogsAPIView(generics.ListAPIView):
-    serializer_class = BlogPostListSerializer
+class UserBlogsAPIView(PostListAPIView):
+    pagination_class = KeysetCursorPagination
     
     def get_queryset(self):
         user_id = self.kwargs.get('user_id')
-        return BlogPost.objects.filter(
-            status="published",
+        return self.posts().filter(
             author_id=user_id
         ).order_by('-created_at')
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Conditional GET for post pages and the posts API.
+
+Validators come from what a response is built from, worked out before
+anything is rendered: ``BlogPost.updated_at`` and the counters of a
+post, the rows of an API page, plus version stamps that
+``blog_post.signals`` moves forward for changes those columns miss
+(likes, reviews, comments, shares, categories, tags, removed posts).
+While a client's ``If-None-Match`` / ``If-Modified-Since`` still matches
+it gets a ``304 Not Modified`` without a template render or serializer
+run.
+
+Stamps are timestamps, so they double as ``Last-Modified``. They live in
+the default cache, which all workers share (Redis or the database cache,
+see ``CACHES``), so a change one worker saves ends every worker's 304s,
+and a stamp missing from the cache reads as "changed now". Requests with
+``django.contrib.messages`` waiting to be shown are always rendered, a
+304 would leave the messages for some later page. Page chrome nothing
+tracks (sidebars ordered by views, popular questions, ads, the date)
+is picked up by rolling every validator over each
+``CONDITIONAL_GET_WINDOW`` seconds. Responses are sent with
+``Cache-Control: private, no-cache`` so browsers always revalidate, and
+``Vary: HX-Request`` so full pages and htmx partials are kept apart.
+"""
+import hashlib
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers, quote_etag,
+)
+from django.utils.http import http_date
+
+from .models import BlogPost, Category
+
+WINDOW = getattr(settings, "CONDITIONAL_GET_WINDOW", 60 * 5)
+
+STAMP_KEY = "conditional:stamp:{}"
+
+
+def stamps(*scopes):
+    """When each of ``scopes`` last changed, as unix timestamps."""
+    keys = [STAMP_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in found:
+            cache.add(key, now, None)
+            found[key] = cache.get(key, now)
+    return [found[key] for key in keys]
+
+
+def touch(*scopes):
+    """Mark ``scopes`` as changed, e.g. ``touch("posts", "post:12")``."""
+    now = time.time()
+    cache.set_many({STAMP_KEY.format(scope): now for scope in scopes}, None)
+
+
+def post_scope(post_id):
+    return f"post:{post_id}"
+
+
+# ── Validators ────────────────────────────────────────────────────────────
+# Each returns ``(parts, last_modified)``: the values the response depends
+# on and when the newest of them changed. ``None`` means "just render".
+
+def post_page(request, slug):
+    """A published post's page or API resource."""
+    post = (
+        BlogPost.objects.filter(slug=slug, status="published")
+        .values("pk", "updated_at", "views", "comment_count", "reply_count")
+        .first()
+    )
+    if post is None:
+        return None
+    posts, this_post = stamps("posts", post_scope(post["pk"]))
+    updated_at = post["updated_at"].timestamp()
+    parts = (
+        post["pk"], updated_at, post["views"], post["comment_count"], post["reply_count"],
+        posts, this_post,
+    )
+    return parts, max(updated_at, posts, this_post)
+
+
+def category_page(request, slug):
+    category = Category.objects.filter(slug=slug).values_list("pk", "updated_at").first()
+    if category is None:
+        return None
+    pk, updated_at = category
+    posts, = stamps("posts")
+    return (pk, updated_at.timestamp(), posts), max(updated_at.timestamp(), posts)
+
+
+def post_rows(posts):
+    """A page of already loaded posts, e.g. an API list page."""
+    latest, = stamps("posts")
+    parts = [latest]
+    for post in posts:
+        updated_at = post.updated_at.timestamp()
+        latest = max(latest, updated_at)
+        parts.append((
+            post.pk, updated_at, post.views, post.comment_count, post.reply_count,
+            getattr(post, "likes_total", None),
+        ))
+    return parts, latest
+
+
+# ── Responses ─────────────────────────────────────────────────────────────
+
+def _validators(request, parts, last_modified):
+    window = int(time.time() // WINDOW) * WINDOW
+    user = request.user
+    key = repr((
+        parts,
+        window,
+        request.get_full_path(),
+        bool(request.headers.get("HX-Request")),
+        getattr(request, "accepted_media_type", None),  # DRF format
+        getattr(request, "maintenance_section", None),
+        (user.pk, user.updated_at.timestamp()) if user.is_authenticated else None,
+    ))
+    etag = quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+    return etag, int(max(last_modified, window))
+
+
+def respond(request, validators, render):
+    """
+    The response to ``request``: ``304 Not Modified`` if the client's copy
+    still matches ``validators``, otherwise ``render()`` with validators
+    attached. With no validators, or messages to show, this is just
+    ``render()``.
+    """
+    if validators is None or request.method not in ("GET", "HEAD"):
+        return render()
+    # len() reads the messages without marking them as shown
+    if len(messages.get_messages(request)):
+        return render()
+
+    etag, last_modified = _validators(request, *validators)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = render()
+        if response.status_code != 200:
+            return response
+
+    response.headers.setdefault("ETag", etag)
+    response.headers.setdefault("Last-Modified", http_date(last_modified))
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("HX-Request",))
+    return response
+
+
+def conditional(get_validators):
+    """
+    Answer conditional GETs of the decorated view from
+    ``get_validators(request, *args, **kwargs)``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            validators = None
+            if request.method in ("GET", "HEAD"):
+                validators = get_validators(request, *args, **kwargs)
+            return respond(request, validators, partial(view, request, *args, **kwargs))
+        return wrapper
+    return decorator
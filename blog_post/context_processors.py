@@ -1,12 +1,17 @@
 from django.shortcuts import render , redirect , get_object_or_404
-from forum.models import Follow_section
+from forum import follow_graph
 from blog_post.models import Category
 from contact.models import FooterSettings
+from root.context import lazy
+
+
+def _categories():
+    return list(Category.objects.all().order_by('created_at'))
+
 
 def all_category(request):
-    popular_categories = Category.objects.all().order_by('created_at')
     context = {
-        "popular_categories": popular_categories,
+        "popular_categories": lazy(request, "categories", _categories),
     }
     return(context) 
     
@@ -21,20 +26,21 @@ def timezone_info(request):
     
     return{
         'current_date': formatted_date,
-        "categories": Category.objects.all()
+        "categories": lazy(request, "categories", _categories),
     }
 
 def footer_context(request):
     return {
-        'footer': FooterSettings.objects.first()
+        'footer': lazy(request, "footer", FooterSettings.get_settings)
     }
 
 def follow_stats(request):
 
     if request.user.is_authenticated and getattr(request.user, 'is_verified', False):
-        follow_data, created = Follow_section.objects.get_or_create(user=request.user)
         return {
-            'user_follow_stats': follow_data
+            'user_follow_stats': lazy(
+                request, "follow_section", lambda: follow_graph.get_section(request.user)
+            )
         }
     
     return {
@@ -1,105 +1,314 @@
+"""
+Groq moderation checks.
+
+All checks share one process-wide client, and with it one pool of
+keep-alive connections, with explicit connect / read timeouts. A circuit
+breaker guards the API: after ``GROQ_BREAKER_FAILURES`` failed calls in a
+row it opens and calls fail at once with ``CircuitOpen`` (the checks
+return their fail-safe value, the moderation queue retries later) until
+``GROQ_BREAKER_RESET_SECONDS`` have passed and a trial call succeeds.
+``get_stats()`` returns call, error and latency counters.
+
+Besides one prompt per check there is ``check_all()``, which asks for
+all three verdicts in one request as JSON (``MODERATION_MODE =
+"combined"`` in ``blog_post.moderation``).
+"""
 import os
+import hashlib
+import json
 import logging
+import threading
+import time
+
+import groq
+import httpx
+from django.conf import settings
 from groq import Groq
 
 logger = logging.getLogger(__name__)
 
+BASE_URL = getattr(settings, "GROQ_BASE_URL", None)  # None: the SDK default
+CONNECT_TIMEOUT = getattr(settings, "GROQ_CONNECT_TIMEOUT", 3)
+READ_TIMEOUT = getattr(settings, "GROQ_READ_TIMEOUT", 10)
+MAX_CONNECTIONS = getattr(settings, "GROQ_MAX_CONNECTIONS", 20)
+MAX_RETRIES = getattr(settings, "GROQ_MAX_RETRIES", 1)
+BREAKER_FAILURES = getattr(settings, "GROQ_BREAKER_FAILURES", 5)
+BREAKER_RESET_SECONDS = getattr(settings, "GROQ_BREAKER_RESET_SECONDS", 30)
+
+MODEL = "llama-3.3-70b-versatile"
+
+ADULT_PROMPT = """You are a strict content moderation system.
+Analyze the following blog post and determine if it contains adult, sexual, violent, hateful, or harmful content.
+
+Title: {title}
+Content: {content}
+
+Reply with ONLY one word: YES or NO."""
+
+COPYRIGHT_PROMPT = """You are a plagiarism detection expert.
+Analyze the following blog post. Does this content appear to be copied, plagiarized, or directly taken from another well-known source without original contribution?
+
+Title: {title}
+Content: {content}
+
+Consider: generic filler text, obvious copy-paste patterns, well-known copyrighted passages.
+Reply with ONLY one word: YES or NO."""
+
+QUALITY_PROMPT = """You are a professional blog content quality evaluator.
+Rate the following blog post on a scale from 0 to 100 based on:
+- Grammar and writing quality
+- Informativeness and depth
+- Readability and structure
+- Originality and usefulness
+
+Title: {title}
+Content: {content}
+
+Reply with ONLY a single integer number between 0 and 100. No explanation."""
+
+COMBINED_PROMPT = """You are a strict content moderation system, plagiarism detection expert and blog content quality evaluator.
+Analyze the following blog post and answer:
+- adult: does it contain adult, sexual, violent, hateful, or harmful content?
+- copyright: does it appear to be copied, plagiarized, or directly taken from another well-known source without original contribution? Consider: generic filler text, obvious copy-paste patterns, well-known copyrighted passages.
+- quality: rate it on a scale from 0 to 100 based on grammar and writing quality, informativeness and depth, readability and structure, originality and usefulness.
+
+Title: {title}
+Content: {content}
+
+Reply with ONLY a JSON object, no explanation:
+{{"adult": true or false, "copyright": true or false, "quality": integer between 0 and 100}}"""
+
+# Changes whenever the model or a prompt does, stored moderation results
+# (blog_post.moderation_cache) of an older version are not used.
+PROMPT_VERSION = hashlib.sha1(
+    "\0".join([MODEL, ADULT_PROMPT, COPYRIGHT_PROMPT, QUALITY_PROMPT, COMBINED_PROMPT]).encode("utf-8")
+).hexdigest()[:12]
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class MalformedVerdict(ValueError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. Open (after ``failures`` failures in a row):
+    calls are refused for ``reset_seconds``. Then half open: one trial
+    call goes through and closes the breaker again, or re-opens it.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failed = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._trial or time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._trial or time.monotonic() - self._opened_at < self.reset_seconds:
+                raise CircuitOpen("Groq circuit breaker is open")
+            self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            self._failed = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failed += 1
+            if self._trial or self._failed >= self.failures:
+                if self._opened_at is None or self._trial:
+                    logger.warning("[Groq] Circuit breaker opened")
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+breaker = CircuitBreaker()
+
+_lock = threading.Lock()
+_client = None
+_stats = {"calls": 0, "errors": 0, "skipped": 0, "seconds": 0.0}
+
 
 def _get_client():
+    global _client
+
     api_key = os.environ.get("GROQ_API_KEY")
     if not api_key:
         raise ValueError("GROQ_API_KEY is not set in environment variables.")
-    return Groq(api_key=api_key)
+    with _lock:
+        if _client is None or _client.api_key != api_key:
+            timeout = httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+            _client = Groq(
+                api_key=api_key,
+                base_url=BASE_URL,
+                timeout=timeout,
+                max_retries=MAX_RETRIES,
+                http_client=httpx.Client(
+                    timeout=timeout,
+                    limits=httpx.Limits(
+                        max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS
+                    ),
+                ),
+            )
+        return _client
 
 
-def check_adult_content(title: str, content: str) -> bool:
-    """
-    Returns True if adult/harmful content detected, False otherwise.
-    Fail-safe: returns False on API error (don't block the user).
-    """
-    try:
-        client = _get_client()
-        prompt = f"""You are a strict content moderation system.
-Analyze the following blog post and determine if it contains adult, sexual, violent, hateful, or harmful content.
+def reset_client():
+    """Drop the shared client, the next call builds a new one."""
+    global _client
 
-Title: {title}
-Content: {content[:3000]}
+    with _lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
 
-Reply with ONLY one word: YES or NO."""
 
+def get_stats():
+    """Calls, errors, calls skipped by the breaker, mean latency and breaker state."""
+    with _lock:
+        stats = dict(_stats)
+    stats["mean_seconds"] = stats["seconds"] / stats["calls"] if stats["calls"] else 0.0
+    stats["breaker"] = breaker.state
+    return stats
+
+
+def _count(**amounts):
+    with _lock:
+        for name, amount in amounts.items():
+            _stats[name] += amount
+
+
+def _is_outage(error):
+    """Failures that say the API is unwell, not that the request was wrong."""
+    if isinstance(error, groq.APIStatusError):
+        return error.status_code >= 500 or error.status_code == 429
+    return isinstance(error, (groq.APIConnectionError, httpx.HTTPError))
+
+
+def _ask(prompt: str, title: str, content: str, max_tokens: int = 5, **options) -> str:
+    client = _get_client()
+    try:
+        breaker.before_call()
+    except CircuitOpen:
+        _count(skipped=1)
+        raise
+
+    started = time.monotonic()
+    try:
         response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=5,
+            model=MODEL,
+            messages=[{"role": "user", "content": prompt.format(title=title, content=content[:3000])}],
+            max_tokens=max_tokens,
             temperature=0,
+            **options,
         )
-        answer = response.choices[0].message.content.strip().upper()
+    except Exception as e:
+        _count(calls=1, errors=1, seconds=time.monotonic() - started)
+        if _is_outage(e):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    _count(calls=1, seconds=time.monotonic() - started)
+    breaker.record_success()
+    return response.choices[0].message.content.strip()
+
+
+def check_adult_content(title: str, content: str, fail_safe: bool = True) -> bool:
+    """
+    Returns True if adult/harmful content detected, False otherwise.
+    Fail-safe: returns False on API error (don't block the user),
+    with ``fail_safe=False`` the error is raised instead.
+    """
+    try:
+        answer = _ask(ADULT_PROMPT, title, content).upper()
         return answer == "YES"
 
     except Exception as e:
+        if not fail_safe:
+            raise
         logger.error(f"[Groq] Adult content check failed: {e}")
         return False
 
 
-def check_copyright(title: str, content: str) -> bool:
+def check_copyright(title: str, content: str, fail_safe: bool = True) -> bool:
     """
     Returns True if content appears copied/plagiarized, False otherwise.
-    Fail-safe: returns False on API error.
+    Fail-safe: returns False on API error, raises with ``fail_safe=False``.
     """
     try:
-        client = _get_client()
-        prompt = f"""You are a plagiarism detection expert.
-Analyze the following blog post. Does this content appear to be copied, plagiarized, or directly taken from another well-known source without original contribution?
-
-Title: {title}
-Content: {content[:3000]}
-
-Consider: generic filler text, obvious copy-paste patterns, well-known copyrighted passages.
-Reply with ONLY one word: YES or NO."""
-
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=5,
-            temperature=0,
-        )
-        answer = response.choices[0].message.content.strip().upper()
+        answer = _ask(COPYRIGHT_PROMPT, title, content).upper()
         return answer == "YES"
 
     except Exception as e:
+        if not fail_safe:
+            raise
         logger.error(f"[Groq] Copyright check failed: {e}")
         return False
 
 
-def get_quality_score(title: str, content: str) -> int:
+def get_quality_score(title: str, content: str, fail_safe: bool = True) -> int:
     """
     Returns quality score 0–100.
-    Fail-safe: returns 50 on API error (goes to pending).
+    Fail-safe: returns 50 on API error (goes to pending), raises with
+    ``fail_safe=False``.
     """
     try:
-        client = _get_client()
-        prompt = f"""You are a professional blog content quality evaluator.
-Rate the following blog post on a scale from 0 to 100 based on:
-- Grammar and writing quality
-- Informativeness and depth
-- Readability and structure
-- Originality and usefulness
-
-Title: {title}
-Content: {content[:3000]}
-
-Reply with ONLY a single integer number between 0 and 100. No explanation."""
-
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=5,
-            temperature=0,
-        )
-        raw = response.choices[0].message.content.strip()
+        raw = _ask(QUALITY_PROMPT, title, content)
         score = int(''.join(filter(str.isdigit, raw)))
         return max(0, min(100, score))
 
     except Exception as e:
+        if not fail_safe:
+            raise
         logger.error(f"[Groq] Quality score check failed: {e}")
-        return 50  # fail-safe → goes to pending
\ No newline at end of file
+        return 50  # fail-safe → goes to pending
+
+
+def parse_verdicts(raw: str) -> tuple:
+    """
+    ``(adult, copyright, quality)`` from the JSON reply to
+    ``COMBINED_PROMPT``. Anything but exactly these three keys with a
+    bool, a bool and an integer 0–100 raises ``MalformedVerdict``.
+    """
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise MalformedVerdict(f"not JSON: {raw[:200]!r}") from e
+    if not isinstance(data, dict) or set(data) != {"adult", "copyright", "quality"}:
+        raise MalformedVerdict(f"unexpected keys: {raw[:200]!r}")
+    adult, copied, quality = data["adult"], data["copyright"], data["quality"]
+    if not isinstance(adult, bool) or not isinstance(copied, bool):
+        raise MalformedVerdict(f"adult / copyright are not booleans: {raw[:200]!r}")
+    if isinstance(quality, bool) or not isinstance(quality, int) or not 0 <= quality <= 100:
+        raise MalformedVerdict(f"quality is not an integer 0-100: {raw[:200]!r}")
+    return adult, copied, quality
+
+
+def check_all(title: str, content: str) -> tuple:
+    """
+    ``(adult, copyright, quality)`` in a single request. Raises on API
+    errors and ``MalformedVerdict`` on a reply that doesn't parse; there
+    is no fail-safe value, callers fall back to the separate checks.
+    """
+    raw = _ask(COMBINED_PROMPT, title, content, max_tokens=50, response_format={"type": "json_object"})
+    return parse_verdicts(raw)
@@ -0,0 +1,180 @@
+"""
+Cached snapshot of the homepage sections.
+
+``get_snapshot()`` returns the context rendered by ``views.home``.
+Sections are grouped by the models they read and every group is cached
+together with a version stamp. ``blog_post.signals`` bumps the stamp of
+each group a change touches, so the next request rebuilds only those
+groups. A warm homepage costs a single ``cache.get_many`` round trip.
+
+View counts and user profiles are not tracked by signals; groups also
+expire after ``HOMEPAGE_SNAPSHOT_TIMEOUT`` seconds to pick those up.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from accounts.models import CustomUserModel
+from tags.models import Tag
+from .models import BlogPost, Category, compnay_logo
+
+SNAPSHOT_TIMEOUT = getattr(settings, "HOMEPAGE_SNAPSHOT_TIMEOUT", 60 * 10)
+
+VERSION_KEY = "homepage:version:{}"
+DATA_KEY = "homepage:data:{}"
+
+
+def _published():
+    return BlogPost.objects.filter(status="published").select_related("category", "author")
+
+
+def _build_posts():
+    blogs = list(_published()[:6])
+
+    top_categories = list(
+        Category.objects.annotate(post_count=Count('blogpost'))
+        .filter(post_count__gt=0)
+        .order_by('-post_count')[:3]
+    )
+    top_categories += [None] * (3 - len(top_categories))
+    first_category, second_category, third_category = top_categories[:3]
+
+    def category_blogs(category):
+        if category is None:
+            return []
+        return list(_published().filter(category=category).order_by('-created_at')[:5])
+
+    # top 5 published blogs for carousel
+    carousel_blogs = list(_published().order_by("-created_at")[:5])
+
+    top_users = list(
+        CustomUserModel.objects.filter(is_verified=True, is_superuser=False)
+        .annotate(post_count=Count('authored_posts'))
+        .order_by('-post_count')[:4]
+    )
+
+    # category wise 4 ta kore blogs nibo
+    def latest_in(slug):
+        return list(_published().filter(category__slug=slug).order_by("-created_at")[:4])
+
+    categories_by_slug = {
+        category.slug: category
+        for category in Category.objects.filter(slug__in=['technology', 'news', 'tips-tricks'])
+    }
+
+    # latest and popular blogs
+    latest_popular_blogs = list(
+        _published().order_by("-created_at", "-views", "-likes")[:8]
+    )
+
+    popular_categories = list(
+        Category.objects
+        .annotate(
+            published_post_count=Count(
+                'blogpost',
+                filter=Q(blogpost__status='published')
+            )
+        )
+        .filter(published_post_count__gt=0)
+        .order_by('-published_post_count')[:7]
+    )
+
+    # latest post of every popular category, fetched in one query
+    latest_posts = {
+        post.category_id: post
+        for post in BlogPost.objects.filter(
+            status='published', category__in=popular_categories
+        ).latest_per('category')
+    }
+    popular_posts_flat_list = []
+
+    for category in popular_categories:
+        post = latest_posts.get(category.pk)
+
+        if post:
+            # Add the post in flat list
+            popular_posts_flat_list.append({
+                'title': post.title,
+                'created_at': post.created_at,
+                'slug': post.slug,
+                'views': post.views,
+                'author_username': post.author.username,
+                'category_name': category.name,
+                'category_icon': category.font_awesome_icon,
+                'featured_image': post.featured_image,
+                'featured_image_url': post.featured_image_url,
+            })
+
+    return {
+        "first_category": first_category,
+        "second_category": second_category,
+        "third_category": third_category,
+
+        "tech_cat": categories_by_slug.get('technology'),
+        "news_cat": categories_by_slug.get('news'),
+        "tips_cat": categories_by_slug.get('tips-tricks'),
+
+        "first_blogs": category_blogs(first_category),
+        "second_blogs": category_blogs(second_category),
+        "third_blogs": category_blogs(third_category),
+
+        "blogs": blogs,
+        "latest_blog": carousel_blogs[0] if carousel_blogs else None,
+        "top_users": top_users,
+        "carousel_blogs": carousel_blogs,
+        "technology_posts": latest_in('technology'),
+        "news_posts": latest_in('news'),
+        "tips_posts": latest_in('tips-tricks'),
+        "Only_latest_blogs": carousel_blogs[:1],
+        "latest_popular_blogs": latest_popular_blogs,
+        "popular_posts_flat_list": popular_posts_flat_list,
+        "most_viewed_blogs": list(_published().order_by("-views")[:12]),
+
+        "top_categories": [category for category in top_categories if category],
+    }
+
+
+def _build_tags():
+    top_tags = Tag.objects.annotate(
+        num_posts=Count('blog_posts')
+    ).order_by('-num_posts')[:15]
+    return {"top_tags": list(top_tags)}
+
+
+def _build_logos():
+    return {"logos": list(compnay_logo.objects.all())}
+
+
+GROUPS = {
+    "posts": _build_posts,
+    "tags": _build_tags,
+    "logos": _build_logos,
+}
+
+
+def invalidate(*groups):
+    """Give ``groups`` (all of them by default) a new version stamp."""
+    cache.set_many(
+        {VERSION_KEY.format(group): uuid.uuid4().hex for group in groups or GROUPS},
+        timeout=None,
+    )
+
+
+def get_snapshot():
+    keys = [VERSION_KEY.format(group) for group in GROUPS]
+    keys += [DATA_KEY.format(group) for group in GROUPS]
+    cached = cache.get_many(keys)
+
+    context = {}
+    for group, build in GROUPS.items():
+        version = cached.get(VERSION_KEY.format(group))
+        entry = cached.get(DATA_KEY.format(group))
+
+        if entry is None or entry[0] != version:
+            entry = (version, build())
+            cache.set(DATA_KEY.format(group), entry, SNAPSHOT_TIMEOUT)
+
+        context.update(entry[1])
+    return context
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog_post import moderation_cache
+
+
+class Command(BaseCommand):
+    help = "Delete stored moderation results of older prompt versions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Delete every stored result, so all content is checked again"
+        )
+
+    def handle(self, *args, **options):
+        deleted = moderation_cache.clear(everything=options["all"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} moderation result(s)."))
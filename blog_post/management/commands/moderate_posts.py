@@ -0,0 +1,67 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from blog_post import groq_service, moderation_queue
+
+
+class Command(BaseCommand):
+    help = "Work off the post moderation queue (run one or more of these next to the web workers)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=10, help="Jobs claimed at a time (default: 10)")
+        parser.add_argument("--sleep", type=float, default=2, help="Seconds to wait when no job is due (default: 2)")
+        parser.add_argument(
+            "--report", type=float, default=60, help="Seconds between throughput reports (default: 60)"
+        )
+        parser.add_argument("--once", action="store_true", help="Stop once no job is due")
+        parser.add_argument("--stats", action="store_true", help="Only show the queue and exit")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.write_queue()
+            return
+
+        worker = moderation_queue.worker_name()
+        self.stdout.write(f"Moderation worker {worker} started.")
+        stats = Counter()
+        started = reported = time.monotonic()
+        try:
+            while True:
+                close_old_connections()
+                claimed = moderation_queue.work(worker, options["batch"], stats)
+                if time.monotonic() - reported >= options["report"]:
+                    self.write_stats(stats, time.monotonic() - started)
+                    reported = time.monotonic()
+                if not claimed:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+        self.write_stats(stats, time.monotonic() - started)
+
+    def write_stats(self, stats, elapsed):
+        outcomes = ("published", "pending", "rejected", "retry", "lost")
+        jobs = sum(stats[outcome] for outcome in outcomes)
+        per_minute = jobs / elapsed * 60 if elapsed else 0
+        per_job = stats["seconds"] / jobs if jobs else 0
+        self.stdout.write(
+            f"{jobs} job(s) in {elapsed:.0f}s, {per_minute:.1f}/min, {per_job:.2f}s each: "
+            + ", ".join(f"{stats[outcome]} {outcome}" for outcome in outcomes)
+        )
+        groq = groq_service.get_stats()
+        self.stdout.write(
+            f"Groq: {groq['calls']} call(s), {groq['errors']} error(s), {groq['skipped']} skipped, "
+            f"{groq['mean_seconds']:.2f}s mean, breaker {groq['breaker']}"
+        )
+        self.write_queue()
+
+    def write_queue(self):
+        counts, oldest = moderation_queue.queue_stats()
+        self.stdout.write(
+            f"Queue: {counts['queued']} queued, {counts['running']} running, "
+            f"{counts['failed']} failed, oldest due job waiting {oldest:.0f}s"
+        )
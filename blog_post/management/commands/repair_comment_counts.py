@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from blog_post.models import BlogPost
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored comment / reply counts of blog posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("slugs", nargs="*", help="Only check these posts (default: all)")
+
+    def handle(self, *args, **options):
+        posts = BlogPost.objects.all()
+        if options["slugs"]:
+            posts = posts.filter(slug__in=options["slugs"])
+
+        fixed = posts.recount_comments()
+        self.stdout.write(self.style.SUCCESS(f"Repaired comment counts of {fixed} post(s)."))
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_counts(apps, schema_editor):
+    BlogPost = apps.get_model('blog_post', 'BlogPost')
+    Comment = apps.get_model('comments', 'Comment')
+    Reply = apps.get_model('comments', 'Reply')
+
+    comments = (
+        Comment.objects.filter(post=OuterRef('pk'))
+        .values('post').annotate(total=Count('pk')).values('total')
+    )
+    replies = (
+        Reply.objects.filter(comment__post=OuterRef('pk'))
+        .values('comment__post').annotate(total=Count('pk')).values('total')
+    )
+    BlogPost.objects.update(
+        comment_count=Coalesce(Subquery(comments), Value(0)),
+        reply_count=Coalesce(Subquery(replies), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_post', '0004_blogpost_description_hash'),
+        ('comments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_comment_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:05
+
+from html import unescape
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+# Kept in sync with blog_post.search
+TABLE = 'blog_post_search'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    BlogPost = apps.get_model('blog_post', 'BlogPost')
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+        "title, subtitle, body, tags, "
+        "tokenize=\"unicode61 remove_diacritics 2 categories 'L* N* Co M*'\")"
+    )
+
+    posts = BlogPost.objects.filter(status='published').prefetch_related('tags')
+    rows = [
+        (
+            post.pk,
+            post.title,
+            post.subtitle or '',
+            ' '.join(unescape(strip_tags(post.description or '')).split()),
+            ' '.join(tag.name for tag in post.tags.all()),
+        )
+        for post in posts.iterator(chunk_size=500)
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {TABLE}(rowid, title, subtitle, body, tags) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_post', '0005_blogpost_comment_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
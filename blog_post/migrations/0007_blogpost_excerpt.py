@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:33
+
+import html
+import re
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+# Same as blog_post.models.make_excerpt
+def make_excerpt(description):
+    text = ' '.join(re.sub(r'<[^>]+>', '', description or '').split())
+    return Truncator(html.unescape(text)).chars(280)
+
+
+def backfill_excerpts(apps, schema_editor):
+    BlogPost = apps.get_model('blog_post', 'BlogPost')
+    posts = []
+    for post in BlogPost.objects.only('description').iterator(chunk_size=500):
+        post.excerpt = make_excerpt(post.description)
+        posts.append(post)
+    BlogPost.objects.bulk_update(posts, ['excerpt'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_post', '0006_blogpost_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', editable=False, max_length=300),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
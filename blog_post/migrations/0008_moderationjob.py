@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_post', '0007_blogpost_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('leased_by', models.CharField(blank=True, default='', max_length=100)),
+                ('leased_until', models.DateTimeField(blank=True, null=True)),
+                ('outcome', models.CharField(blank=True, default='', max_length=10)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moderation_jobs', to='blog_post.blogpost')),
+            ],
+            options={
+                'ordering': ['run_after', 'pk'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='moderation_job_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_post', '0008_moderationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('prompt_version', models.CharField(max_length=16)),
+                ('adult', models.BooleanField()),
+                ('copied', models.BooleanField()),
+                ('quality', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('content_hash', 'prompt_version')},
+            },
+        ),
+    ]
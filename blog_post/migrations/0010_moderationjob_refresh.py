@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_post', '0009_moderationresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moderationjob',
+            name='refresh',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 from accounts.models import CustomUserModel
 import hashlib
@@ -71,10 +72,13 @@ class SubCategory(models.Model):
     def __str__(self):
         return f"{self.category.name} - {self.name}"
 import re
+import html
 import hashlib
 import logging
 from django.db import models
-from django.utils.text import slugify
+from django.db.models import Count, OuterRef, Subquery, Value, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils.text import Truncator, slugify
 from ckeditor_uploader.fields import RichTextUploadingField
 from imagekit.models import ImageSpecField
 from imagekit.processors import ResizeToFill, Adjust
@@ -87,6 +91,89 @@ def _strip_html(text: str) -> str:
     return ' '.join(clean.split()).strip()
 
 
+EXCERPT_LENGTH = 280
+
+
+def make_excerpt(description: str) -> str:
+    """The first ``EXCERPT_LENGTH`` characters of the text, cut at a word."""
+    text = html.unescape(_strip_html(description or ''))
+    return Truncator(text).chars(EXCERPT_LENGTH)
+
+
+class BlogPostQuerySet(models.QuerySet):
+    def latest_per(self, field, n=1):
+        """
+        The latest ``n`` posts for every value of ``field`` (e.g. ``'category'``)
+        in a single query, ranked with ROW_NUMBER() OVER (PARTITION BY ...).
+        The author is joined in, so listing them costs nothing extra.
+        """
+        return (
+            self.annotate(
+                group_rank=Window(
+                    RowNumber(),
+                    partition_by=models.F(field),
+                    order_by=[models.F('created_at').desc(), models.F('pk').desc()],
+                )
+            )
+            .filter(group_rank__lte=n)
+            .select_related('author')
+        )
+
+    def for_api(self, fields=None):
+        """
+        Load everything the API post serializers read up front: the related
+        rows joined in, tags prefetched and the like count annotated as
+        ``likes_total``, so a page costs the same number of queries at any
+        size. ``fields`` are the names being serialized (None for all);
+        what they leave out is not loaded, the rich text included.
+        """
+        def wanted(name):
+            return fields is None or name in fields
+
+        related = ['author', 'category']
+        if wanted('subcategory'):
+            related.append('subcategory__category')
+        queryset = self.select_related(*related)
+
+        if wanted('tags'):
+            queryset = queryset.prefetch_related('tags')
+        if wanted('likes_count'):
+            queryset = queryset.annotate(likes_total=Coalesce(Subquery(
+                Like.objects.filter(post=OuterRef('pk'))
+                .values('post').annotate(total=Count('pk')).values('total')
+            ), Value(0)))
+        if not wanted('description'):
+            queryset = queryset.defer('description')
+        return queryset
+
+    def recount_comments(self):
+        """
+        Recompute ``comment_count`` / ``reply_count`` from the comment tables
+        for the posts that drifted. Returns how many posts were fixed.
+        """
+        from comments.models import Comment
+
+        def counted(**filters):
+            return Coalesce(Subquery(
+                Comment.objects.filter(post=OuterRef('pk'), **filters)
+                .values('post').annotate(total=Count('pk')).values('total')
+            ), Value(0))
+
+        comments = counted(parent__isnull=True)
+        replies = counted(parent__isnull=False)
+
+        drifted = list(
+            self.annotate(actual_comments=comments, actual_replies=replies)
+            .exclude(comment_count=models.F('actual_comments'), reply_count=models.F('actual_replies'))
+            .values_list('pk', flat=True)
+        )
+        if drifted:
+            self.model.objects.filter(pk__in=drifted).update(
+                comment_count=comments, reply_count=replies
+            )
+        return len(drifted)
+
+
 class BlogPost(models.Model):
     STATUS_CHOICES = (
         ("pending", "Pending Approval"),
@@ -117,6 +204,9 @@ class BlogPost(models.Model):
         max_length=64, editable=False, db_index=True, null=True, blank=True
     )
 
+    # plain-text start of the description, set on save
+    excerpt = models.CharField(max_length=300, blank=True, default='', editable=False)
+
     category = models.ForeignKey(
         Category, on_delete=models.SET_NULL, null=True, blank=True
     )
@@ -136,11 +226,28 @@ class BlogPost(models.Model):
     views = models.PositiveIntegerField(default=0)
     content_quality = models.PositiveIntegerField(default=0)
 
+    # kept up to date by comments.signals, repair with `manage.py repair_comment_counts`
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     tags = models.ManyToManyField(Tag, blank=True, related_name="blog_posts")
 
+    objects = BlogPostQuerySet.as_manager()
+
+    # Only ever changed with F() updates (view buffer, comment signals,
+    # increment()). Code that saves a loaded post names the columns it
+    # changed (``update_fields_for()``), so a stale copy of these is never
+    # written back.
+    COUNTER_FIELDS = ('views', 'comment_count', 'reply_count')
+
+    # Loaded values of these are remembered: the hashes are only rebuilt
+    # when their sources change, and save() lists the ones it changed in
+    # ``saved_changes`` for the post_save handlers (search, suggestions).
+    TRACKED_FIELDS = ('title', 'subtitle', 'slug', 'description', 'featured_image', 'status')
+
     def save(self, *args, **kwargs):
         kwargs.pop('skip_auto_status', False)
 
@@ -153,27 +260,99 @@ class BlogPost(models.Model):
                 slug = f"{base_slug}-{counter}"
                 counter += 1
             self.slug = slug
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'slug'}
 
-        # ── Description hash (HTML stripped) ─────────────────────────────
-        clean_desc = _strip_html(self.description)
-        self.description_hash = hashlib.md5(clean_desc.encode("utf-8")).hexdigest()
+        # Hashes are only rebuilt when their source fields changed, so
+        # counter saves never strip HTML or re-read the image from disk.
+        update_fields = kwargs.get('update_fields')
 
-        # ── Content hash (title + clean description) ──────────────────────
-        self.content_hash = hashlib.md5(
-            (self.title + clean_desc).encode("utf-8")
-        ).hexdigest()
+        self.saved_changes = {
+            name for name in self.TRACKED_FIELDS
+            if (update_fields is None or name in update_fields) and self._source_changed(name)
+        }
+
+        # ── Description hash (HTML stripped) ─────────────────────────────
+        if (
+            (update_fields is None or {'title', 'description'} & set(update_fields))
+            and (self._source_changed('title', 'description') or not self.content_hash)
+        ):
+            clean_desc = _strip_html(self.description)
+            self.description_hash = hashlib.md5(clean_desc.encode("utf-8")).hexdigest()
+
+            # ── Content hash (title + clean description) ──────────────────
+            self.content_hash = hashlib.md5(
+                (self.title + clean_desc).encode("utf-8")
+            ).hexdigest()
+
+            # ── Plain-text excerpt for list payloads ──────────────────────
+            self.excerpt = make_excerpt(self.description)
+            if update_fields is not None:
+                update_fields = {*update_fields, 'description_hash', 'content_hash', 'excerpt'}
 
         # ── Image hash ────────────────────────────────────────────────────
-        if self.featured_image:
+        if (
+            (update_fields is None or 'featured_image' in update_fields)
+            and self.featured_image
+            and (self._source_changed('featured_image') or not self.image_hash)
+        ):
             try:
+                md5 = hashlib.md5()
+                for chunk in self.featured_image.chunks():
+                    md5.update(chunk)
+                self.image_hash = md5.hexdigest()
                 self.featured_image.file.seek(0)
-                img_bytes = self.featured_image.file.read()
-                self.image_hash = hashlib.md5(img_bytes).hexdigest()
-                self.featured_image.file.seek(0)
+                if update_fields is not None:
+                    update_fields = {*update_fields, 'image_hash'}
             except Exception as e:
                 logger.error(f"Image hash generation error: {e}")
 
+        if update_fields is not None:
+            kwargs['update_fields'] = update_fields
         super().save(*args, **kwargs)
+        self._loaded_values = self._current_values()
+
+    @classmethod
+    def update_fields_for(cls, names):
+        """
+        ``update_fields`` for saving the columns ``names`` (field names,
+        others such as tags are skipped) of a loaded post, with
+        ``updated_at``.
+        """
+        columns = {field.name for field in cls._meta.concrete_fields if not field.primary_key}
+        return {*(name for name in names if name in columns), 'updated_at'}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._current_values()
+        return instance
+
+    def _current_values(self):
+        # Read __dict__ directly so deferred fields are not loaded
+        sources = {name: self.__dict__.get(name) for name in self.TRACKED_FIELDS}
+        image = sources['featured_image']
+        if image is not None and not isinstance(image, str):
+            # A freshly assigned upload never compares equal to what was loaded
+            sources['featured_image'] = (
+                image.name if getattr(image, '_committed', False) else object()
+            )
+        return sources
+
+    def _source_changed(self, *names):
+        loaded = getattr(self, '_loaded_values', None)
+        if self.pk is None or loaded is None:
+            return True
+        current = self._current_values()
+        return any(
+            name in self.__dict__ and current[name] != loaded[name]
+            for name in names
+        )
+
+    def increment(self, field, amount=1):
+        """Add ``amount`` to a counter column without a full save."""
+        BlogPost.objects.filter(pk=self.pk).update(**{field: models.F(field) + amount})
+        self.refresh_from_db(fields=[field])
 
     @property
     def total_reactions(self):
@@ -285,3 +464,58 @@ class compnay_logo(models.Model):
 
 
 
+
+
+# Groq moderation queue, worked off by `manage.py moderate_posts`
+class ModerationJob(models.Model):
+    STATUS_CHOICES = (
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    )
+
+    post = models.ForeignKey(
+        BlogPost, on_delete=models.CASCADE, related_name="moderation_jobs"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    # ask Groq even when a stored result for the text exists
+    refresh = models.BooleanField(default=False)
+
+    # the worker holding the job, and until when
+    leased_by = models.CharField(max_length=100, blank=True, default="")
+    leased_until = models.DateTimeField(null=True, blank=True)
+
+    outcome = models.CharField(max_length=10, blank=True, default="")
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["run_after", "pk"]
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="moderation_job_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"Moderation of {self.post_id} ({self.status})"
+
+
+# Stored Groq verdicts, see blog_post/moderation_cache.py
+class ModerationResult(models.Model):
+    content_hash = models.CharField(max_length=64)
+    prompt_version = models.CharField(max_length=16)
+    adult = models.BooleanField()
+    copied = models.BooleanField()
+    # not known when a blocking check rejected the post first
+    quality = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("content_hash", "prompt_version")
+
+    def __str__(self):
+        return f"Moderation result {self.content_hash[:8]} ({self.prompt_version})"
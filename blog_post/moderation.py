@@ -0,0 +1,166 @@
+"""
+Runs the Groq moderation checks of a submission.
+
+With ``MODERATION_MODE = "combined"`` ``moderate()`` first asks for all
+three verdicts in one request (``groq_service.check_all()``), which
+sends the post once instead of three times. Only if that reply is
+malformed does it ask check by check, as ``"separate"`` always does.
+When the request itself fails (an API error, the circuit breaker open,
+the time up) every check gets its fail-safe value right away: three
+more requests to an API that is down would fail too, and would only
+add to the load the breaker is there to take off.
+
+Separate checks (adult, copyright, quality) go to a process-wide thread
+pool, so a submission waits for the slowest check instead of the sum of
+all three. Each request gets ``MODERATION_CALL_TIMEOUT`` seconds from
+the moment it starts and all of them share a ``MODERATION_DEADLINE``. A
+check that fails or runs out of time counts with the same fail-safe
+value ``groq_service`` uses when the API fails, and is listed in
+``Verdict.failed``. As soon as the adult or copyright check blocks the
+post the other checks are cancelled (or, if already running, no longer
+waited for).
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, wait
+
+from django.conf import settings
+
+from . import groq_service
+
+logger = logging.getLogger(__name__)
+
+MODE = getattr(settings, "MODERATION_MODE", "combined")  # or "separate"
+WORKERS = getattr(settings, "MODERATION_WORKERS", 12)
+CALL_TIMEOUT = getattr(settings, "MODERATION_CALL_TIMEOUT", 15)
+DEADLINE = getattr(settings, "MODERATION_DEADLINE", 25)
+
+# name -> (check, fail-safe value)
+CHECKS = {
+    "adult": ("check_adult_content", False),
+    "copyright": ("check_copyright", False),
+    "quality": ("get_quality_score", 50),
+}
+# a True from these rejects the post
+BLOCKING = ("adult", "copyright")
+
+Verdict = namedtuple("Verdict", "adult copied quality failed")
+
+_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="moderation")
+    return _executor
+
+
+def _run(name, started, title, content):
+    started[name] = time.monotonic()
+    check = getattr(groq_service, CHECKS[name][0])
+    return check(title, content, fail_safe=False)
+
+
+def moderate(title, content):
+    """
+    The ``Verdict`` of the moderation checks on a post. ``quality`` is
+    None when a blocking check rejected the post before the score came
+    back. ``failed`` names the checks that fell back to their fail-safe
+    value.
+    """
+    deadline = time.monotonic() + DEADLINE
+    if MODE == "combined":
+        try:
+            verdict = _moderate_combined(title, content, deadline)
+        except TimeoutError:
+            logger.error("[Groq] combined check timed out")
+            return _fail_safe()
+        except Exception as e:
+            logger.error(f"[Groq] combined check failed: {e}")
+            return _fail_safe()
+        if verdict is not None:
+            return verdict
+    return _moderate_separately(title, content, deadline)
+
+
+def _fail_safe():
+    """The verdict when no check could be run."""
+    return Verdict(
+        adult=CHECKS["adult"][1],
+        copied=CHECKS["copyright"][1],
+        quality=CHECKS["quality"][1],
+        failed=tuple(CHECKS),
+    )
+
+
+def _moderate_combined(title, content, deadline):
+    """
+    The verdict from a single request, None if the reply is malformed and
+    it has to be asked check by check. Failed requests and timeouts are
+    raised.
+    """
+    future = _get_executor().submit(groq_service.check_all, title, content)
+    try:
+        adult, copied, quality = future.result(
+            timeout=max(0, min(deadline - time.monotonic(), CALL_TIMEOUT))
+        )
+    except TimeoutError:
+        future.cancel()
+        raise
+    except groq_service.MalformedVerdict as e:
+        logger.warning(f"[Groq] combined check gave a malformed reply, asking check by check: {e}")
+        return None
+    return Verdict(adult=adult, copied=copied, quality=quality, failed=())
+
+
+def _moderate_separately(title, content, deadline):
+    started = {}
+    futures = {
+        _get_executor().submit(_run, name, started, title, content): name
+        for name in CHECKS
+    }
+    results = {}
+    failed = []
+    pending = set(futures)
+
+    while pending and not any(results.get(name) for name in BLOCKING):
+        # wake up for the first check to finish or run out of time
+        wake_at = min(
+            [deadline] + [started[futures[f]] + CALL_TIMEOUT for f in pending if futures[f] in started]
+        )
+        done, pending = wait(pending, timeout=max(0, wake_at - time.monotonic()), return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"[Groq] {name} check failed: {e}")
+                results[name] = CHECKS[name][1]
+                failed.append(name)
+
+        now = time.monotonic()
+        for future in list(pending):
+            name = futures[future]
+            if now >= deadline or (name in started and now >= started[name] + CALL_TIMEOUT):
+                logger.error(f"[Groq] {name} check timed out")
+                future.cancel()
+                pending.discard(future)
+                results[name] = CHECKS[name][1]
+                failed.append(name)
+
+    for future in pending:
+        future.cancel()
+
+    return Verdict(
+        adult=bool(results.get("adult")),
+        copied=bool(results.get("copyright")),
+        quality=results.get("quality"),
+        failed=tuple(failed),
+    )
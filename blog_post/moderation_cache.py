@@ -0,0 +1,61 @@
+"""
+Stored results of the Groq moderation checks.
+
+The verdict on a post only depends on its text and on the prompts, so
+``ModerationResult`` keeps it per ``BlogPost.content_hash`` (title plus
+description without HTML) and ``groq_service.PROMPT_VERSION``.
+Resubmissions, edits that leave the text alone and re-checks of the same
+content are answered from the table without an API call. An admin who
+doubts a stored verdict re-checks the post with ``refresh``, which asks
+Groq again and replaces the result (the "Moderate again" action).
+
+``PROMPT_VERSION`` follows the prompts and the model, so changing either
+in ``groq_service`` leaves the old results unused.
+``manage.py clear_moderation_cache`` deletes them (or, with ``--all``,
+every stored result, e.g. after a change of policy the prompts don't
+show).
+"""
+from . import groq_service, moderation
+from .models import ModerationResult
+
+
+def get(content_hash):
+    """The stored ``moderation.Verdict`` for ``content_hash``, or None."""
+    result = ModerationResult.objects.filter(
+        content_hash=content_hash, prompt_version=groq_service.PROMPT_VERSION
+    ).first()
+    if result is None:
+        return None
+    return moderation.Verdict(adult=result.adult, copied=result.copied, quality=result.quality, failed=())
+
+
+def store(content_hash, verdict):
+    """Keep ``verdict`` unless a check fell back to its fail-safe value."""
+    if verdict.failed:
+        return
+    ModerationResult.objects.update_or_create(
+        content_hash=content_hash,
+        prompt_version=groq_service.PROMPT_VERSION,
+        defaults={"adult": verdict.adult, "copied": verdict.copied, "quality": verdict.quality},
+    )
+
+
+def moderate(title, content, content_hash, refresh=False):
+    """
+    ``moderation.moderate()``, from the stored result when there is one
+    and ``refresh`` is false.
+    """
+    verdict = get(content_hash) if content_hash and not refresh else None
+    if verdict is None:
+        verdict = moderation.moderate(title, content)
+        if content_hash:
+            store(content_hash, verdict)
+    return verdict
+
+
+def clear(everything=False):
+    """Delete the results of older prompt versions, or all of them. Returns the count."""
+    results = ModerationResult.objects.all()
+    if not everything:
+        results = results.exclude(prompt_version=groq_service.PROMPT_VERSION)
+    return results.delete()[0]
@@ -0,0 +1,167 @@
+"""
+Database-backed queue for post moderation.
+
+``create_blog`` saves a new post as pending and ``enqueue()``s it; the
+``moderate_posts`` management command works the queue off: it claims a
+few due jobs, runs the Groq checks of ``blog_post.moderation`` on each
+(or reuses the stored result for the same text unless the job asks for
+a ``refresh``, see ``blog_post.moderation_cache``) and publishes, keeps
+pending or rejects the post. Jobs are ``ModerationJob`` rows in the main
+database, so there is no broker to run, and a slow Groq only slows the
+workers, not the web requests.
+
+A job is claimed with a conditional UPDATE, so any number of workers can
+share the table, and the claim is a lease of ``MODERATION_LEASE_SECONDS``:
+the jobs of a worker that died are picked up again once their lease
+runs out. Checks that fail are retried with exponential backoff; after
+``MODERATION_MAX_ATTEMPTS`` the post gets the fail-safe verdict a
+synchronous check would have given.
+"""
+import os
+import socket
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from site_settings.models import SiteSettings
+from . import moderation_cache
+from .models import ModerationJob
+
+LEASE_SECONDS = getattr(settings, "MODERATION_LEASE_SECONDS", 120)
+MAX_ATTEMPTS = getattr(settings, "MODERATION_MAX_ATTEMPTS", 5)
+RETRY_BASE_SECONDS = getattr(settings, "MODERATION_RETRY_BASE_SECONDS", 30)
+RETRY_MAX_SECONDS = getattr(settings, "MODERATION_RETRY_MAX_SECONDS", 60 * 30)
+
+DEFAULT_THRESHOLD = 70
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def enqueue(post, refresh=False):
+    """Queue ``post``; with ``refresh`` its stored result is not used."""
+    return ModerationJob.objects.create(post=post, refresh=refresh)
+
+
+def publish_threshold():
+    """The quality score a post needs to be published right away."""
+    score_control = SiteSettings.get_settings().score_control
+    try:
+        return int(score_control) if score_control else DEFAULT_THRESHOLD
+    except ValueError:
+        return DEFAULT_THRESHOLD
+
+
+def retry_delay(attempts):
+    """Seconds to wait after the ``attempts``-th failed try."""
+    return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def _claimable(now):
+    return Q(status="queued", run_after__lte=now) | Q(status="running", leased_until__lt=now)
+
+
+def claim(worker, limit):
+    """Lease up to ``limit`` due jobs to ``worker``."""
+    now = timezone.now()
+    candidates = (
+        ModerationJob.objects.filter(_claimable(now))
+        .order_by("run_after", "pk")
+        .values_list("pk", flat=True)[:limit * 2]
+    )
+    claimed = []
+    for pk in candidates:
+        # another worker may have taken it since, then nothing is updated
+        if ModerationJob.objects.filter(_claimable(now), pk=pk).update(
+            status="running",
+            leased_by=worker,
+            leased_until=now + timedelta(seconds=LEASE_SECONDS),
+            attempts=F("attempts") + 1,
+        ):
+            claimed.append(pk)
+            if len(claimed) == limit:
+                break
+    return list(
+        ModerationJob.objects.filter(pk__in=claimed, leased_by=worker).select_related("post")
+    )
+
+
+def _finish(job, worker, **fields):
+    """Update ``job`` if ``worker`` still holds its lease."""
+    return ModerationJob.objects.filter(pk=job.pk, status="running", leased_by=worker).update(
+        leased_until=None, **fields
+    )
+
+
+def process(job, worker):
+    """
+    Moderate the post of a claimed job. Returns the outcome: published,
+    pending or rejected, retry when the checks failed and will be tried
+    again, or lost when the lease ran out meanwhile.
+    """
+    post = job.post
+    verdict = moderation_cache.moderate(post.title, post.description, post.content_hash, refresh=job.refresh)
+    now = timezone.now()
+    blocked = verdict.adult or verdict.copied
+
+    if verdict.failed and not blocked and job.attempts < MAX_ATTEMPTS:
+        if not _finish(
+            job, worker,
+            status="queued",
+            run_after=now + timedelta(seconds=retry_delay(job.attempts)),
+            last_error=f"failed checks: {', '.join(verdict.failed)}",
+        ):
+            return "lost"
+        return "retry"
+
+    if blocked:
+        outcome = "rejected"
+    elif verdict.quality >= publish_threshold():
+        outcome = "published"
+    else:
+        outcome = "pending"
+
+    with transaction.atomic():
+        if not _finish(
+            job, worker,
+            status="failed" if verdict.failed and not blocked else "done",
+            outcome=outcome,
+            finished_at=now,
+            last_error=f"failed checks: {', '.join(verdict.failed)}" if verdict.failed else "",
+        ):
+            return "lost"
+        # an admin may have decided in the meantime
+        post.refresh_from_db(fields=["status"])
+        if post.status == "pending":
+            post.status = outcome
+            if verdict.quality is not None:
+                post.content_quality = verdict.quality
+            post.save(update_fields=["status", "content_quality"])
+    return outcome
+
+
+def work(worker, limit, stats):
+    """Claim and process one batch, counting outcomes in ``stats``. Returns the batch size."""
+    jobs = claim(worker, limit)
+    for job in jobs:
+        started = time.monotonic()
+        stats[process(job, worker)] += 1
+        stats["seconds"] += time.monotonic() - started
+    return len(jobs)
+
+
+def queue_stats():
+    """Jobs per status and the age in seconds of the oldest due job."""
+    now = timezone.now()
+    counts = Counter(dict(
+        ModerationJob.objects.order_by().values_list("status").annotate(Count("pk"))
+    ))
+    oldest = ModerationJob.objects.filter(_claimable(now)).aggregate(oldest=Min("created_at"))["oldest"]
+    return counts, (now - oldest).total_seconds() if oldest else 0
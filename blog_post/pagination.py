@@ -0,0 +1,109 @@
+"""
+Cursor pagination for the blog API.
+
+``KeysetCursorPagination`` pages on the queryset's first ordering column
+with the primary key as tie breaker, e.g. ``(created_at, id)`` or
+``(views, id)``. The opaque ``?cursor=`` holds the last row's values, so
+every page is a range scan of ``page_size + 1`` rows: no OFFSET, no
+COUNT, and no shifted or repeated rows when posts are published while a
+client scrolls. Clients may ask for ``?page_size=`` up to
+``API_MAX_PAGE_SIZE``. Only a ``next`` link is returned.
+"""
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from rest_framework import exceptions
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+MAX_PAGE_SIZE = getattr(settings, "API_MAX_PAGE_SIZE", 50)
+
+
+class KeysetCursorPagination(BasePagination):
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = MAX_PAGE_SIZE
+    # used when neither the queryset nor the model is ordered
+    ordering = "-created_at"
+
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, queryset):
+        """``(field name, descending)`` of the column pages are keyed on."""
+        ordering = queryset.query.order_by or queryset.model._meta.ordering or [self.ordering]
+        first = str(ordering[0])
+        return first.lstrip("-"), first.startswith("-")
+
+    def encode_cursor(self, obj):
+        value = self.field.value_to_string(obj)
+        return urlsafe_base64_encode(force_bytes(json.dumps([value, obj.pk])))
+
+    def decode_cursor(self, cursor):
+        try:
+            value, pk = json.loads(force_str(urlsafe_base64_decode(cursor)))
+            return self.field.to_python(value), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError, ValidationError):
+            raise exceptions.ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        name, descending = self.get_ordering(queryset)
+        self.field = queryset.model._meta.get_field(name)
+        size = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            value, pk = self.decode_cursor(cursor)
+            op = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{name}__{op}": value}) | Q(**{name: value, f"pk__{op}": pk})
+            )
+
+        if descending:
+            queryset = queryset.order_by(f"-{name}", "-pk")
+        else:
+            queryset = queryset.order_by(name, "pk")
+
+        # one extra row tells whether there is a next page
+        rows = list(queryset[:size + 1])
+        self.next_cursor = None
+        if len(rows) > size:
+            rows = rows[:size]
+            self.next_cursor = self.encode_cursor(rows[-1])
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
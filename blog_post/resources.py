@@ -139,7 +139,12 @@ class BlogPostResource(resources.ModelResource):
         if not dry_run:
             try:
                 with transaction.atomic():
-                    instance.save(skip_auto_status=True)
+                    if is_create:
+                        instance.save(skip_auto_status=True)
+                    else:
+                        # the imported columns only, comment counts are kept
+                        imported = [field.attribute for field in self.get_import_fields()]
+                        instance.save(skip_auto_status=True, update_fields=BlogPost.update_fields_for(imported))
                     print(f" Saved: {instance.title} with status '{instance.status}'")
             except Exception as e:
                 print(f" Error saving instance: {e}")
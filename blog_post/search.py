@@ -0,0 +1,207 @@
+"""
+Full-text search over published blog posts.
+
+Posts live in the ``blog_post_search`` FTS5 table (created by migration
+0006) with their title, subtitle, plain-text description and tag names.
+``blog_post.signals`` re-indexes a post when one of ``INDEXED_FIELDS``
+or its tags change, other saves (status bookkeeping, quality scores)
+leave the index alone.
+Results are ranked with BM25 and come with the matching words
+highlighted in the title and in a snippet of the text.
+
+FTS5 only exists on SQLite; on other databases search falls back to
+``icontains`` on the title and subtitle, without ranking or snippets.
+"""
+import unicodedata
+from html import unescape
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+from .models import BlogPost
+
+TABLE = "blog_post_search"
+
+# BlogPost columns the index rows are built from; status decides whether
+# a post is in the index at all
+INDEXED_FIELDS = {"title", "subtitle", "description", "status"}
+
+# bm25() weight of every column: title, subtitle, body, tags
+WEIGHTS = (10.0, 4.0, 1.0, 6.0)
+SNIPPET_TOKENS = 24
+
+# Highlight markers, swapped for <mark> once the text has been escaped
+_OPEN, _CLOSE = "\x02", "\x03"
+
+
+def available():
+    return connection.vendor == "sqlite"
+
+
+def plain_text(html):
+    """The visible text of a rich-text field, whitespace collapsed."""
+    return " ".join(unescape(strip_tags(html or "")).split())
+
+
+def _words(text):
+    # letters, digits and combining marks (Bangla vowel signs) make words,
+    # same as the table's tokenizer
+    return "".join(
+        char if unicodedata.category(char)[0] in "LNM" else " " for char in text
+    ).split()
+
+
+def match_expression(query):
+    """
+    An FTS5 query matching every word of ``query``, the last one as a
+    prefix since it may still be being typed. Empty if there is no word.
+    """
+    terms = [f'"{word}"' for word in _words(query)]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def reindex(post_ids):
+    """Bring the index rows of ``post_ids`` up to date (drops unpublished ones)."""
+    post_ids = list(post_ids)
+    if not post_ids or not available():
+        return
+
+    posts = (
+        BlogPost.objects.filter(pk__in=post_ids, status="published")
+        .only("title", "subtitle", "description")
+        .prefetch_related("tags")
+    )
+    rows = [
+        (
+            post.pk,
+            post.title,
+            post.subtitle or "",
+            plain_text(post.description),
+            " ".join(tag.name for tag in post.tags.all()),
+        )
+        for post in posts
+    ]
+
+    with connection.cursor() as cursor:
+        placeholders = ", ".join(["%s"] * len(post_ids))
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid IN ({placeholders})", post_ids)
+        if rows:
+            cursor.executemany(
+                f"INSERT INTO {TABLE}(rowid, title, subtitle, body, tags) VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+
+
+def filter_queryset(queryset, query):
+    """Narrow a BlogPost queryset down to the posts matching ``query``."""
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not available():
+        return queryset.filter(Q(title__icontains=query) | Q(subtitle__icontains=query))
+    return queryset.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s", [expression])
+    )
+
+
+def _highlighted(text):
+    text = escape(text)
+    return mark_safe(text.replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>"))
+
+
+class SearchResults:
+    """
+    The published posts matching ``query``, best first. Nothing is fetched
+    until it is sliced, so it can be handed to a ``Paginator``: each page
+    costs the ranked FTS query plus one query for the posts.
+
+    Every post gets ``search_title`` and ``search_snippet``, safe HTML with
+    the matching words wrapped in ``<mark>``. ``queryset`` decides how the
+    posts are loaded (select_related and the like); its filters are part
+    of the count and ranking queries, so pages are full and the total is
+    right.
+    """
+
+    def __init__(self, query, queryset=None):
+        if queryset is None:
+            queryset = BlogPost.objects.select_related("category", "author")
+        self.query = query
+        self.queryset = queryset.filter(status="published")
+        self.expression = match_expression(query)
+        self._count = None
+
+    def _scope(self):
+        """An ``AND`` keeping the ids ``queryset`` allows, with its params."""
+        sql, params = self.queryset.order_by().values("pk").query.sql_with_params()
+        return f" AND rowid IN ({sql})", list(params)
+
+    def count(self):
+        if self._count is None:
+            if not self.expression:
+                self._count = 0
+            elif not available():
+                self._count = filter_queryset(self.queryset, self.query).count()
+            else:
+                scope, params = self._scope()
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH %s{scope}",
+                        [self.expression, *params],
+                    )
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+
+        offset = key.start or 0
+        limit = (key.stop if key.stop is not None else self.count()) - offset
+        if not self.expression or limit <= 0:
+            return []
+        return self._fetch(offset, limit)
+
+    def _fetch(self, offset, limit):
+        if not available():
+            posts = list(filter_queryset(self.queryset, self.query).order_by("-created_at")[offset:offset + limit])
+            descriptions = {post.pk: post.__dict__.get("description") for post in posts}
+            if None in descriptions.values():
+                # deferred (for_api()), one query rather than one per post
+                descriptions = dict(
+                    BlogPost.objects.filter(pk__in=descriptions).values_list("pk", "description")
+                )
+            for post in posts:
+                post.search_title = post.title
+                post.search_snippet = plain_text(descriptions[post.pk])[:200]
+            return posts
+
+        weights = ", ".join(str(weight) for weight in WEIGHTS)
+        scope, params = self._scope()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, highlight({TABLE}, 0, %s, %s), "
+                f"snippet({TABLE}, 2, %s, %s, '…', %s) "
+                f"FROM {TABLE} WHERE {TABLE} MATCH %s{scope} "
+                f"ORDER BY bm25({TABLE}, {weights}) LIMIT %s OFFSET %s",
+                [_OPEN, _CLOSE, _OPEN, _CLOSE, SNIPPET_TOKENS, self.expression, *params, limit, offset],
+            )
+            hits = cursor.fetchall()
+
+        by_id = self.queryset.in_bulk([post_id for post_id, _, _ in hits])
+        results = []
+        for post_id, title, snippet in hits:
+            post = by_id.get(post_id)
+            if post is None:
+                continue
+            post.search_title = _highlighted(title)
+            post.search_snippet = _highlighted(snippet)
+            results.append(post)
+        return results
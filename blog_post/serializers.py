@@ -7,6 +7,41 @@ from .models import (
 from accounts.models import CustomUserModel
 from tags.models import Tag
 
+
+def _field_names(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Sparse fieldsets from the query string: ``?fields=a,b`` returns only
+    those fields and ``?expand=c`` adds ones a list leaves out. Lists
+    return ``Meta.default_fields`` when it is set; detail views, and
+    serializers without it, return every field. Dropped fields are removed
+    before serializing, so they cost nothing.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = self.wanted_fields(self.context.get('request'), self.context.get('view'))
+        if wanted is not None:
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+    @classmethod
+    def wanted_fields(cls, request, view=None):
+        """The field names to return for ``request``, None for all of them."""
+        if request is None:
+            return None
+        fields = _field_names(request.query_params.get('fields'))
+        expand = _field_names(request.query_params.get('expand'))
+        if fields:
+            return fields | expand
+        default = getattr(cls.Meta, 'default_fields', None)
+        if default is None or getattr(view, 'action', None) == 'retrieve':
+            return None
+        return set(default) | expand
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomUserModel
@@ -17,7 +52,7 @@ class TagSerializer(serializers.ModelSerializer):
         model = Tag
         fields = ['id', 'name', 'slug']
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = [
@@ -25,7 +60,7 @@ class CategorySerializer(serializers.ModelSerializer):
             'description', 'created_at', 'updated_at'
         ]
 
-class SubCategorySerializer(serializers.ModelSerializer):
+class SubCategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     
     class Meta:
@@ -40,31 +75,50 @@ class BlogAdditionalImageSerializer(serializers.ModelSerializer):
         model = BlogAdditionalImage
         fields = ['id', 'additional_image', 'additional_image_url']
 
-class BlogPostListSerializer(serializers.ModelSerializer):
+class CategoryBriefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'slug']
+
+class BlogPostListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
-    category = CategorySerializer(read_only=True)
+    category = CategoryBriefSerializer(read_only=True)
     subcategory = SubCategorySerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     likes_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
+    comments_count = serializers.IntegerField(source='comment_count', read_only=True)
     
     class Meta:
         model = BlogPost
         fields = [
-            'id', 'title', 'subtitle', 'slug', 'description', 
+            'id', 'title', 'subtitle', 'slug', 'excerpt', 'description',
             'featured_image', 'featured_image_url', 'category',
             'subcategory', 'author', 'status', 'views', 'likes_count',
             'content_quality', 'created_at', 'updated_at', 'tags',
             'comments_count'
         ]
+        # the card payload lists return unless ?fields= / ?expand= say otherwise
+        default_fields = [
+            'id', 'title', 'subtitle', 'slug', 'excerpt',
+            'featured_image', 'featured_image_url', 'category', 'author',
+            'views', 'likes_count', 'comments_count', 'created_at'
+        ]
     
     def get_likes_count(self, obj):
+        # annotated by BlogPostQuerySet.for_api()
+        if hasattr(obj, 'likes_total'):
+            return obj.likes_total
         return obj.likes.count()
-    
-    def get_comments_count(self, obj):
-        # Assuming you have a comments app
-        from comments.models import Comment
-        return Comment.objects.filter(post=obj).count()
+
+
+class BlogPostSearchSerializer(BlogPostListSerializer):
+    title_highlight = serializers.CharField(source='search_title', read_only=True)
+    snippet = serializers.CharField(source='search_snippet', read_only=True)
+
+    class Meta(BlogPostListSerializer.Meta):
+        fields = BlogPostListSerializer.Meta.fields + ['title_highlight', 'snippet']
+        default_fields = BlogPostListSerializer.Meta.default_fields + ['title_highlight', 'snippet']
+
 
 class BlogPostCreateSerializer(serializers.ModelSerializer):
     tags_list = serializers.ListField(
@@ -131,10 +185,12 @@ class BlogPostCreateSerializer(serializers.ModelSerializer):
                 tag_objects.append(tag)
             instance.tags.set(tag_objects)
         
-        instance.save()
+        # only the given columns, counters and deferred fields stay as they are
+        instance.save(update_fields=BlogPost.update_fields_for(validated_data))
         return instance
 
 class BlogPostDetailSerializer(BlogPostListSerializer):
+    category = CategorySerializer(read_only=True)
     additional_images = BlogAdditionalImageSerializer(
         many=True, 
         source='additional_images.all',
@@ -145,8 +201,9 @@ class BlogPostDetailSerializer(BlogPostListSerializer):
         fields = BlogPostListSerializer.Meta.fields + [
             'additional_images', 'content_hash', 'image_hash'
         ]
+        default_fields = None
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
@@ -154,7 +211,7 @@ class LikeSerializer(serializers.ModelSerializer):
         fields = ['id', 'post', 'user', 'created_at']
         read_only_fields = ['user']
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
@@ -169,7 +226,7 @@ class PostViewIpSerializer(serializers.ModelSerializer):
         model = Post_view_ip
         fields = ['id', 'post', 'user', 'ip_address', 'viewed_at']
 
-class CompanyLogoSerializer(serializers.ModelSerializer):
+class CompanyLogoSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = compnay_logo
         fields = ['id', 'name', 'logo_svg']
\ No newline at end of file
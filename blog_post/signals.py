@@ -0,0 +1,130 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from comments.models import Comment
+from interactions.models import Share
+from tags.models import Tag
+from . import conditional, homepage, search, suggest
+from .models import BlogAdditionalImage, BlogPost, Category, Like, Review, SubCategory, compnay_logo
+
+
+# ── Homepage snapshot invalidation ────────────────────────────────────────
+
+@receiver([post_save, post_delete], sender=BlogPost)
+def blog_post_changed(sender, **kwargs):
+    transaction.on_commit(partial(homepage.invalidate, "posts", "tags"))
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, **kwargs):
+    transaction.on_commit(partial(homepage.invalidate, "posts"))
+
+
+@receiver([post_save, post_delete], sender=Tag)
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def tags_changed(sender, **kwargs):
+    transaction.on_commit(partial(homepage.invalidate, "tags"))
+
+
+@receiver([post_save, post_delete], sender=compnay_logo)
+def company_logo_changed(sender, **kwargs):
+    transaction.on_commit(partial(homepage.invalidate, "logos"))
+
+
+# ── Search suggestion index ───────────────────────────────────────────────
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_save, sender=Tag)
+def suggestion_saved(sender, instance, **kwargs):
+    # posts only matter when their title, slug or status changed
+    changes = getattr(instance, "saved_changes", None)
+    if changes is None or changes & suggest.POST_FIELDS:
+        transaction.on_commit(partial(suggest.publish, *suggest.entry(instance)))
+
+
+@receiver(post_delete, sender=BlogPost)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=SubCategory)
+@receiver(post_delete, sender=Tag)
+def suggestion_deleted(sender, instance, **kwargs):
+    key, _ = suggest.entry(instance)
+    transaction.on_commit(partial(suggest.publish, key, None))
+
+
+# ── Full-text search index ────────────────────────────────────────────────
+
+@receiver(post_save, sender=BlogPost)
+def reindex_post(sender, instance, **kwargs):
+    # saves that only touch other columns leave the index alone
+    changes = getattr(instance, "saved_changes", None)
+    if changes is None or changes & search.INDEXED_FIELDS:
+        transaction.on_commit(partial(search.reindex, [instance.pk]))
+
+
+@receiver(post_delete, sender=BlogPost)
+def unindex_post(sender, instance, **kwargs):
+    transaction.on_commit(partial(search.reindex, [instance.pk]))
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def reindex_tagged_posts(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # the tag's posts are gone from the through table by post_clear
+        instance._search_post_ids = list(instance.blog_posts.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        post_ids = [instance.pk]
+    elif action == "post_clear":
+        post_ids = getattr(instance, "_search_post_ids", [])
+    else:
+        post_ids = list(pk_set or ())
+    transaction.on_commit(partial(search.reindex, post_ids))
+
+
+@receiver(post_save, sender=Tag)
+def reindex_tag_posts(sender, instance, created, **kwargs):
+    if not created:
+        post_ids = list(instance.blog_posts.values_list("pk", flat=True))
+        transaction.on_commit(partial(search.reindex, post_ids))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tag_posts(sender, instance, **kwargs):
+    instance._search_post_ids = list(instance.blog_posts.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def reindex_untagged_posts(sender, instance, **kwargs):
+    post_ids = getattr(instance, "_search_post_ids", [])
+    transaction.on_commit(partial(search.reindex, post_ids))
+
+
+# ── Conditional GET stamps ────────────────────────────────────────────────
+
+@receiver([post_save, post_delete], sender=BlogPost)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=SubCategory)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def posts_changed(sender, **kwargs):
+    transaction.on_commit(partial(conditional.touch, "posts"))
+
+
+@receiver([post_save, post_delete], sender=Like)
+@receiver([post_save, post_delete], sender=Review)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Share)
+def post_activity(sender, instance, **kwargs):
+    transaction.on_commit(partial(conditional.touch, conditional.post_scope(instance.post_id)))
+
+
+@receiver([post_save, post_delete], sender=BlogAdditionalImage)
+def post_images_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(conditional.touch, conditional.post_scope(instance.blog_id)))
@@ -0,0 +1,325 @@
+"""
+Typeahead suggestions for the header search box.
+
+Every worker keeps the names of the categories, subcategories and tags
+and the titles of the published posts in a sorted array, one row per word
+start, so "learn" finds "Machine Learning". There is one array per
+kind, and one more for the word starts inside a label, so thousands of
+post titles never push a category out of reach. A keystroke bisects to
+the first row starting with the typed prefix in each and walks forward:
+no query, and the only I/O is a cache read at most every
+``SEARCH_SUGGEST_REVALIDATE_SECONDS``.
+
+The array is kept up to date incrementally. ``blog_post.signals``
+``publish()``es every change that commits (a post published, renamed or
+removed, a tag added, ...) to a numbered log in the shared cache, and
+each worker bisects the changed rows in or out of its own array. Only
+when the log can't be trusted (entries expired or lost, the cache
+wiped, ``invalidate()`` called) does a worker reload everything, in a
+background thread while it keeps answering from the old array. A worker
+only builds on the request path once, for its very first lookup.
+"""
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.urls import reverse
+
+from tags.models import Tag
+from .models import BlogPost, Category, SubCategory
+
+LIMIT = getattr(settings, "SEARCH_SUGGEST_LIMIT", 8)
+REVALIDATE_SECONDS = getattr(settings, "SEARCH_SUGGEST_REVALIDATE_SECONDS", 5)
+
+# Rows looked at per array and lookup, bounds the cost of a one letter prefix
+SCAN_LIMIT = 200
+
+VERSION_KEY = "search_suggest:version"  # replaced: every worker reloads
+SEQ_KEY = "search_suggest:seq"  # number of the last published change
+CHANGE_KEY = "search_suggest:change:{}"
+# How long changes stay in the log, and how many a worker catches up on
+# before it reloads instead
+CHANGE_TIMEOUT = 60 * 60
+MAX_CHANGES = 500
+
+# Listed in the order they are shown when equally good
+KINDS = ("category", "subcategory", "tag", "post")
+
+# The BlogPost columns a post's suggestion is made of
+POST_FIELDS = {"title", "slug", "status"}
+
+Suggestion = namedtuple("Suggestion", "kind label url")
+
+
+def normalize(text):
+    return " ".join(text.casefold().split())
+
+
+class _Index:
+    """
+    ``rows`` holds a sorted array per bucket, ``(matches mid-label,
+    kind)``, of ``(key, rank)`` for every word start of every label, and
+    ``keys`` just the keys for bisecting. ``BUCKETS`` is the order results
+    are ranked in. Entries are addressed by ``(kind, pk)``; removed ones
+    leave a None in ``suggestions`` so positions stay put.
+    """
+
+    BUCKETS = [(mid_label, kind) for mid_label in (False, True) for kind in KINDS]
+
+    def __init__(self, entries):
+        self.suggestions = []
+        self.positions = {}
+        self.exact = {}
+        self.rows = {bucket: [] for bucket in self.BUCKETS}
+        for key, suggestion in entries:
+            for bucket, row in self._add(key, suggestion):
+                self.rows[bucket].append(row)
+        for rows in self.rows.values():
+            rows.sort()
+        self.keys = {bucket: [row[0] for row in rows] for bucket, rows in self.rows.items()}
+
+    def _add(self, key, suggestion):
+        position = len(self.suggestions)
+        self.suggestions.append(suggestion)
+        self.positions[key] = position
+        self._put_exact(suggestion)
+        return self._rows(suggestion, position)
+
+    def _put_exact(self, suggestion):
+        if suggestion.kind not in ("category", "subcategory"):
+            return
+        # categories win over subcategories of the same name
+        name = normalize(suggestion.label)
+        current = self.exact.get(name)
+        if current is None or KINDS.index(current.kind) > KINDS.index(suggestion.kind):
+            self.exact[name] = suggestion
+
+    @staticmethod
+    def _rows(suggestion, position):
+        name = normalize(suggestion.label)
+        rank = (len(name), position)
+        rows, start = [], 0
+        for word in name.split(" "):
+            rows.append(((start > 0, suggestion.kind), (name[start:], rank)))
+            start += len(word) + 1
+        return rows
+
+    def put(self, key, suggestion):
+        """Add or replace the entry ``key``, None removes it."""
+        self.remove(key)
+        if suggestion is None:
+            return
+        for bucket, row in self._add(key, suggestion):
+            position = bisect_left(self.rows[bucket], row)
+            self.rows[bucket].insert(position, row)
+            self.keys[bucket].insert(position, row[0])
+
+    def remove(self, key):
+        position = self.positions.pop(key, None)
+        if position is None:
+            return
+        suggestion, self.suggestions[position] = self.suggestions[position], None
+        for bucket, row in self._rows(suggestion, position):
+            index = bisect_left(self.rows[bucket], row)
+            del self.rows[bucket][index], self.keys[bucket][index]
+
+        name = normalize(suggestion.label)
+        if self.exact.get(name) is suggestion:
+            del self.exact[name]
+            for other in self.suggestions:
+                if other is not None and normalize(other.label) == name:
+                    self._put_exact(other)
+
+
+def entry(instance):
+    """
+    The ``(key, suggestion)`` of a saved category, subcategory, tag or
+    post. The suggestion is None when it is not shown, e.g. for a post
+    that isn't published.
+    """
+    if isinstance(instance, Category):
+        kind, label, url = "category", instance.name, ("category_post", instance.slug)
+    elif isinstance(instance, SubCategory):
+        kind, label, url = "subcategory", instance.name, ("category_post", instance.slug)
+    elif isinstance(instance, Tag):
+        kind, label, url = "tag", instance.name, ("tag_posts", instance.slug)
+    else:
+        kind, label, url = "post", instance.title, ("blog_details", instance.slug)
+        if instance.status != "published":
+            return (kind, instance.pk), None
+    if not url[1] or not normalize(label):
+        return (kind, instance.pk), None
+    return (kind, instance.pk), Suggestion(kind, label, reverse(url[0], args=[url[1]]))
+
+
+def _load():
+    def rows(kind, url_name, queryset, label="name"):
+        return [
+            ((kind, pk), Suggestion(kind, name, reverse(url_name, args=[slug])))
+            for pk, name, slug in queryset.values_list("pk", label, "slug")
+            if slug and normalize(name)
+        ]
+
+    return _Index(
+        rows("category", "category_post", Category.objects.all())
+        + rows("subcategory", "category_post", SubCategory.objects.all())
+        + rows("tag", "tag_posts", Tag.objects.all())
+        + rows("post", "blog_details", BlogPost.objects.filter(status="published"), label="title")
+    )
+
+
+# ── Keeping workers in step ───────────────────────────────────────────────
+
+_lock = threading.Lock()
+_index = None
+_version = None
+_seq = 0
+_checked_at = 0.0
+_reloading = False
+
+
+def _stamps():
+    """The shared ``(version, seq)``, created when missing."""
+    found = cache.get_many([VERSION_KEY, SEQ_KEY])
+    version, seq = found.get(VERSION_KEY), found.get(SEQ_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY)
+    if seq is None:
+        cache.add(SEQ_KEY, 0, None)
+        seq = cache.get(SEQ_KEY, 0)
+    return version, seq
+
+
+def _reload():
+    """Load everything from the database and swap it in."""
+    global _index, _version, _seq
+
+    # stamps first: changes that commit during the load are applied
+    # again afterwards, which does no harm
+    version, seq = _stamps()
+    index = _load()
+    with _lock:
+        _index, _version, _seq = index, version, seq
+    return index
+
+
+def _reload_in_background():
+    global _reloading
+
+    with _lock:
+        if _reloading:
+            return
+        _reloading = True
+
+    def run():
+        global _reloading
+        try:
+            _reload()
+        finally:
+            with _lock:
+                _reloading = False
+            close_old_connections()
+
+    threading.Thread(target=run, name="search-suggest-reload", daemon=True).start()
+
+
+def _get_index():
+    global _checked_at, _seq
+
+    now = time.monotonic()
+    with _lock:
+        if _index is not None and now - _checked_at < REVALIDATE_SECONDS:
+            return _index
+        index, version, applied = _index, _version, _seq
+
+    if index is None:
+        return _reload()
+
+    latest_version, seq = _stamps()
+    if latest_version != version or seq < applied:
+        _reload_in_background()
+    elif seq > applied:
+        keys = [CHANGE_KEY.format(n) for n in range(applied + 1, seq + 1)]
+        changes = cache.get_many(keys) if len(keys) <= MAX_CHANGES else {}
+        if len(changes) < len(keys):
+            _reload_in_background()
+        else:
+            with _lock:
+                # another thread may have caught up meanwhile
+                if _index is index:
+                    for n in range(_seq + 1, seq + 1):
+                        index.put(*changes[CHANGE_KEY.format(n)])
+                    _seq = max(_seq, seq)
+
+    with _lock:
+        _checked_at = now
+        return _index
+
+
+def publish(key, suggestion):
+    """
+    Tell every worker that entry ``key`` is now ``suggestion`` (None:
+    gone). Called once the change has committed.
+    """
+    cache.add(SEQ_KEY, 0, None)
+    try:
+        seq = cache.incr(SEQ_KEY)
+    except ValueError:  # the cache was cleared meanwhile
+        return invalidate()
+    if not cache.add(CHANGE_KEY.format(seq), (key, suggestion), CHANGE_TIMEOUT):
+        # two changes drew the same number (a cache without atomic
+        # increments), one would be lost
+        invalidate()
+
+
+def invalidate():
+    """Make every worker reload its index."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+# ── Lookups ───────────────────────────────────────────────────────────────
+
+def suggest(query, limit=LIMIT):
+    """
+    Up to ``limit`` suggestions whose label has a word starting with
+    ``query``. Labels starting with it come first, then by kind, shortest
+    first.
+    """
+    prefix = normalize(query)
+    if not prefix:
+        return []
+
+    index = _get_index()
+    results, seen = [], set()
+    # changes are applied in place, don't read half of one
+    with _lock:
+        for bucket in _Index.BUCKETS:
+            rows = index.rows[bucket]
+            start = bisect_left(index.keys[bucket], prefix)
+            matches = []
+            for key, rank in rows[start:start + SCAN_LIMIT]:
+                if not key.startswith(prefix):
+                    break
+                matches.append(rank)
+
+            for _, position in sorted(matches):
+                if position not in seen:
+                    seen.add(position)
+                    results.append(index.suggestions[position])
+                    if len(results) == limit:
+                        return results
+    return results
+
+
+def exact_category(query):
+    """The category or subcategory suggestion named ``query``, if any."""
+    index = _get_index()
+    with _lock:
+        return index.exact.get(normalize(query))
@@ -1,3 +1,1015 @@
-from django.test import TestCase
+import importlib
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import groq
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CustomUserModel
+from tags.models import Tag
+from comments.models import Comment
+from site_settings.models import SiteSettings
+from . import (
+    conditional, groq_service, moderation, moderation_cache, moderation_queue, search, suggest, view_buffer,
+)
+from .models import (
+    BlogAdditionalImage, BlogPost, Category, Like, ModerationJob, ModerationResult, Post_view_ip, SubCategory,
+)
+
+
+class ViewBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUserModel.objects.create_user(email="author@example.com", password="x")
+        category = Category.objects.create(name="Tech")
+        cls.posts = [
+            BlogPost.objects.create(title=f"Post {i}", category=category, author=cls.author, status="published")
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        view_buffer._pending.clear()  # views from pages other tests rendered
+        patcher = mock.patch.object(view_buffer, "FLUSH_INTERVAL", 0)  # no background thread
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: view_buffer._pending.clear())
+
+    def views(self):
+        return [post.views for post in BlogPost.objects.order_by("pk")]
+
+    def test_repeated_views_count_once(self):
+        post = self.posts[0].pk
+        self.assertTrue(view_buffer.record_view(post, ip_address="10.0.0.1"))
+        self.assertFalse(view_buffer.record_view(post, ip_address="10.0.0.1"))
+        self.assertTrue(view_buffer.record_view(post, user_id=self.author.pk, ip_address="10.0.0.1"))
+        self.assertFalse(view_buffer.record_view(post, user_id=self.author.pk, ip_address="10.0.0.2"))
+        self.assertEqual(self.views(), [0, 0, 0])  # nothing written yet
+
+        self.assertEqual(view_buffer.flush(), 2)
+        self.assertEqual(self.views(), [2, 0, 0])
+        self.assertEqual(Post_view_ip.objects.filter(post_id=post).count(), 2)
+        self.assertEqual(view_buffer.flush(), 0)
+
+    def test_flush_writes_in_bulk(self):
+        for i, post in enumerate(self.posts):
+            for n in range(1 + i % 2):
+                view_buffer.record_view(post.pk, ip_address=f"10.0.{i}.{n}")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(view_buffer.flush(), 4)
+        statements = [query["sql"].split()[0] for query in queries]
+        self.assertEqual(statements.count("INSERT"), 1)
+        self.assertEqual(statements.count("UPDATE"), 2)  # one per distinct increment
+        self.assertEqual(self.views(), [1, 2, 1])
+        self.assertEqual(Post_view_ip.objects.count(), 4)
+
+    def test_views_already_stored_are_dropped(self):
+        post = self.posts[0]
+        Post_view_ip.objects.create(post=post, ip_address="10.0.0.1")
+        view_buffer.record_view(post.pk, ip_address="10.0.0.1")  # the cache forgot it
+        view_buffer.record_view(self.posts[1].pk, ip_address="10.0.0.1")
+        self.assertEqual(view_buffer.flush(), 1)
+        self.assertEqual(self.views(), [0, 1, 0])
+
+    def test_views_stored_meanwhile_are_not_counted(self):
+        post = self.posts[0]
+        view_buffer.record_view(post.pk, ip_address="10.0.0.1")
+        view_buffer.record_view(self.posts[1].pk, ip_address="10.0.0.1")
+        stored = view_buffer._stored
+
+        def racing(keys):
+            existing = stored(keys)
+            if not Post_view_ip.objects.exists():
+                # another worker's flush, right after the check
+                Post_view_ip.objects.create(post=post, ip_address="10.0.0.1")
+            return existing
+
+        with mock.patch.object(view_buffer, "_stored", side_effect=racing):
+            self.assertEqual(view_buffer.flush(), 1)
+        self.assertEqual(self.views(), [0, 1, 0])
+        self.assertEqual(Post_view_ip.objects.count(), 2)
+
+    def test_flushed_at_exit(self):
+        with mock.patch("atexit.register") as register:
+            importlib.reload(view_buffer)
+        register.assert_called_once_with(view_buffer.flush)
+        with mock.patch.object(view_buffer, "FLUSH_INTERVAL", 0):
+            view_buffer.record_view(self.posts[2].pk, ip_address="10.0.0.1")
+        register.call_args.args[0]()
+        self.assertEqual(self.views(), [0, 0, 1])
+
+
+class BlogStatTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUserModel.objects.create_user(email="author@example.com", password="x")
+        cls.post = BlogPost.objects.create(
+            title="Post", category=Category.objects.create(name="Tech"), author=cls.author,
+            status="published", views=7,
+        )
+        Like.objects.create(post=cls.post, user=cls.author)
+
+    def stat(self, stat_type):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("update_blog_stat", args=[self.post.slug, stat_type]))
+        self.assertEqual(response.status_code, 200)
+        return int(response.content), [query["sql"] for query in queries if query["sql"].startswith("UPDATE")]
+
+    def test_counters_are_not_saved_back(self):
+        BlogPost.objects.filter(pk=self.post.pk).update(comment_count=4)  # changed meanwhile
+        self.assertEqual(self.stat("like"), (1, []))
+        self.assertEqual(self.stat("share"), (0, []))
+        views, updates = self.stat("view")
+        self.assertEqual(views, 8)
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"title"', updates[0])
+        post = BlogPost.objects.get(pk=self.post.pk)
+        self.assertEqual((post.views, post.comment_count, post.updated_at), (8, 4, self.post.updated_at))
+
+
+class BlogPostCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUserModel.objects.create_user(email="author@example.com", password="x")
+        cls.reader = CustomUserModel.objects.create_user(email="reader@example.com", password="x")
+        cls.post = BlogPost.objects.create(
+            title="Post", category=Category.objects.create(name="Tech"), author=cls.author, status="published",
+        )
+
+    def counters(self):
+        return BlogPost.objects.filter(pk=self.post.pk).values_list("views", "comment_count", "reply_count").get()
+
+    def test_saving_the_edited_columns_keeps_counters(self):
+        stale = BlogPost.objects.get(pk=self.post.pk)
+        # comments, likes and views arrive while an editor holds the post
+        comment = Comment.objects.create(post=self.post, user=self.reader, content="First")
+        Like.objects.create(post=self.post, user=self.reader)
+        Comment.objects.create(post=self.post, user=self.author, content="Thanks", parent=comment)
+        BlogPost.objects.get(pk=self.post.pk).increment("views", 3)
+        Comment.objects.create(post=self.post, user=self.author, content="Second")
+
+        stale.title = "Edited"
+        stale.save(update_fields=BlogPost.update_fields_for(["title", "tags"]))
+        self.assertEqual(self.counters(), (3, 2, 1))
+        self.assertEqual(BlogPost.objects.get(pk=self.post.pk).title, "Edited")
+
+    def test_api_update_keeps_counters(self):
+        BlogPost.objects.get(pk=self.post.pk).increment("views", 3)
+        self.client.force_login(self.author)
+        response = self.client.patch(
+            f"/api/blog/posts/{self.post.slug}/", {"subtitle": "Again"}, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counters(), (3, 0, 0))
+        self.assertEqual(BlogPost.objects.get(pk=self.post.pk).subtitle, "Again")
+
+    def test_deferred_fields_are_not_loaded(self):
+        post = BlogPost.objects.defer("description", "subtitle").get(pk=self.post.pk)
+        post.status = "pending"
+        with self.assertNumQueries(1):
+            post.save(update_fields=BlogPost.update_fields_for(["status"]))
+        self.assertEqual(BlogPost.objects.get(pk=self.post.pk).status, "pending")
+
+    def test_full_save_of_a_deleted_post(self):
+        stale = BlogPost.objects.get(pk=self.post.pk)
+        BlogPost.objects.filter(pk=self.post.pk).delete()
+        stale.save()  # Django's own semantics: inserted again
+        self.assertTrue(BlogPost.objects.filter(pk=self.post.pk).exists())
+
+    def test_counters_named_explicitly_are_saved(self):
+        post = BlogPost.objects.get(pk=self.post.pk)
+        post.views = 42
+        post.save(update_fields=["views"])
+        self.assertEqual(self.counters(), (42, 0, 0))
+
+    def test_new_posts_keep_their_counters(self):
+        post = BlogPost.objects.create(title="Imported", author=self.author, views=9)
+        self.assertEqual(BlogPost.objects.get(pk=post.pk).views, 9)
+
+
+class BlogSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUserModel.objects.create_user(email="author@example.com", password="x")
+        category = Category.objects.create(name="Tech")
+
+        def post(title, description, status="published"):
+            with cls.captureOnCommitCallbacks(execute=True):
+                return BlogPost.objects.create(
+                    title=title, description=description, category=category, author=author, status=status,
+                )
+
+        cls.guide = post("Battery & charger guide", "<p>Charge it overnight.</p>")
+        cls.review = post(
+            "Phone review",
+            "<p>" + "The screen is bright and the speakers are loud. " * 4
+            + "Its <b>battery</b> lasts two days. " + "The camera is fine. " * 6 + "</p>",
+        )
+        cls.recipe = post("Cooking rice", "<p>Wash it twice.</p>")
+        cls.draft = post("Battery draft", "<p>Not yet.</p>", status="pending")
+
+    def ids(self, query):
+        return [post.pk for post in search.SearchResults(query)[0:10]]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.ids("battery"), [self.guide.pk, self.review.pk])
+        self.assertEqual(len(search.SearchResults("battery")), 2)
+        self.assertEqual(self.ids("batt"), [self.guide.pk, self.review.pk])  # typed so far
+        self.assertEqual(self.ids("battery days"), [self.review.pk])
+        self.assertEqual(self.ids("!!"), [])
+
+    def test_highlight_and_snippet(self):
+        guide, review = search.SearchResults("battery")[0:2]
+        self.assertEqual(guide.search_title, "<mark>Battery</mark> &amp; charger guide")
+        self.assertEqual(review.search_title, "Phone review")
+        self.assertIn("Its <mark>battery</mark> lasts two days.", review.search_snippet)
+        self.assertTrue(review.search_snippet.startswith("…"))
+        self.assertNotIn("<b>", review.search_snippet)
+
+    def test_only_published_posts(self):
+        self.assertNotIn(self.draft.pk, self.ids("draft"))
+        self.draft.status = "published"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.save()
+        self.assertEqual(self.ids("draft"), [self.draft.pk])
+
+    def test_reindexed_only_when_indexed_fields_change(self):
+        post = BlogPost.objects.get(pk=self.recipe.pk)
+        with mock.patch.object(search, "reindex") as reindex:
+            with self.captureOnCommitCallbacks(execute=True):
+                post.content_quality = 90
+                post.save()
+                post.increment("views")
+            reindex.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                post.title = "Cooking rice and beans"
+                post.save()
+            reindex.assert_called_once_with([post.pk])
+        self.assertEqual(self.ids("beans"), [])  # reindex was mocked away
+
+    def test_filters_of_the_queryset_apply(self):
+        pages = Paginator(search.SearchResults("battery", BlogPost.objects.filter(title__startswith="Phone")), 1)
+        self.assertEqual(pages.count, 1)
+        self.assertEqual([post.pk for post in pages.page(1)], [self.review.pk])
+
+        pages = Paginator(search.SearchResults("battery", BlogPost.objects.exclude(pk=self.guide.pk)), 1)
+        self.assertEqual(pages.num_pages, 1)
+        self.assertEqual([post.pk for post in pages.page(1)], [self.review.pk])
+
+    def test_fallback_loads_deferred_descriptions_at_once(self):
+        with mock.patch.object(search, "available", return_value=False):
+            results = search.SearchResults("e", BlogPost.objects.for_api(["title"]))
+            with self.assertNumQueries(2):
+                posts = results[0:8]
+        self.assertEqual(len(posts), 3)
+        self.assertTrue(all(post.search_snippet for post in posts))
+
+    def test_icontains_fallback(self):
+        with mock.patch.object(search, "available", return_value=False):
+            results = search.SearchResults("REVIEW")
+            self.assertEqual(len(results), 1)
+            post, = results[0:8]
+        self.assertEqual(post.pk, self.review.pk)
+        self.assertEqual(post.search_title, "Phone review")
+        self.assertEqual(post.search_snippet, search.plain_text(self.review.description)[:200])
+
+
+class SearchSuggestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUserModel.objects.create_user(email="author@example.com", password="x")
+        cls.category = Category.objects.create(name="Machine Learning")
+        cls.tag = Tag.objects.create(name="learning")
+        cls.post = BlogPost.objects.create(
+            title="Learn Django fast", category=cls.category, author=cls.author, status="published",
+        )
+        cls.draft = BlogPost.objects.create(title="Hidden draft", author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reset_worker()
+        self.addCleanup(self.reset_worker)
+        patcher = mock.patch.object(suggest, "REVALIDATE_SECONDS", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def reset_worker():
+        suggest._index, suggest._version, suggest._seq = None, None, 0
+
+    def labels(self, query):
+        return [suggestion.label for suggestion in suggest.suggest(query)]
+
+    def test_prefix_matching(self):
+        # label starts first, then tags before posts; word starts later on
+        self.assertEqual(self.labels("LEARN"), ["learning", "Learn Django fast", "Machine Learning"])
+        self.assertEqual(self.labels("machine le"), ["Machine Learning"])
+        self.assertEqual(self.labels("djan"), ["Learn Django fast"])
+        self.assertEqual(self.labels("hidden"), [])
+        self.assertEqual(self.labels("  "), [])
+        self.assertEqual(suggest.exact_category("machine  learning").url, reverse("category_post", args=[self.category.slug]))
+
+    def test_lookups_make_no_queries(self):
+        self.labels("learn")
+        with self.assertNumQueries(0):
+            self.labels("learn")
+
+    def test_changes_are_applied_in_place(self):
+        self.labels("learn")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.status = "published"
+            self.draft.save()
+            post = BlogPost.objects.get(pk=self.post.pk)
+            post.title = "Understand Django"
+            post.save()
+            self.tag.delete()
+            Category.objects.create(name="Learning Paths")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.labels("learn"), ["Learning Paths", "Machine Learning"])
+            self.assertEqual(self.labels("django"), ["Understand Django"])
+            self.assertEqual(self.labels("hidden"), ["Hidden draft"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.status = "rejected"
+            self.draft.save()
+            self.category.delete()
+        self.assertEqual(self.labels("learn"), ["Learning Paths"])
+        self.assertEqual(self.labels("hidden"), [])
+
+    def test_other_saves_change_nothing(self):
+        post = BlogPost.objects.get(pk=self.post.pk)
+        with mock.patch.object(suggest, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                post.content_quality = 80
+                post.save()
+                post.increment("views")
+        publish.assert_not_called()
+
+    def test_reloads_off_the_request_path_when_changes_are_lost(self):
+        self.labels("learn")
+        with mock.patch.object(suggest, "_reload_in_background") as reload:
+            with self.captureOnCommitCallbacks(execute=True):
+                Tag.objects.create(name="learnability")
+            cache.delete(suggest.CHANGE_KEY.format(cache.get(suggest.SEQ_KEY)))
+            # still answered from the old index
+            self.assertEqual(self.labels("learn"), ["learning", "Learn Django fast", "Machine Learning"])
+            reload.assert_called_once()
+
+            reload.reset_mock()
+            suggest.invalidate()
+            self.labels("learn")
+            reload.assert_called_once()
+
+    def test_exact_category_survives_removing_a_namesake(self):
+        index = suggest._Index([
+            (("category", 1), suggest.Suggestion("category", "Python", "/c/")),
+            (("subcategory", 2), suggest.Suggestion("subcategory", "python", "/s/")),
+        ])
+        self.assertEqual(index.exact["python"].url, "/c/")
+        index.put(("category", 1), None)
+        self.assertEqual(index.exact["python"].url, "/s/")
+        self.assertEqual(index.keys[(False, "subcategory")], ["python"])
+        self.assertEqual(index.keys[(False, "category")], [])
+
+    def test_many_posts_dont_hide_a_category(self):
+        BlogPost.objects.bulk_create([
+            BlogPost(title=f"Tea {i}", slug=f"tea-{i}", author=self.author, status="published")
+            for i in range(suggest.SCAN_LIMIT + 50)
+        ])
+        Category.objects.create(name="Technology")
+        Tag.objects.create(name="tips")
+        labels = self.labels("t")
+        self.assertEqual(labels[:2], ["Technology", "tips"])
+        self.assertEqual(len(labels), suggest.LIMIT)
+        self.assertTrue(all(label.startswith("Tea ") for label in labels[2:]))
+        self.assertEqual(self.labels("te")[0], "Technology")
+
+
+class BlogPostApiQueryCountTests(TestCase):
+    """
+    The post endpoints of the API must cost the same number of queries
+    whether a page holds one post or a full page of them.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUserModel.objects.create_user(email="author@example.com", password="x")
+        cls.readers = [
+            CustomUserModel.objects.create_user(email=f"reader{i}@example.com", password="x")
+            for i in range(3)
+        ]
+        cls.category = Category.objects.create(name="Tech")
+        cls.subcategory = SubCategory.objects.create(name="Gadgets", category=cls.category)
+        cls.tags = [Tag.objects.create(name=name) for name in ("python", "django", "sqlite")]
+        cls.make_posts(1)
+
+    @classmethod
+    def make_posts(cls, count):
+        start = BlogPost.objects.count()
+        for i in range(start, start + count):
+            # run the signal handlers that wait for commit (search index)
+            with cls.captureOnCommitCallbacks(execute=True):
+                post = BlogPost.objects.create(
+                    title=f"Gadget review {i}",
+                    subtitle="Hands on",
+                    description="<p>A phone with a battery</p>",
+                    category=cls.category,
+                    subcategory=cls.subcategory,
+                    author=cls.author,
+                    status="published",
+                    views=500 + i,
+                )
+                post.tags.set(cls.tags)
+            for reader in cls.readers:
+                Like.objects.create(post=post, user=reader)
+            BlogAdditionalImage.objects.create(blog=post, additional_image_url="https://example.com/a.png")
+
+    def setUp(self):
+        cache.clear()
+        # keep the settings singletons from revalidating between the warm up
+        # and the measured request
+        patcher = mock.patch("site_settings.singleton.REVALIDATE_SECONDS", 3600)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertConstantQueries(self, url, expected):
+        counts = []
+        for _ in range(2):
+            self.client.get(url)  # warm the settings caches
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+            self.make_posts(4)
+        self.assertEqual(counts, [expected, expected], url)
+        return response
+
+    def test_post_list(self):
+        response = self.assertConstantQueries("/api/blog/posts/", 1)
+        self.assertEqual(response.json()["results"][0]["likes_count"], 3)
+
+    def test_post_list_expanded(self):
+        response = self.assertConstantQueries("/api/blog/posts/?expand=tags,subcategory,description", 2)
+        post = response.json()["results"][0]
+        self.assertEqual(len(post["tags"]), 3)
+        self.assertEqual(post["subcategory"]["category_name"], "Tech")
+
+    def test_post_list_filtered(self):
+        self.assertConstantQueries("/api/blog/posts/?tag=python&order_by=-views", 1)
+
+    def test_post_detail(self):
+        slug = BlogPost.objects.earliest("pk").slug
+        # validators, post, additional images
+        response = self.assertConstantQueries(f"/api/blog/posts/{slug}/", 4)
+        self.assertEqual(response.json()["likes_count"], 3)
+        self.assertEqual(len(response.json()["additional_images"]), 1)
+
+    def test_post_likes(self):
+        slug = BlogPost.objects.earliest("pk").slug
+        self.assertConstantQueries(f"/api/blog/posts/{slug}/likes/", 3)
+
+    def test_latest_by_category(self):
+        self.assertConstantQueries("/api/blog/posts/latest-by-category/?per_category=5", 1)
+
+    def test_search(self):
+        self.assertConstantQueries("/api/blog/posts/search/?q=gadget", 3)
+
+    def test_popular_posts(self):
+        self.assertConstantQueries("/api/blog/popular-posts/", 2)
+
+    def test_latest_posts(self):
+        self.assertConstantQueries("/api/blog/latest-posts/", 2)
+
+    def test_category_posts(self):
+        self.assertConstantQueries(f"/api/blog/category/{self.category.slug}/posts/", 1)
+
+    def test_user_posts(self):
+        self.assertConstantQueries(f"/api/blog/user/{self.author.pk}/posts/", 1)
+
+    def test_subcategories(self):
+        self.assertConstantQueries("/api/blog/subcategories/", 2)
+
+
+class BlogPostApiFieldsetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUserModel.objects.create_user(email="author@example.com", password="x")
+        category = Category.objects.create(name="Tech", description="All things tech")
+        cls.post = BlogPost.objects.create(
+            title="Gadget review",
+            description="<p>A phone with a <b>long</b> battery&nbsp;life</p>" * 40,
+            category=category,
+            author=author,
+            status="published",
+        )
+
+    def test_list_returns_cards(self):
+        post = self.client.get("/api/blog/posts/").json()["results"][0]
+        self.assertNotIn("description", post)
+        self.assertNotIn("tags", post)
+        self.assertEqual(set(post["category"]), {"id", "name", "slug"})
+        self.assertTrue(post["excerpt"].startswith("A phone with a long battery\xa0life"))
+        self.assertLessEqual(len(post["excerpt"]), 280)
+
+    def test_fields_and_expand(self):
+        post = self.client.get("/api/blog/posts/?fields=id,title&expand=description").json()["results"][0]
+        self.assertEqual(set(post), {"id", "title", "description"})
+
+    def test_detail_returns_everything(self):
+        post = self.client.get(f"/api/blog/posts/{self.post.slug}/").json()
+        self.assertIn("description", post)
+        self.assertEqual(post["category"]["description"], "All things tech")
+
+    def test_excerpt_follows_description(self):
+        self.post.description = "<p>Short &amp; sweet</p>"
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.excerpt, "Short & sweet")
+
+
+class BlogPostApiCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUserModel.objects.create_user(email="author@example.com", password="x")
+        category = Category.objects.create(name="Tech")
+        for i in range(7):
+            # repeated views, so ties are broken by id
+            BlogPost.objects.create(
+                title=f"Post {i}", category=category, author=author,
+                status="published", views=100 if i % 2 else 200,
+            )
+
+    def walk(self, url):
+        seen = []
+        while url:
+            page = self.client.get(url).json()
+            self.assertNotIn("count", page)
+            seen += [post["id"] for post in page["results"]]
+            url = page["next"]
+        return seen
+
+    def test_walk_by_created_at(self):
+        expected = list(BlogPost.objects.order_by("-created_at", "-pk").values_list("pk", flat=True))
+        self.assertEqual(self.walk("/api/blog/posts/?page_size=3"), expected)
+
+    def test_walk_by_views(self):
+        expected = list(BlogPost.objects.order_by("views", "pk").values_list("pk", flat=True))
+        self.assertEqual(self.walk("/api/blog/posts/?order_by=views&page_size=2"), expected)
+
+    def test_page_size_bounds(self):
+        self.assertEqual(len(self.client.get("/api/blog/posts/?page_size=1000").json()["results"]), 7)
+        self.assertEqual(len(self.client.get("/api/blog/posts/?page_size=0").json()["results"]), 1)
+        self.assertEqual(len(self.client.get("/api/blog/posts/?page_size=x").json()["results"]), 5)
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.client.get("/api/blog/posts/?cursor=nonsense").status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUserModel.objects.create_user(email="author@example.com", password="x")
+        cls.category = Category.objects.create(name="Tech")
+        cls.post = BlogPost.objects.create(
+            title="Gadget review", description="<p>A phone</p>", category=cls.category,
+            author=cls.author, status="published",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def revalidate(self, url, **headers):
+        first = self.client.get(url, **headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("HX-Request", first["Vary"])
+        self.assertIn("no-cache", first["Cache-Control"])
+        return first, lambda: self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"], **headers)
+
+    def test_article_page(self):
+        url = reverse("blog_details", args=[self.post.slug])
+        first, again = self.revalidate(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = again()
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertLessEqual(len(queries), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, user=self.author, content="Nice")
+        self.assertEqual(again().status_code, 200)
+
+    def test_htmx_partial_has_its_own_etag(self):
+        url = reverse("blog_details", args=[self.post.slug])
+        full, _ = self.revalidate(url)
+        partial, again = self.revalidate(url, HTTP_HX_REQUEST="true")
+        self.assertNotEqual(full["ETag"], partial["ETag"])
+        self.assertEqual(again().status_code, 304)
+
+    def test_api_resource_and_list(self):
+        for url in (f"/api/blog/posts/{self.post.slug}/", "/api/blog/posts/"):
+            _, again = self.revalidate(url)
+            self.assertEqual(again().status_code, 304, url)
+            with self.captureOnCommitCallbacks(execute=True):
+                Like.objects.create(post=self.post, user=self.author)
+            self.assertEqual(again().status_code, 200, url)
+            Like.objects.all().delete()
+
+    def test_pending_messages_are_rendered(self):
+        url = reverse("blog_details", args=[self.post.slug])
+        first, _ = self.revalidate(url)
+        request = RequestFactory().get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        request.user = AnonymousUser()
+        request._messages = CookieStorage(request)
+        validators = conditional.post_page(request, self.post.slug)
+        render = lambda: HttpResponse("page")
+        self.assertEqual(conditional.respond(request, validators, render).status_code, 304)
+
+        messages.success(request, "Saved")
+        self.assertEqual(conditional.respond(request, validators, render).status_code, 200)
+        self.assertEqual([str(m) for m in messages.get_messages(request)], ["Saved"])
+
+    def test_category_page(self):
+        _, again = self.revalidate(reverse("category_post", args=[self.category.slug]))
+        self.assertEqual(again().status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            BlogPost.objects.create(title="Another", category=self.category, author=self.author)
+        self.assertEqual(again().status_code, 200)
+
+
+class ModerationQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = CustomUserModel.objects.create_user(email="author@example.com", password="x")
+        cls.category = Category.objects.create(name="Tech")
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("site_settings.singleton.REVALIDATE_SECONDS", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.post = BlogPost.objects.create(
+            title="Gadget review", description="<p>A phone</p>", category=self.category,
+            author=self.author, status="pending",
+        )
+        self.job = moderation_queue.enqueue(self.post)
+
+    def process(self, verdict, worker="worker-a"):
+        job, = moderation_queue.claim(worker, 1)
+        with mock.patch.object(moderation_cache, "moderate", return_value=verdict):
+            return moderation_queue.process(job, worker)
+
+    def make_due(self):
+        ModerationJob.objects.update(run_after=timezone.now() - timedelta(seconds=1))
+
+    def test_a_job_is_claimed_once(self):
+        moderation_queue.enqueue(self.post)
+        original, calls, taken = moderation_queue._claimable, [], []
+
+        def racing(now):
+            calls.append(now)
+            if len(calls) == 2:
+                # worker b takes both jobs after worker a listed them
+                taken.extend(moderation_queue.claim("worker-b", 5))
+            return original(now)
+
+        with mock.patch.object(moderation_queue, "_claimable", racing):
+            self.assertEqual(moderation_queue.claim("worker-a", 5), [])
+        self.assertEqual(len(taken), 2)
+        self.assertEqual(moderation_queue.claim("worker-c", 5), [])
+        self.assertEqual(set(ModerationJob.objects.values_list("leased_by", "attempts")), {("worker-b", 1)})
+
+    def test_an_expired_lease_is_claimed_again(self):
+        stalled, = moderation_queue.claim("worker-a", 1)
+        self.assertEqual(moderation_queue.claim("worker-b", 1), [])  # still leased
+
+        ModerationJob.objects.update(leased_until=timezone.now() - timedelta(seconds=1))
+        job, = moderation_queue.claim("worker-b", 1)
+        self.assertEqual(job.attempts, 2)
+
+        verdict = moderation.Verdict(adult=False, copied=False, quality=90, failed=())
+        with mock.patch.object(moderation_cache, "moderate", return_value=verdict):
+            self.assertEqual(moderation_queue.process(stalled, "worker-a"), "lost")
+            self.post.refresh_from_db()
+            self.assertEqual(self.post.status, "pending")
+            self.assertEqual(moderation_queue.process(job, "worker-b"), "published")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, "published")
+
+    def test_failed_checks_are_retried_with_backoff(self):
+        failing = moderation.Verdict(adult=False, copied=False, quality=50, failed=("quality",))
+        before = timezone.now()
+        self.assertEqual(self.process(failing), "retry")
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.last_error), ("queued", "failed checks: quality"))
+        self.assertGreaterEqual(self.job.run_after, before + timedelta(seconds=moderation_queue.RETRY_BASE_SECONDS))
+        self.assertEqual(moderation_queue.claim("worker-a", 1), [])  # not due yet
+
+        base = moderation_queue.RETRY_BASE_SECONDS
+        self.assertEqual([moderation_queue.retry_delay(n) for n in (1, 2, 3)], [base, base * 2, base * 4])
+        self.assertEqual(moderation_queue.retry_delay(50), moderation_queue.RETRY_MAX_SECONDS)
+
+    def test_the_last_attempt_gives_the_fail_safe_verdict(self):
+        failing = moderation.Verdict(adult=False, copied=False, quality=50, failed=("quality",))
+        with mock.patch.object(moderation_queue, "MAX_ATTEMPTS", 2):
+            self.assertEqual(self.process(failing), "retry")
+            self.make_due()
+            self.assertEqual(self.process(failing), "pending")
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.outcome, self.job.attempts), ("failed", "pending", 2))
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.status, self.post.content_quality), ("pending", 50))
+
+    def test_a_blocking_check_rejects_without_retrying(self):
+        verdict = moderation.Verdict(adult=True, copied=False, quality=None, failed=("quality",))
+        self.assertEqual(self.process(verdict), "rejected")
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, "done")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, "rejected")
+
+    def test_publish_threshold(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            SiteSettings.objects.update_or_create(pk=1, defaults={"score_control": "60"})
+        self.assertEqual(moderation_queue.publish_threshold(), 60)
+        self.assertEqual(self.process(moderation.Verdict(False, False, 59, ())), "pending")
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.status, self.post.content_quality), ("pending", 59))
+
+        BlogPost.objects.filter(pk=self.post.pk).update(status="pending")
+        moderation_queue.enqueue(self.post)
+        self.assertEqual(self.process(moderation.Verdict(False, False, 60, ())), "published")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SiteSettings.objects.update_or_create(pk=1, defaults={"score_control": ""})
+        self.assertEqual(moderation_queue.publish_threshold(), moderation_queue.DEFAULT_THRESHOLD)
+
+    def test_an_admin_decision_is_kept(self):
+        BlogPost.objects.filter(pk=self.post.pk).update(status="rejected")
+        self.assertEqual(self.process(moderation.Verdict(False, False, 95, ())), "published")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, "rejected")
+
+
+class ModerationCacheTests(TestCase):
+    clean = moderation.Verdict(adult=False, copied=False, quality=80, failed=())
+
+    def setUp(self):
+        patcher = mock.patch.object(moderation, "moderate", return_value=self.clean)
+        self.groq = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_content_is_answered_from_the_table(self):
+        self.assertEqual(moderation_cache.moderate("Title", "Content", "hash"), self.clean)
+        with self.assertNumQueries(1):
+            self.assertEqual(moderation_cache.moderate("Title", "Content", "hash"), self.clean)
+        self.assertEqual(self.groq.call_count, 1)
+
+        moderation_cache.moderate("Title", "Other content", "other hash")
+        self.assertEqual(self.groq.call_count, 2)
+
+    def test_failed_checks_are_not_stored(self):
+        self.groq.return_value = self.clean._replace(quality=50, failed=("quality",))
+        moderation_cache.moderate("Title", "Content", "hash")
+        moderation_cache.moderate("Title", "Content", "hash")
+        self.assertEqual(self.groq.call_count, 2)
+        self.assertFalse(ModerationResult.objects.exists())
+
+    def test_a_new_prompt_version_asks_again(self):
+        moderation_cache.moderate("Title", "Content", "hash")
+        with mock.patch.object(groq_service, "PROMPT_VERSION", "next"):
+            moderation_cache.moderate("Title", "Content", "hash")
+            moderation_cache.moderate("Title", "Content", "hash")
+        self.assertEqual(self.groq.call_count, 2)
+        self.assertEqual(ModerationResult.objects.count(), 2)
+
+    def test_refresh_replaces_the_stored_result(self):
+        moderation_cache.moderate("Title", "Content", "hash")
+        self.groq.return_value = self.clean._replace(quality=30)
+        self.assertEqual(moderation_cache.moderate("Title", "Content", "hash", refresh=True).quality, 30)
+        self.assertEqual(self.groq.call_count, 2)
+        self.assertEqual(moderation_cache.get("hash").quality, 30)
+
+    def test_clear_moderation_cache(self):
+        moderation_cache.moderate("Title", "Content", "hash")
+        with mock.patch.object(groq_service, "PROMPT_VERSION", "old"):
+            moderation_cache.moderate("Title", "Content", "hash")
+
+        out = StringIO()
+        call_command("clear_moderation_cache", stdout=out)
+        self.assertIn("Deleted 1 moderation result(s).", out.getvalue())
+        self.assertEqual(list(ModerationResult.objects.values_list("prompt_version", flat=True)), [groq_service.PROMPT_VERSION])
+
+        call_command("clear_moderation_cache", "--all", stdout=out)
+        self.assertFalse(ModerationResult.objects.exists())
+
+    def test_admin_moderate_again(self):
+        admin_user = CustomUserModel.objects.create_superuser(email="admin@example.com", password="x")
+        post = BlogPost.objects.create(
+            title="Gadget review", description="<p>A phone</p>", author=admin_user,
+            category=Category.objects.create(name="Tech"), status="published",
+        )
+        moderation_cache.store(post.content_hash, self.clean)
+
+        self.client.force_login(admin_user)
+        response = self.client.post(
+            reverse("admin:blog_post_blogpost_changelist"),
+            {"action": "moderate_again", "_selected_action": [post.pk]},
+        )
+        self.assertEqual(response.status_code, 302)
+        post.refresh_from_db()
+        self.assertEqual(post.status, "pending")
+        job, = moderation_queue.claim("worker", 1)
+        self.assertTrue(job.refresh)
+
+        self.groq.return_value = self.clean._replace(adult=True)
+        self.assertEqual(moderation_queue.process(job, "worker"), "rejected")
+        self.assertEqual(self.groq.call_count, 1)
+        self.assertTrue(moderation_cache.get(post.content_hash).adult)
+
+
+class _StubGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        self.server.connections += 1
+        super().setup()
+
+    def do_POST(self):
+        server = self.server
+        prompt = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["messages"][0]["content"]
+        server.requests += 1
+        if "JSON object" in prompt:
+            answer = server.combined
+        elif "0 and 100" in prompt:
+            answer = server.score
+        else:
+            answer = server.answer
+        time.sleep(server.delay)
+        if server.status == 200:
+            payload = {
+                "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+                "choices": [{
+                    "index": 0, "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": answer},
+                }],
+            }
+        else:
+            payload = {"error": {"message": "stub failure"}}
+        body = json.dumps(payload).encode()
+        self.send_response(server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _StubGroqServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # the client hung up on a slow answer
+
+
+class GroqClientTests(SimpleTestCase):
+    """The shared Groq client against a local stub of the API."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = _StubGroqServer(("127.0.0.1", 0), _StubGroqHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.status, self.server.answer, self.server.score, self.server.delay = 200, "NO", "87", 0
+        self.server.combined = '{"adult": false, "copyright": false, "quality": 81}'
+        self.server.requests = self.server.connections = 0
+        host, port = self.server.server_address
+        for patcher in (
+            mock.patch.dict(os.environ, {"GROQ_API_KEY": "test"}),
+            mock.patch.object(groq_service, "BASE_URL", f"http://{host}:{port}"),
+            mock.patch.object(groq_service, "MAX_RETRIES", 0),
+            mock.patch.object(groq_service, "breaker", groq_service.CircuitBreaker(2, 0.2)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        groq_service.reset_client()
+        self.addCleanup(groq_service.reset_client)
+
+    def test_checks_share_one_connection(self):
+        self.assertFalse(groq_service.check_adult_content("Title", "Content"))
+        self.assertFalse(groq_service.check_copyright("Title", "Content"))
+        self.assertEqual(groq_service.get_quality_score("Title", "Content"), 87)
+        self.assertEqual((self.server.requests, self.server.connections), (3, 1))
+
+    def test_breaker_opens_and_recovers(self):
+        before = groq_service.get_stats()
+        self.server.status = 500
+        with self.assertLogs("blog_post.groq_service") as logs:
+            for _ in range(2):
+                self.assertFalse(groq_service.check_adult_content("Title", "Content"))
+        self.assertIn("WARNING:blog_post.groq_service:[Groq] Circuit breaker opened", logs.output)
+        self.assertEqual(groq_service.breaker.state, "open")
+
+        with self.assertRaises(groq_service.CircuitOpen):
+            groq_service.check_adult_content("Title", "Content", fail_safe=False)
+        self.assertEqual(self.server.requests, 2)  # refused without a request
+
+        time.sleep(0.25)
+        self.server.status, self.server.answer = 200, "YES"
+        self.assertEqual(groq_service.breaker.state, "half-open")
+        self.assertTrue(groq_service.check_adult_content("Title", "Content"))
+        self.assertEqual(groq_service.breaker.state, "closed")
+
+        after = groq_service.get_stats()
+        self.assertEqual(after["calls"] - before["calls"], 3)
+        self.assertEqual(after["errors"] - before["errors"], 2)
+        self.assertEqual(after["skipped"] - before["skipped"], 1)
+
+    def test_read_timeout(self):
+        self.server.delay = 1
+        started = time.monotonic()
+        with mock.patch.object(groq_service, "READ_TIMEOUT", 0.2):
+            with self.assertRaises(groq.APITimeoutError):
+                groq_service.get_quality_score("Title", "Content", fail_safe=False)
+        self.assertLess(time.monotonic() - started, 0.9)
+
+    def test_combined_moderation(self):
+        with mock.patch.object(moderation, "MODE", "combined"):
+            verdict = moderation.moderate("Title", "Content")
+        self.assertEqual(verdict, moderation.Verdict(False, False, 81, ()))
+        self.assertEqual(self.server.requests, 1)
+
+    def test_malformed_combined_reply_falls_back(self):
+        self.server.combined = '{"adult": "no", "copyright": false, "quality": 81}'
+        with mock.patch.object(moderation, "MODE", "combined"), self.assertLogs("blog_post.moderation", "WARNING"):
+            verdict = moderation.moderate("Title", "Content")
+        self.assertEqual(verdict, moderation.Verdict(False, False, 87, ()))
+        self.assertEqual(self.server.requests, 4)
+
+    def test_failed_combined_request_does_not_fall_back(self):
+        fail_safe = moderation.Verdict(False, False, 50, ("adult", "copyright", "quality"))
+        self.server.status = 500
+        with mock.patch.object(moderation, "MODE", "combined"), self.assertLogs("blog_post.moderation", "ERROR"):
+            self.assertEqual(moderation.moderate("Title", "Content"), fail_safe)
+        self.assertEqual(self.server.requests, 1)
+
+        with self.assertLogs("blog_post.groq_service", "WARNING"):
+            groq_service.breaker.record_failure()  # the second failure opens it
+        with mock.patch.object(moderation, "MODE", "combined"), self.assertLogs("blog_post.moderation", "ERROR"):
+            self.assertEqual(moderation.moderate("Title", "Content"), fail_safe)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_combined_timeout_does_not_fall_back(self):
+        self.server.delay = 0.5
+        with (
+            mock.patch.object(moderation, "MODE", "combined"),
+            mock.patch.object(moderation, "CALL_TIMEOUT", 0.2),
+            self.assertLogs("blog_post.moderation", "ERROR"),
+        ):
+            verdict = moderation.moderate("Title", "Content")
+        self.assertEqual(verdict.failed, ("adult", "copyright", "quality"))
+        time.sleep(0.4)  # let the stub answer
+        self.assertEqual(self.server.requests, 1)
+
+    def test_parse_verdicts(self):
+        self.assertEqual(
+            groq_service.parse_verdicts('{"adult": true, "copyright": false, "quality": 0}'), (True, False, 0)
+        )
+        for raw in (
+            "YES",
+            "[true, false, 50]",
+            '{"adult": true, "copyright": false}',
+            '{"adult": true, "copyright": false, "quality": 50, "reason": "x"}',
+            '{"adult": 1, "copyright": false, "quality": 50}',
+            '{"adult": true, "copyright": false, "quality": "50"}',
+            '{"adult": true, "copyright": false, "quality": 101}',
+            '{"adult": true, "copyright": false, "quality": true}',
+        ):
+            with self.assertRaises(groq_service.MalformedVerdict, msg=raw):
+                groq_service.parse_verdicts(raw)
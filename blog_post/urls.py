@@ -16,12 +16,14 @@ from .views import (
     blog_details_view,
     user_like_toggle,
     redirect_search_results,
+    search_results,
+    search_suggest,
     record_share,
     tag_posts
 )
 
 from interactions.views import share_post
-from .views import add_comment, add_reply
+from .views import add_comment, add_reply, load_more_comments
 
 urlpatterns = [
     path("", home, name="homepage"),
@@ -52,12 +54,18 @@ urlpatterns = [
     
     path('post/<slug:post_slug>/comment/', add_comment, name='add_comment'),
 
+    path('post/<slug:post_slug>/comments/', load_more_comments, name='load_more_comments'),
+
     path('comment/<int:comment_id>/reply/', add_reply, name='add_reply'),
     
     path('like/<slug:like_slug>/', user_like_toggle, name='user_like_toggle'),
     
     path('search/', redirect_search_results, name='redirect_search_results'),
 
+    path('search/results/', search_results, name='search_results'),
+
+    path('search/suggest/', search_suggest, name='search_suggest'),
+
     path('tag/<slug:tag_slug>/', tag_posts, name='tag_posts'),
 
     
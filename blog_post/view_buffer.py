@@ -0,0 +1,167 @@
+"""
+Write-behind buffer for post view counts.
+
+A page view only touches process memory and the cache. The
+``Post_view_ip`` rows and the ``BlogPost.views`` counter are written in
+batches by ``flush()``, which a background thread runs every
+``VIEW_BUFFER_FLUSH_INTERVAL`` seconds (sooner once the buffer holds
+``VIEW_BUFFER_MAX_SIZE`` views) and once more when the process exits.
+Setting ``VIEW_BUFFER_FLUSH_INTERVAL = 0`` disables the thread, views
+are then only written when ``flush()`` is called.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = getattr(settings, "VIEW_BUFFER_FLUSH_INTERVAL", 30)
+MAX_SIZE = getattr(settings, "VIEW_BUFFER_MAX_SIZE", 500)
+SEEN_TIMEOUT = getattr(settings, "VIEW_BUFFER_SEEN_TIMEOUT", 60 * 60 * 24)
+
+_lock = threading.Lock()
+_pending = {}  # (post_id, user_id, ip_address) -> None, kept in arrival order
+_wakeup = threading.Event()
+_flusher = None
+
+
+def _seen_key(post_id, user_id, ip_address):
+    if user_id:
+        return f"post_view:{post_id}:user:{user_id}"
+    return f"post_view:{post_id}:ip:{ip_address}"
+
+
+def record_view(post_id, user_id=None, ip_address=None):
+    """
+    Buffer a view of ``post_id``.
+    Returns True if this is the first view seen from this user / IP,
+    False if it was already counted.
+    """
+    # Logged in users are tracked by user, everybody else by IP
+    if user_id:
+        ip_address = None
+
+    if not cache.add(_seen_key(post_id, user_id, ip_address), 1, SEEN_TIMEOUT):
+        return False
+
+    with _lock:
+        _pending[(post_id, user_id, ip_address)] = None
+        size = len(_pending)
+
+    _start_flusher()
+    if size >= MAX_SIZE:
+        _wakeup.set()
+    return True
+
+
+def flush():
+    """
+    Write every buffered view to the database.
+    Views already stored (e.g. after the cache was cleared, or by another
+    worker's flush) are dropped, the rest are bulk inserted and added to
+    ``BlogPost.views`` with one UPDATE per distinct increment. Returns the
+    number of views counted.
+    """
+    from .models import BlogPost
+
+    with _lock:
+        batch = list(_pending)
+        _pending.clear()
+
+    if not batch:
+        return 0
+
+    try:
+        with transaction.atomic():
+            # locked, so flushes of other workers counting the same posts wait
+            live_posts = set(
+                BlogPost.objects.select_for_update()
+                .filter(pk__in={post_id for post_id, _, _ in batch})
+                .values_list("pk", flat=True)
+            )
+            fresh = _insert_fresh([key for key in batch if key[0] in live_posts])
+
+            # Posts that got the same number of views share one UPDATE
+            by_increment = defaultdict(list)
+            for post_id, views in Counter(post_id for post_id, _, _ in fresh).items():
+                by_increment[views].append(post_id)
+            for views, ids in by_increment.items():
+                BlogPost.objects.filter(pk__in=ids).update(views=F("views") + views)
+
+    except Exception as e:
+        logger.error(f"Post view flush failed, {len(batch)} views re-queued: {e}")
+        with _lock:
+            for key in batch:
+                _pending.setdefault(key, None)
+        return 0
+
+    return len(fresh)
+
+
+def _stored(keys):
+    """The ones of ``keys`` that have a ``Post_view_ip`` row."""
+    from .models import Post_view_ip
+
+    user_ids = {user_id for _, user_id, _ in keys if user_id}
+    ips = {ip for _, user_id, ip in keys if not user_id}
+    return set(
+        Post_view_ip.objects.filter(post_id__in={post_id for post_id, _, _ in keys})
+        .filter(Q(user_id__in=user_ids) | Q(ip_address__in=ips))
+        .values_list("post_id", "user_id", "ip_address")
+    )
+
+
+def _insert_fresh(keys, attempts=3):
+    """
+    Insert the ``Post_view_ip`` rows of ``keys`` that aren't stored yet and
+    return their keys, so only rows really inserted are counted.
+    """
+    from .models import Post_view_ip
+
+    for attempt in range(attempts):
+        existing = _stored(keys)
+        fresh = [key for key in keys if key not in existing]
+        try:
+            with transaction.atomic():
+                Post_view_ip.objects.bulk_create([
+                    Post_view_ip(post_id=post_id, user_id=user_id, ip_address=ip)
+                    for post_id, user_id, ip in fresh
+                ])
+            return fresh
+        except IntegrityError:
+            # a row was stored since the check, look again
+            if attempt == attempts - 1:
+                raise
+
+
+def _run_flusher():
+    while True:
+        _wakeup.wait(FLUSH_INTERVAL)
+        _wakeup.clear()
+        try:
+            flush()
+        finally:
+            close_old_connections()
+
+
+def _start_flusher():
+    global _flusher
+
+    if not FLUSH_INTERVAL or (_flusher is not None and _flusher.is_alive()):
+        return
+
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(
+                target=_run_flusher, name="post-view-flusher", daemon=True
+            )
+            _flusher.start()
+
+
+atexit.register(flush)
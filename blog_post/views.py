@@ -1,18 +1,14 @@
 from django.shortcuts import render, redirect, get_object_or_404, HttpResponse
-from django.db.models import Count
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
 from .models import BlogPost, Category, Review, SubCategory
 from .models import BlogPost, BlogAdditionalImage, Category, Tag
 from django.urls import reverse
+from django.utils.http import urlencode
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from site_settings.models import SiteSettings
 from django.db import IntegrityError 
 from .models import BlogPost, Like 
 
-from accounts.models import CustomUserModel
-
 from comments.models import Comment
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.shortcuts import render, get_object_or_404, redirect
@@ -20,15 +16,17 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout 
 from django.views.decorators.http import require_POST
 from django.contrib import messages
-from blog_post.models import BlogPost, compnay_logo
-from comments.models import Comment, Reply
+from blog_post.models import BlogPost
+from comments.models import Comment
 
 
 from interactions.models import Share
-from django.http import JsonResponse
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.views.decorators.http import require_POST
 from django.shortcuts import get_object_or_404
-from blog_post.models import Post_view_ip
+from blog_post import homepage, search, suggest, view_buffer
+from blog_post.conditional import category_page, conditional, post_page
+from comments import threads
 
 
 
@@ -43,6 +41,7 @@ def get_client_ip(request):
 
 
 
+@conditional(post_page)
 def blog_details_view(request, slug):
     blog_detail = (
         BlogPost.objects.select_related("category", "author")
@@ -65,36 +64,10 @@ def blog_details_view(request, slug):
     most_viewed_blogs = BlogPost.objects.filter(status="published").order_by("-views")
 
 
-    all_comments = (
-        Comment.objects
-        .filter(post=blog_detail) 
-        .select_related("user", "post")  
-        .prefetch_related("replies__user")
-        .order_by("-created_at")
-    )
-    
-    
-    comment_count = all_comments.count() 
-    reply_count = sum(comment.replies.count() for comment in all_comments)
-    total_comments = comment_count + reply_count
-    
-    paginator = Paginator(all_comments, 3) 
-    page_number = request.GET.get('page', 1) 
-    try:
-        page_obj = paginator.page(page_number)
-    except Exception:
-        page_obj = paginator.page(paginator.num_pages)
-    
-    
-    sort_by = request.GET.get('sort_by', 'newest')
-    comment_order = '-created_at'
+    total_comments = blog_detail.comment_count + blog_detail.reply_count
 
-    if sort_by == 'oldest':
-           comment_order = 'created_at'
-    elif sort_by == 'recent':
-        comment_order = '-updated_at'
-
-    all_comments = Comment.objects.filter(post=blog_detail).order_by(comment_order)
+    sort_by = request.GET.get('sort_by', 'newest')
+    comment_thread = threads.comment_page(blog_detail, sort_by)
         
         
     
@@ -108,20 +81,14 @@ def blog_details_view(request, slug):
             user_has_liked = False
             
             
-    #  ip checking for views section count
-    ip = get_client_ip(request)
-    if request.user.is_authenticated:
-        viewed = Post_view_ip.objects.filter(post=blog_detail, user=request.user).exists()
-        if not viewed:
-            Post_view_ip.objects.create(post=blog_detail, user=request.user)
-            blog_detail.views += 1
-            blog_detail.save()
-    else:
-        viewed = Post_view_ip.objects.filter(post=blog_detail, ip_address=ip).exists()
-        if not viewed:
-            Post_view_ip.objects.create(post=blog_detail, ip_address=ip)
-            blog_detail.views += 1
-            blog_detail.save()
+    #  ip checking for views section count (written to the db in batches)
+    first_view = view_buffer.record_view(
+        blog_detail.pk,
+        user_id=request.user.pk if request.user.is_authenticated else None,
+        ip_address=get_client_ip(request),
+    )
+    if first_view:
+        blog_detail.views += 1
         
                 
 
@@ -130,10 +97,10 @@ def blog_details_view(request, slug):
         "related_news":related_news,
         "word_count":word_count,
         "most_viewed_blogs":most_viewed_blogs,
-        "all_comments" : page_obj,
+        "comment_thread" : comment_thread,
         "total_comments":total_comments,
         "user_has_liked":user_has_liked,
-        "sort_by":sort_by,
+        "sort_by":comment_thread["sort_by"],
         "action":"blog_details",
     }
     
@@ -145,222 +112,56 @@ def blog_details_view(request, slug):
 
 
 def home(request):
-   
-    blogs = BlogPost.objects.filter(status="published")[:6]
-
-    top_categories = Category.objects.annotate(
-        post_count=Count('blogpost') 
-    ).filter(post_count__gt=0).order_by('-post_count')[:3]
-
-    first_category = top_categories[0] if top_categories.count() > 0 else None
-    second_category = top_categories[1] if top_categories.count() > 1 else None
-    third_category = top_categories[2] if top_categories.count() > 2 else None
-
-    first_blogs = BlogPost.objects.filter(category=first_category, status='published').order_by('-created_at')
-    second_blogs = BlogPost.objects.filter(category=second_category, status='published').order_by('-created_at')
-    third_blogs = BlogPost.objects.filter(category=third_category, status='published').order_by('-created_at')
-
-
-
-    latest_blog = (
-        BlogPost.objects.filter(status="published").order_by("-created_at").first()
-    )
-    
-    all_category = Category.objects.all()
-
-    # top 5 published blogs for carousel
-    carousel_blogs = BlogPost.objects.filter(status="published").order_by(
-        "-created_at"
-    )[:5]
-
-    top_users = CustomUserModel.objects.filter(is_verified=True,is_superuser=False) \
-    .annotate(post_count=Count('authored_posts')) \
-    .order_by('-post_count')[:4]
-
-    # category wise 4 ta kore blogs nibo
-    tech_cat = Category.objects.filter(slug='technology').first()
-
-    technology_posts = BlogPost.objects.filter(
-        status="published", 
-        category__slug='technology'
-    ).order_by("-created_at")[:4]
-
-
-    news_cat = Category.objects.filter(slug='news').first()
-    news_posts = BlogPost.objects.filter(
-        status="published", 
-        category__slug='news'
-    ).order_by("-created_at")[:4]
-    
+    # Every section comes from the cached snapshot, see blog_post/homepage.py
+    context = homepage.get_snapshot()
+    context["action"] = "home_page"
 
-    tips_cat = Category.objects.filter(slug='tips-tricks').first()
-    tips_posts = BlogPost.objects.filter(
-        status="published", 
-        category__slug='tips-tricks'
-    ).order_by("-created_at")[:4]
-
-    # only latest blogs 
-    Only_latest_blogs = (
-        BlogPost.objects.filter(status="published")
-        .select_related("category", "author")
-        .order_by("-created_at")[:1]
-    ) 
-    
-    # latest and popular blogs
-    latest_popular_blogs = (
-        BlogPost.objects.filter(status="published")
-        .select_related("category", "author")
-        .order_by("-created_at", "-views", "-likes")[:8]
-    ) 
-    
-    
-    
-    popular_categories = (
-        Category.objects
-        .annotate(
-            published_post_count=Count(
-                'blogpost',
-                filter=Q(blogpost__status='published') 
-            )
-        )
-        .filter(published_post_count__gt=0)
-        .order_by('-published_post_count')[:7]
-    )
-
-    # latest category 
-    popular_posts_flat_list = []
+    if request.headers.get("HX-Request"):
+        return render(request, "components/home/partial_homepage.html", context)
 
-    for category in popular_categories:
-       
-        latest_post = (
-            BlogPost.objects
-            .filter(category=category, status='published')
-            .order_by('-created_at')[:1] 
-        )
-        
-        if latest_post:
-            post = latest_post[0]
-            
-            # Add the post in flat list
-            popular_posts_flat_list.append({
-                'title': post.title,
-                'created_at':post.created_at,
-                'slug': post.slug,
-                'views': post.views,
-                'author_username': post.author.username,
-                'category_name': category.name, 
-                'category_icon': category.font_awesome_icon, 
-                'featured_image': post.featured_image,
-                'featured_image_url': post.featured_image_url,
-            })
+    return render(request, "home.html", context)
 
-        
-    
-    # news related post
-    news__related_posts = BlogPost.objects.filter(
-        status="published", 
-        category__slug='news'
-    ).order_by("-views","-likes","-created_at")
+def redirect_search_results(request):
+    query = request.GET.get('q', '').strip()
     
-    # technology related post
-    Teacnology_related_posts = BlogPost.objects.filter(
-        status="published", 
-        category__slug='technology'
-    ).order_by("-views","-likes","-created_at")
-
-    # programming related post
-    programming_related_posts = BlogPost.objects.filter(
-        status="published", 
-        category__slug='programming'
-    ).order_by("-views","-likes","-created_at")
-
-
-
-    # Most viewed
-    most_viewed_blogs = BlogPost.objects.filter(status="published").order_by("-views")
-
-
-    #company logo
-    logos = compnay_logo.objects.all()
-
+    if not query:
+        return redirect('homepage')
 
-    all_tags = Tag.objects.annotate(
-        num_posts=Count('blog_posts')
-    ).order_by('-num_posts')
+    # exact category / subcategory names come from the suggestion index
+    category_match = suggest.exact_category(query)
+    if category_match:
+        return redirect(category_match.url)
 
-    top_tags = all_tags[:15]
+    return redirect(f"{reverse('search_results')}?{urlencode({'q': query})}")
 
 
+def search_suggest(request):
+    # Typeahead for the header search box, see blog_post/suggest.py
+    query = request.GET.get('q', '').strip()
 
     context = {
-        "first_category" : first_category,
-        "second_category": second_category,
-        "third_category" : third_category,
+        "query": query,
+        "suggestions": suggest.suggest(query),
+    }
+    return render(request, "components/search/partial_search_suggestions.html", context)
 
-        "tech_cat" : tech_cat,
-        "news_cat" : news_cat,
-        "tips_cat": tips_cat,
 
-        "first_blogs":first_blogs,
-        "second_blogs":second_blogs,
-        "third_blogs":third_blogs,
+def search_results(request):
+    # Ranked full-text results, see blog_post/search.py
+    query = request.GET.get('q', '').strip()
 
-        "blogs": blogs,
-        "latest_blog": latest_blog,
-        "top_users": top_users,
-        "carousel_blogs": carousel_blogs,
-        "top_tags": top_tags,
-        "technology_posts":technology_posts,
-        "news_posts":news_posts,
-        "tips_posts":tips_posts,
-        "Only_latest_blogs":Only_latest_blogs,
-        "latest_popular_blogs": latest_popular_blogs,
-        "popular_posts_flat_list": popular_posts_flat_list,
-        "news__related_posts":news__related_posts,
-        "Teacnology_related_posts":Teacnology_related_posts,
-        "programming_related_posts":programming_related_posts,
-        "most_viewed_blogs":most_viewed_blogs,
-        "all_category":all_category,
-        "logos":logos,
+    paginator = Paginator(search.SearchResults(query), 8)
+    results = paginator.get_page(request.GET.get('page'))
 
-        "top_categories":top_categories,
-        
-        
-        "action" : "home_page",
+    context = {
+        "query": query,
+        "results": results,
+        "action": "search_results",
     }
 
     if request.headers.get("HX-Request"):
-        return render(request, "components/home/partial_homepage.html", context)
-
-    return render(request, "home.html", context)
-
-def redirect_search_results(request):
-    query = request.GET.get('q', '').strip()
-    
-    if not query:
-        return redirect('homepage')
-
-    try:
-        category_match = Category.objects.get(name__iexact=query)
-        return redirect('category_post', slug=category_match.slug)
-    except Category.DoesNotExist:
-        pass
-    
-    try:
-        subcategory_match = SubCategory.objects.get(name__iexact=query)
-        return redirect('category_post', slug=subcategory_match.slug)
-    except SubCategory.DoesNotExist:
-        pass
-
-    blog_post_match = BlogPost.objects.filter(
-        Q(title__icontains=query) | Q(subtitle__icontains=query),
-        status="published"
-    ).first()
-
-    if blog_post_match:
-        return redirect('blog_details', slug=blog_post_match.slug)
-            
-    return redirect('homepage')
+        return render(request, "components/search/partial_search_results.html", context)
+    return render(request, "components/search/search_results.html", context)
 
 def all_blog_post_view(request):
 
@@ -471,6 +272,7 @@ def all_article(request):
 
 
 
+@conditional(post_page)
 def right_blog_details_partial(request, slug):
 
     blog = get_object_or_404(BlogPost, slug=slug)
@@ -499,21 +301,16 @@ def right_blog_details_partial(request, slug):
 def update_blog_stat(request, slug, stat_type):
     blog = get_object_or_404(BlogPost, slug=slug)
 
+    # Likes and shares are Like / Share rows written by their own views,
+    # only the view counter is a column
     if stat_type == "like":
-        blog.likes += 1
-    elif stat_type == "view":
-        blog.views += 1
+        return HttpResponse(blog.likes.count())
     elif stat_type == "share":
-        blog.shares += 1
-
-    blog.save()
+        return HttpResponse(blog.shares.count())
+    elif stat_type == "view":
+        blog.increment("views")
 
-    
-    return HttpResponse(
-        blog.likes
-        if stat_type == "like"
-        else blog.views if stat_type == "view" else blog.shares
-    )
+    return HttpResponse(blog.views)
 
 
 
@@ -523,7 +320,8 @@ import logging
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.urls import reverse
-from blog_post.groq_service import check_adult_content, check_copyright, get_quality_score
+from django.db import transaction
+from blog_post import moderation_queue
 from .models import BlogPost, Category, SubCategory, Tag
 
 logger = logging.getLogger(__name__)
@@ -594,34 +392,6 @@ def create_blog(request):
             except Exception as e:
                 logger.error(f"Image hash error in view: {e}")
 
-        # Adult content check (Groq) 
-        is_adult = check_adult_content(title, description)
-        if is_adult:
-            messages.error(request, "Your post violates our content policy (adult or harmful content detected).")
-            return render(request, "components/blogs/partial_create_blog_content.html", context)
-
-        # Copyright 
-        is_copied = check_copyright(title, description)
-        if is_copied:
-            messages.error(request, "This content appears to be copied from another source (copyright issue).")
-            return render(request, "components/blogs/partial_create_blog_content.html", context)
-
-        # qality score (Groq)
-        quality_score = get_quality_score(title, description)
-
-        settings = SiteSettings.get_settings()
-        try:
-            threshold_score = int(settings.score_control) if settings.score_control else 70
-        except ValueError:
-            threshold_score = 70
-
-
-
-        if quality_score >= threshold_score:
-            post_status = "published"
-        else:
-            post_status = "pending"
-
         #  Save the post 
         try:
             category    = get_object_or_404(Category, pk=category_id)
@@ -631,31 +401,31 @@ def create_blog(request):
                     pk=subcategory_id, category=category
                 ).first()
 
-            new_blog = BlogPost.objects.create(
-                author             = request.user,
-                category           = category,
-                subcategory        = subcategory,
-                title              = title,
-                description        = description,
-                featured_image     = featured_image_file if featured_image_file else None,
-                featured_image_url = featured_image_url if not featured_image_file else None,
-                status             = post_status,
-                content_quality    = quality_score,
-            )
+            # Saved as pending, the Groq checks run in the moderation
+            # queue (`manage.py moderate_posts`) and publish it from there
+            with transaction.atomic():
+                new_blog = BlogPost.objects.create(
+                    author             = request.user,
+                    category           = category,
+                    subcategory        = subcategory,
+                    title              = title,
+                    description        = description,
+                    featured_image     = featured_image_file if featured_image_file else None,
+                    featured_image_url = featured_image_url if not featured_image_file else None,
+                    status             = "pending",
+                )
 
-            if tags_list_input:
-                tag_names   = [t.strip().lower() for t in tags_list_input.split(',') if t.strip()]
-                tag_objects = [Tag.objects.get_or_create(name=name)[0] for name in tag_names]
-                new_blog.tags.set(tag_objects)
+                if tags_list_input:
+                    tag_names   = [t.strip().lower() for t in tags_list_input.split(',') if t.strip()]
+                    tag_objects = [Tag.objects.get_or_create(name=name)[0] for name in tag_names]
+                    new_blog.tags.set(tag_objects)
 
-            if post_status == "published":
-                messages.success(request, "Your blog post has been published successfully!")
-            else:
-                messages.warning(
-                    request,
-                    f"Your post is under review. Quality score: {quality_score}/100. "
-                    "It will be reviewed by our team shortly."
-                )
+                moderation_queue.enqueue(new_blog)
+
+            messages.success(
+                request,
+                "Your post has been submitted. It will be published as soon as it passes our content checks."
+            )
 
             return redirect('create_blog')
 
@@ -666,6 +436,10 @@ def create_blog(request):
 
     return render(request, "components/blogs/partial_create_blog_content.html", context)
 # Blog filter by category
+SUBCATEGORY_POSTS = 8  # posts shown under each subcategory heading
+
+
+@conditional(category_page)
 def category_post(request, slug):
     
     category = get_object_or_404(
@@ -679,16 +453,20 @@ def category_post(request, slug):
         .prefetch_related("shares")
     )
     
-    subcategory_blogs_map = {}
-    
-    for subcategory in category.subcategories.all():
-        sub_blogs = (
-            BlogPost.objects.filter(subcategory=subcategory, status="published")
-            .select_related("category", "subcategory")
-            .prefetch_related("shares")
-        )
-        if sub_blogs.exists():
-            subcategory_blogs_map[subcategory] = sub_blogs
+    # latest posts of every subcategory in one query
+    sub_blogs = {}
+    for post in (
+        BlogPost.objects.filter(subcategory__category=category, status="published")
+        .latest_per("subcategory", SUBCATEGORY_POSTS)
+        .select_related("category", "subcategory")
+    ):
+        sub_blogs.setdefault(post.subcategory_id, []).append(post)
+
+    subcategory_blogs_map = {
+        subcategory: sub_blogs[subcategory.pk]
+        for subcategory in category.subcategories.all()
+        if subcategory.pk in sub_blogs
+    }
 
     sidebar_blogs = (
         BlogPost.objects.filter(status="published")
@@ -755,6 +533,22 @@ def add_comment(request, post_slug):
 
 
 
+def load_more_comments(request, post_slug):
+    """The next page of comments, swapped in by the "See More" button."""
+    post = get_object_or_404(BlogPost.objects.only('pk', 'slug'), slug=post_slug, status="published")
+
+    cursor = request.GET.get('cursor')
+    if cursor and threads.decode_cursor(cursor) is None:
+        return HttpResponseBadRequest("Invalid cursor")
+
+    context = {
+        "comment_thread": threads.comment_page(post, request.GET.get('sort_by', 'newest'), cursor),
+        "post_slug": post.slug,
+    }
+    return render(request, "components/blog_details/partial_comment_list.html", context)
+
+
+
 @login_required
 @require_POST
 def add_reply(request, comment_id):
@@ -770,8 +564,8 @@ def add_reply(request, comment_id):
         return redirect('post_detail', slug=post_slug)
 
 
-    Reply.objects.create(
-        comment=parent_comment,
+    Comment.objects.create(
+        parent=parent_comment,
         user=request.user, 
         content=content
     )
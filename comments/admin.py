@@ -2,11 +2,12 @@ from django.contrib import admin
 from unfold.admin import ModelAdmin, TabularInline
 from unfold.contrib.import_export.forms import ExportForm, ImportForm
 from import_export.admin import ImportExportModelAdmin
-from .models import Comment, Reply
-from .resources import CommentResource, ReplyResource
+from .models import Comment
+from .resources import CommentResource
 
 class ReplyInline(TabularInline):
-    model = Reply
+    model = Comment
+    fk_name = 'parent'
     extra = 1
     fields = ('user', 'content', 'created_at')
     readonly_fields = ('created_at',)
@@ -17,9 +18,11 @@ class CommentAdmin(ModelAdmin, ImportExportModelAdmin):
     import_form_class = ImportForm
     export_form_class = ExportForm
 
-    list_display = ('user', 'post_title_short', 'content_preview', 'created_at')
+    list_display = ('user', 'post_title_short', 'content_preview', 'depth', 'created_at')
     list_filter = ('created_at', 'post')
     search_fields = ('content', 'user__email', 'post__title')
+    # moving a comment to another thread would break its path
+    readonly_fields = ('parent',)
     inlines = [ReplyInline]
 
     def post_title_short(self, obj):
@@ -29,17 +32,3 @@ class CommentAdmin(ModelAdmin, ImportExportModelAdmin):
     def content_preview(self, obj):
         return obj.content[:50] + "..." if len(obj.content) > 50 else obj.content
     content_preview.short_description = "Comment Content"
-
-@admin.register(Reply)
-class ReplyAdmin(ModelAdmin, ImportExportModelAdmin):
-    resource_class = ReplyResource
-    import_form_class = ImportForm
-    export_form_class = ExportForm
-
-    list_display = ('user', 'parent_comment_preview', 'created_at')
-    search_fields = ('content', 'user__email', 'comment__content')
-    list_filter = ('created_at',)
-
-    def parent_comment_preview(self, obj):
-        return obj.comment.content[:40] + "..." if len(obj.comment.content) > 40 else obj.comment.content
-    parent_comment_preview.short_description = "Replying To"
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django import forms
-from .models import Comment, Reply
+from .models import Comment
 
 
 class CommentForm(forms.ModelForm):
@@ -10,5 +10,5 @@ class CommentForm(forms.ModelForm):
 
 class ReplyForm(forms.ModelForm):
   class Meta:
-    model = Reply
+    model = Comment
     fields = ["content"]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_post', '0005_blogpost_comment_counts'),
+        ('comments', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'updated_at', 'id'], name='comment_post_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# comments.models.PATH_STEP at the time of this migration
+PATH_STEP = 10
+
+
+def thread_existing_comments(apps, schema_editor):
+    """Give every comment its path and turn every Reply into a child comment."""
+    Comment = apps.get_model('comments', 'Comment')
+    Reply = apps.get_model('comments', 'Reply')
+
+    for pk in Comment.objects.values_list('pk', flat=True).iterator():
+        Comment.objects.filter(pk=pk).update(path=f"{pk:0{PATH_STEP}d}", depth=0)
+
+    replies = Reply.objects.select_related('comment').order_by('created_at', 'pk')
+    for reply in replies.iterator():
+        child = Comment.objects.create(
+            post_id=reply.comment.post_id,
+            parent_id=reply.comment_id,
+            user_id=reply.user_id,
+            content=reply.content,
+            depth=1,
+        )
+        Comment.objects.filter(pk=child.pk).update(
+            path=f"{reply.comment_id:0{PATH_STEP}d}{child.pk:0{PATH_STEP}d}",
+            created_at=reply.created_at,
+            updated_at=reply.updated_at,
+        )
+
+
+def flatten_threads(apps, schema_editor):
+    """Back to one level: every nested comment becomes a Reply of its thread root."""
+    Comment = apps.get_model('comments', 'Comment')
+    Reply = apps.get_model('comments', 'Reply')
+
+    children = Comment.objects.filter(parent__isnull=False).order_by('path')
+    for child in children.iterator():
+        reply = Reply.objects.create(
+            comment_id=int(child.path[:PATH_STEP]),
+            user_id=child.user_id,
+            content=child.content,
+        )
+        Reply.objects.filter(pk=reply.pk).update(
+            created_at=child.created_at,
+            updated_at=child.updated_at,
+        )
+    children.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0002_comment_thread_indexes'),
+        # blog_post 0005 reads the Reply table
+        ('blog_post', '0005_blogpost_comment_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='comments.comment'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(thread_existing_comments, flatten_threads),
+        migrations.DeleteModel(
+            name='Reply',
+        ),
+    ]
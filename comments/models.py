@@ -1,32 +1,74 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from blog_post.models import BlogPost
 from accounts.models import CustomUserModel
 
+# Every level of Comment.path is the comment id, zero padded to this width
+PATH_STEP = 10
+PATH_MAX_LENGTH = 255
+# Sorts after every digit, ``path < prefix + PATH_END`` closes a subtree range
+PATH_END = "~"
+
+MAX_DEPTH = min(getattr(settings, "COMMENT_MAX_DEPTH", 20), PATH_MAX_LENGTH // PATH_STEP)
+
+
+class CommentQuerySet(models.QuerySet):
+    def subtrees(self, *paths):
+        """
+        The comments under any of ``paths`` (the nodes themselves included),
+        in tree order. Each subtree is a single range scan on the path index.
+        """
+        if not paths:
+            return self.none()
+
+        ranges = models.Q()
+        for path in paths:
+            ranges |= models.Q(path__gte=path, path__lt=path + PATH_END)
+        return self.filter(ranges).order_by('path')
+
+
 class Comment(models.Model):
     post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name="comments")
+    parent = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, related_name="replies"
+    )
     user = models.ForeignKey(CustomUserModel, on_delete=models.CASCADE)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    class Meta:
-        ordering = ['created_at']
-
-    def __str__(self):
-        return f"Comment by {self.user.first_name} on {self.post.title}"
+    # materialized path: the padded ids from the thread root down to this comment
+    path = models.CharField(max_length=PATH_MAX_LENGTH, blank=True, db_index=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
 
-class Reply(models.Model):
-    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, related_name="replies")
-    user = models.ForeignKey(CustomUserModel, on_delete=models.CASCADE)
-    content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ['created_at']
+        # keyset pagination in comments.threads
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+            models.Index(fields=['post', 'updated_at', 'id'], name='comment_post_updated_idx'),
+        ]
 
     def __str__(self):
-        return f"Reply by {self.user.first_name}"
+        return f"Comment by {self.user.first_name} on {self.post.title}"
 
+    def save(self, *args, **kwargs):
+        if self.parent_id and not self.path:
+            # too deep, answer the parent's parent instead
+            if self.parent.depth + 1 >= MAX_DEPTH:
+                self.parent = self.parent.parent
+            # a reply always belongs to the post of its thread
+            self.post_id = self.parent.post_id
 
+        # the path needs the id, so it is written right after the insert,
+        # in the same transaction: no comment is ever stored without one
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
 
+            if not self.path:
+                prefix = self.parent.path if self.parent_id else ""
+                self.path = f"{prefix}{self.pk:0{PATH_STEP}d}"
+                self.depth = len(self.path) // PATH_STEP - 1
+                Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
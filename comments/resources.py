@@ -1,6 +1,6 @@
 from import_export import resources, fields
 from import_export.widgets import ForeignKeyWidget
-from .models import Comment, Reply
+from .models import Comment
 from blog_post.models import BlogPost
 from accounts.models import CustomUserModel
 
@@ -10,30 +10,18 @@ class CommentResource(resources.ModelResource):
         attribute='post',
         widget=ForeignKeyWidget(BlogPost, 'title') 
     )
-    user = fields.Field(
-        column_name='user_email',
-        attribute='user',
-        widget=ForeignKeyWidget(CustomUserModel, 'email') 
-    )
-
-    class Meta:
-        model = Comment
-        import_id_fields = ('id',)
-        fields = ('id', 'post', 'user', 'content', 'created_at')
-
-class ReplyResource(resources.ModelResource):
-    comment = fields.Field(
+    parent = fields.Field(
         column_name='parent_comment_id',
-        attribute='comment',
+        attribute='parent',
         widget=ForeignKeyWidget(Comment, 'id')
     )
     user = fields.Field(
         column_name='user_email',
         attribute='user',
-        widget=ForeignKeyWidget(CustomUserModel, 'email')
+        widget=ForeignKeyWidget(CustomUserModel, 'email') 
     )
 
     class Meta:
-        model = Reply
+        model = Comment
         import_id_fields = ('id',)
-        fields = ('id', 'comment', 'user', 'content', 'created_at')
\ No newline at end of file
+        fields = ('id', 'post', 'parent', 'user', 'content', 'created_at')
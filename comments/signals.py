@@ -0,0 +1,28 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from blog_post.models import BlogPost
+from .models import Comment
+
+
+# ── BlogPost comment / reply counters ─────────────────────────────────────
+# Top level comments count as comments, everything below them as replies
+
+def _counter(comment):
+    return 'reply_count' if comment.parent_id else 'comment_count'
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        field = _counter(instance)
+        BlogPost.objects.filter(pk=instance.post_id).update(**{field: F(field) + 1})
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    field = _counter(instance)
+    BlogPost.objects.filter(pk=instance.post_id, **{f'{field}__gt': 0}).update(
+        **{field: F(field) - 1}
+    )
@@ -1,3 +1,175 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CustomUserModel
+from blog_post.models import BlogPost
+from . import threads
+from .models import PATH_STEP, Comment, CommentQuerySet
+
+
+def padded(*ids):
+    return "".join(f"{pk:0{PATH_STEP}d}" for pk in ids)
+
+
+class CommentPathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUserModel.objects.create_user(email="reader@example.com", password="x")
+        cls.post = BlogPost.objects.create(title="Post", author=cls.user, status="published")
+
+    def test_path_follows_the_thread(self):
+        root = Comment.objects.create(post=self.post, user=self.user, content="Root")
+        reply = Comment.objects.create(parent=root, user=self.user, content="Reply")
+        self.assertEqual((root.path, root.depth), (padded(root.pk), 0))
+        self.assertEqual((reply.path, reply.depth, reply.post_id), (padded(root.pk, reply.pk), 1, self.post.pk))
+
+    def test_no_comment_without_a_path(self):
+        with mock.patch.object(CommentQuerySet, "update", side_effect=DatabaseError("disk full")):
+            with self.assertRaises(DatabaseError):
+                Comment.objects.create(post=self.post, user=self.user, content="Lost")
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(BlogPost.objects.get(pk=self.post.pk).comment_count, 0)
+
+
+class CommentPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUserModel.objects.create_user(email="reader@example.com", password="x")
+        cls.post = BlogPost.objects.create(title="Post", author=cls.user, status="published")
+        cls.roots = [Comment.objects.create(post=cls.post, user=cls.user, content=f"Root {i}") for i in range(7)]
+        cls.reply = Comment.objects.create(parent=cls.roots[1], user=cls.user, content="Reply")
+        cls.nested = Comment.objects.create(parent=cls.reply, user=cls.user, content="Nested")
+
+        # ties: pages must break them by id, not skip or repeat rows
+        now = timezone.now().replace(microsecond=0)
+        for i, root in enumerate(cls.roots):
+            root.created_at = now + timedelta(minutes=i // 4)
+            root.updated_at = now + timedelta(minutes=i % 2)
+            Comment.objects.filter(pk=root.pk).update(created_at=root.created_at, updated_at=root.updated_at)
+
+    def walk(self, sort_by):
+        pages, cursor = [], None
+        while True:
+            with self.assertNumQueries(2):  # the top level comments, then every reply of the page
+                page = threads.comment_page(self.post, sort_by, cursor, size=3)
+            pages.append([comment.pk for comment in page["comments"]])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages
+
+    def expected(self, column, newest_first):
+        roots = sorted(self.roots, key=lambda root: (getattr(root, column), root.pk), reverse=newest_first)
+        ids = [root.pk for root in roots]
+        return [ids[:3], ids[3:6], ids[6:]]
+
+    def test_sort_orders(self):
+        self.assertEqual(self.walk("newest"), self.expected("created_at", True))
+        self.assertEqual(self.walk("oldest"), self.expected("created_at", False))
+        self.assertEqual(self.walk("recent"), self.expected("updated_at", True))
+        self.assertEqual(self.walk("bogus"), self.walk("newest"))
+
+    def test_replies_come_with_their_thread(self):
+        page = threads.comment_page(self.post, "oldest", size=3)
+        root = next(comment for comment in page["comments"] if comment.pk == self.roots[1].pk)
+        self.assertEqual([reply.pk for reply in root.thread_replies], [self.reply.pk])
+        self.assertEqual([reply.pk for reply in root.thread_replies[0].thread_replies], [self.nested.pk])
+
+    def test_bad_cursors(self):
+        for cursor in ("", "%%%", "bm90IGEgY3Vyc29y", threads.urlsafe_base64_encode(b"2026-01-01|x")):
+            self.assertIsNone(threads.decode_cursor(cursor), cursor)
+
+    def test_load_more(self):
+        url = reverse("load_more_comments", args=[self.post.slug])
+        first = self.client.get(url, {"sort_by": "oldest"})
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url, {"sort_by": "oldest", "cursor": first.context["comment_thread"]["next_cursor"]})
+        ids = self.expected("created_at", False)
+        self.assertEqual([comment.pk for comment in first.context["comment_thread"]["comments"]], ids[0])
+        self.assertEqual([comment.pk for comment in second.context["comment_thread"]["comments"]], ids[1])
+        self.assertEqual(len(queries), 3)  # the post, then the page
+
+        self.assertEqual(self.client.get(url, {"cursor": "%%%"}).status_code, 400)
+
+    def test_load_more_of_an_unpublished_post(self):
+        BlogPost.objects.filter(pk=self.post.pk).update(status="pending")
+        response = self.client.get(reverse("load_more_comments", args=[self.post.slug]))
+        # the site sends every 404 home
+        self.assertRedirects(response, reverse("homepage"), fetch_redirect_response=False)
+
+
+class ThreadedCommentsMigrationTests(TransactionTestCase):
+    """0003 turns every Reply into a child Comment, and back."""
+
+    before = [("comments", "0002_comment_thread_indexes")]
+    after = [("comments", "0003_threaded_comments")]
+
+    def setUp(self):
+        self.addCleanup(self.migrate, None)
+        apps = self.migrate(self.before)
+        Comment = apps.get_model("comments", "Comment")
+        Reply = apps.get_model("comments", "Reply")
+
+        # users and posts are not migrated back, they use today's models
+        self.user = CustomUserModel.objects.create(email="reader@example.com")
+        post = BlogPost.objects.create(title="Post", author=self.user)
+        self.first, self.second = (
+            Comment.objects.create(post_id=post.pk, user_id=self.user.pk, content=content) for content in ("First", "Second")
+        )
+        start = timezone.now() - timedelta(days=1)
+        for minutes, comment, content in ((3, self.first, "Later"), (1, self.first, "Earlier"), (2, self.second, "Other")):
+            reply = Reply.objects.create(comment=comment, user_id=self.user.pk, content=content)
+            Reply.objects.filter(pk=reply.pk).update(created_at=start + timedelta(minutes=minutes))
+        self.replies = self.reply_rows(Reply)
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        if targets is None:  # back to the latest state for the next tests
+            targets = executor.loader.graph.leaf_nodes()
+        executor.migrate(targets)
+        return MigrationExecutor(connection).loader.project_state(targets).apps
+
+    @staticmethod
+    def reply_rows(Reply):
+        return sorted(Reply.objects.values_list("comment_id", "user_id", "content", "created_at"))
+
+    def test_replies_become_child_comments(self):
+        Comment = self.migrate(self.after).get_model("comments", "Comment")
+
+        self.assertNotIn("comments_reply", connection.introspection.table_names())
+        rows = list(Comment.objects.order_by("path").values_list("content", "parent_id", "depth", "path", "pk"))
+        first, earlier, later, second, other = rows
+        self.assertEqual(first[:4], ("First", None, 0, padded(self.first.pk)))
+        self.assertEqual(earlier[:4], ("Earlier", self.first.pk, 1, padded(self.first.pk, earlier[4])))
+        self.assertEqual(later[:4], ("Later", self.first.pk, 1, padded(self.first.pk, later[4])))
+        self.assertEqual(second[:4], ("Second", None, 0, padded(self.second.pk)))
+        self.assertEqual(other[:4], ("Other", self.second.pk, 1, padded(self.second.pk, other[4])))
+
+        # replies keep their timestamps
+        created = dict(Comment.objects.values_list("content", "created_at"))
+        self.assertEqual(
+            sorted((comment_id, user, content, created[content]) for comment_id, user, content, _ in self.replies),
+            self.replies,
+        )
+
+    def test_round_trip(self):
+        Comment = self.migrate(self.after).get_model("comments", "Comment")
+        # nested deeper than the old schema allows: flattened onto the thread root
+        earlier = Comment.objects.get(content="Earlier")
+        deep = Comment.objects.create(
+            post_id=earlier.post_id, user_id=self.user.pk, content="Deep", parent=earlier, depth=2,
+        )
+        Comment.objects.filter(pk=deep.pk).update(path=earlier.path + padded(deep.pk))
+
+        apps = self.migrate(self.before)
+        Comment, Reply = apps.get_model("comments", "Comment"), apps.get_model("comments", "Reply")
+        self.assertEqual(sorted(Comment.objects.values_list("content", flat=True)), ["First", "Second"])
+        rows = self.reply_rows(Reply)
+        self.assertIn((self.first.pk, self.user.pk, "Deep"), [row[:3] for row in rows])
+        self.assertEqual([row for row in rows if row[2] != "Deep"], self.replies)
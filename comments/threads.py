@@ -0,0 +1,107 @@
+"""
+Comment thread pages for the blog details page.
+
+Top level comments are paged with a keyset cursor over
+``(sort column, id)`` instead of OFFSET, so a deep page costs the same as
+the first one, and nothing is ever counted. The whole reply tree of a
+page, at any depth, comes in one extra query (a path range scan per
+thread) and is assembled in a single pass, see ``attach_replies``.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from .models import Comment
+
+PAGE_SIZE = getattr(settings, "COMMENT_PAGE_SIZE", 3)
+
+# sort_by -> (column, newest first)
+SORTS = {
+    "newest": ("created_at", True),
+    "oldest": ("created_at", False),
+    "recent": ("updated_at", True),
+}
+
+
+def encode_cursor(comment, column):
+    value = getattr(comment, column).isoformat()
+    return urlsafe_base64_encode(force_bytes(f"{value}|{comment.pk}"))
+
+
+def decode_cursor(cursor):
+    """``(value, pk)`` of a cursor, None if it can't be read."""
+    try:
+        value, pk = force_str(urlsafe_base64_decode(cursor)).rsplit("|", 1)
+        return datetime.datetime.fromisoformat(value), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+
+
+def attach_replies(roots):
+    """
+    Load every reply below ``roots`` and hang each one on its parent's
+    ``thread_replies`` list, oldest first. Returns ``roots``.
+    """
+    nodes = {}
+    for root in roots:
+        root.thread_replies = []
+        nodes[root.pk] = root
+
+    replies = (
+        Comment.objects.subtrees(*[root.path for root in roots])
+        .filter(depth__gt=0)
+        .select_related("user")
+    )
+    # tree order puts every parent before its replies
+    for reply in replies:
+        reply.thread_replies = []
+        nodes[reply.pk] = reply
+        parent = nodes.get(reply.parent_id)
+        if parent is not None:
+            parent.thread_replies.append(reply)
+    return roots
+
+
+def comment_page(post, sort_by="newest", cursor=None, size=PAGE_SIZE):
+    """
+    One page of ``post``'s top level comments, each carrying its reply
+    tree in ``thread_replies``. Returns ``{"comments", "next_cursor",
+    "sort_by"}``; ``next_cursor`` is None on the last page.
+    """
+    if sort_by not in SORTS:
+        sort_by = "newest"
+    column, descending = SORTS[sort_by]
+
+    comments = (
+        Comment.objects.filter(post=post, parent__isnull=True)
+        .select_related("user")
+    )
+
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        value, pk = position
+        op = "lt" if descending else "gt"
+        comments = comments.filter(
+            Q(**{f"{column}__{op}": value}) | Q(**{column: value, f"pk__{op}": pk})
+        )
+
+    if descending:
+        comments = comments.order_by(f"-{column}", "-pk")
+    else:
+        comments = comments.order_by(column, "pk")
+
+    # one extra row tells whether there is a next page
+    comments = list(comments[:size + 1])
+    next_cursor = None
+    if len(comments) > size:
+        comments = comments[:size]
+        next_cursor = encode_cursor(comments[-1], column)
+
+    return {
+        "comments": attach_replies(comments),
+        "next_cursor": next_cursor,
+        "sort_by": sort_by,
+    }
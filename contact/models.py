@@ -1,5 +1,6 @@
 from django.db import models
 from accounts.models import CustomUserModel
+from site_settings.singleton import CachedSingleton
 class contact_or_support(models.Model):
     user = models.ForeignKey(CustomUserModel, on_delete=models.CASCADE, related_name="contact_user", null=True, blank=True)
     name = models.CharField(max_length=100)
@@ -40,3 +41,10 @@ class FooterSettings(models.Model):
 
     def __str__(self):
         return "Global Footer Configuration"
+
+    @classmethod
+    def get_settings(cls):
+        return footer_cache.get()
+
+
+footer_cache = CachedSingleton(FooterSettings, FooterSettings.objects.first)
@@ -19,10 +19,10 @@ class QuestionAdmin(ModelAdmin, ImportExportModelAdmin):
     import_form_class = ImportForm
     export_form_class = ExportForm
     
-    list_display = ('title', 'author', 'created_at')
+    list_display = ('title', 'author', 'answer_count', 'created_at')
     search_fields = ('title', 'content', 'author__email', 'author__first_name')
     list_filter = ('created_at', 'author')
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'answer_count', 'last_activity_at')
     inlines = [AnswerInline]
     prepopulated_fields = {'slug': ('title',)}
 
@@ -48,12 +48,5 @@ class FollowSectionAdmin(ModelAdmin, ImportExportModelAdmin):
     import_form_class = ImportForm
     export_form_class = ExportForm
     
-    list_display = ('user', 'followers_count_display', 'following_count_display')
-    
-    def followers_count_display(self, obj):
-        return obj.followers_count()
-    followers_count_display.short_description = "Followers"
-
-    def following_count_display(self, obj):
-        return obj.following_count()
-    following_count_display.short_description = "Following"
\ No newline at end of file
+    list_display = ('user', 'followers_count', 'following_count')
+    readonly_fields = ('followers_count', 'following_count')
@@ -1,13 +1,9 @@
-from django.db.models import Count
-from forum.models import Question,Follow_section
+from forum import follow_graph, popular
+from root.context import lazy
 
 def popular_questions(request):
-    popular_question = Question.objects.annotate(
-        num_answers=Count('answers')
-    ).order_by('-num_answers', '-created_at')   
-    
     context = {
-        "popular_question": popular_question,
+        "popular_question": lazy(request, "popular_question", popular.get_popular),
     }
     return(context) 
 
@@ -15,14 +11,19 @@ def popular_questions(request):
 
 
 def global_follow_list(request):
+    # only the first few users, the modals load the rest with htmx
     if request.user.is_authenticated:
-        follow_obj, created = Follow_section.objects.get_or_create(user=request.user)
-        
         return {
-            'global_followers': [f.user for f in request.user.followers.all()],
-            'global_following': follow_obj.following.all(),
+            'global_followers': lazy(
+                request, "global_followers",
+                lambda: follow_graph.followers_page(request.user, size=follow_graph.PREVIEW_SIZE),
+            ),
+            'global_following': lazy(
+                request, "global_following",
+                lambda: follow_graph.following_page(request.user, size=follow_graph.PREVIEW_SIZE),
+            ),
         }
     return {
-        'global_followers': [],
-        'global_following': [],
+        'global_followers': None,
+        'global_following': None,
     }
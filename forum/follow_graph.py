@@ -0,0 +1,98 @@
+"""
+Follow graph helpers.
+
+Follower / following totals live on ``Follow_section`` and are kept in
+sync by ``forum.signals``, so showing them never counts the graph. Lists
+are read a page at a time straight from the ``following`` through table,
+newest first. Pages fetch one extra row to know whether more exist,
+which avoids a COUNT query.
+"""
+from django.conf import settings
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Follow_section
+
+PREVIEW_SIZE = getattr(settings, "FOLLOW_PREVIEW_SIZE", 10)
+PAGE_SIZE = getattr(settings, "FOLLOW_PAGE_SIZE", 20)
+
+Follow = Follow_section.following.through
+
+
+def get_section(user):
+    """The user's ``Follow_section``, or an unsaved empty one. Never writes."""
+    section = Follow_section.objects.filter(user=user).first()
+    return section or Follow_section(user=user)
+
+
+def _page(rows, offset, size):
+    rows = list(rows[offset:offset + size + 1])
+    return {
+        "users": rows[:size],
+        "next_offset": offset + size if len(rows) > size else None,
+    }
+
+
+def followers_page(user, offset=0, size=PAGE_SIZE):
+    rows = (
+        Follow.objects.filter(customusermodel_id=user.pk)
+        .select_related("follow_section__user")
+        .order_by("-pk")
+    )
+    page = _page(rows, offset, size)
+    page["users"] = [row.follow_section.user for row in page["users"]]
+    return page
+
+
+def following_page(user, offset=0, size=PAGE_SIZE):
+    rows = (
+        Follow.objects.filter(follow_section__user_id=user.pk)
+        .select_related("customusermodel")
+        .order_by("-pk")
+    )
+    page = _page(rows, offset, size)
+    page["users"] = [row.customusermodel for row in page["users"]]
+    return page
+
+
+def following_ids(user, among):
+    """Which of the user ids in ``among`` ``user`` follows."""
+    return set(
+        Follow.objects.filter(follow_section__user_id=user.pk, customusermodel_id__in=among)
+        .values_list("customusermodel_id", flat=True)
+    )
+
+
+def ensure_sections(user_ids):
+    """Create the missing ``Follow_section`` rows of ``user_ids``."""
+    Follow_section.objects.bulk_create(
+        [Follow_section(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+
+
+def recount(section_ids=(), user_ids=()):
+    """
+    Recompute the stored counts. ``section_ids`` get their
+    ``following_count`` refreshed, the sections of ``user_ids`` their
+    ``followers_count``.
+    """
+    def counted(**filters):
+        return Coalesce(
+            Subquery(
+                Follow.objects.filter(**filters)
+                .values(*filters)
+                .annotate(total=Count("pk"))
+                .values("total")
+            ),
+            Value(0),
+        )
+
+    if section_ids:
+        Follow_section.objects.filter(pk__in=section_ids).update(
+            following_count=counted(follow_section_id=OuterRef("pk")),
+        )
+    if user_ids:
+        Follow_section.objects.filter(user_id__in=user_ids).update(
+            followers_count=counted(customusermodel_id=OuterRef("user_id")),
+        )
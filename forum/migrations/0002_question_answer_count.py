@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:16
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def backfill_answer_stats(apps, schema_editor):
+    Question = apps.get_model('forum', 'Question')
+
+    questions = Question.objects.annotate(
+        num_answers=Count('answers'),
+        last_answer_at=Max('answers__created_at'),
+    )
+    for question in questions.iterator():
+        question.answer_count = question.num_answers
+        question.last_activity_at = question.last_answer_at or question.created_at
+        question.save(update_fields=['answer_count', 'last_activity_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='answer_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-answer_count', '-created_at'], name='forum_question_popular_idx'),
+        ),
+        migrations.RunPython(backfill_answer_stats, migrations.RunPython.noop),
+    ]
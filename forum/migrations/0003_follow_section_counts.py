@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:18
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_follow_counts(apps, schema_editor):
+    Follow_section = apps.get_model('forum', 'Follow_section')
+    Follow = Follow_section.following.through
+
+    followers = dict(
+        Follow.objects.values('customusermodel_id')
+        .annotate(total=Count('pk'))
+        .values_list('customusermodel_id', 'total')
+    )
+
+    # followed users need a row to hold their followers count
+    Follow_section.objects.bulk_create(
+        [Follow_section(user_id=user_id) for user_id in followers],
+        ignore_conflicts=True,
+    )
+
+    sections = Follow_section.objects.annotate(num_following=Count('following'))
+    for section in sections.iterator():
+        section.followers_count = followers.get(section.user_id, 0)
+        section.following_count = section.num_following
+        section.save(update_fields=['followers_count', 'following_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0002_question_answer_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='follow_section',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='follow_section',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_follow_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:40
+
+from html import unescape
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+# Kept in sync with forum.search
+QUESTION_TABLE = 'forum_question_search'
+ANSWER_TABLE = 'forum_answer_search'
+TOKENIZE = "tokenize=\"unicode61 remove_diacritics 2 categories 'L* N* Co M*'\""
+
+
+def plain_text(html):
+    return ' '.join(unescape(strip_tags(html or '')).split())
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    Question = apps.get_model('forum', 'Question')
+    Answer = apps.get_model('forum', 'Answer')
+    schema_editor.execute(f"CREATE VIRTUAL TABLE {QUESTION_TABLE} USING fts5(title, content, {TOKENIZE})")
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {ANSWER_TABLE} USING fts5(question_id UNINDEXED, content, {TOKENIZE})"
+    )
+
+    questions = [
+        (pk, title, plain_text(content))
+        for pk, title, content in Question.objects.values_list('pk', 'title', 'content').iterator(chunk_size=500)
+    ]
+    answers = [
+        (pk, question_id, plain_text(content))
+        for pk, question_id, content in Answer.objects.values_list('pk', 'question_id', 'content').iterator(chunk_size=500)
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {QUESTION_TABLE}(rowid, title, content) VALUES (%s, %s, %s)", questions
+        )
+        cursor.executemany(
+            f"INSERT INTO {ANSWER_TABLE}(rowid, question_id, content) VALUES (%s, %s, %s)", answers
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {QUESTION_TABLE}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {ANSWER_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0003_follow_section_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from accounts.models import CustomUserModel
+from django.utils import timezone
 from django.utils.text import slugify
 from ckeditor_uploader.fields import RichTextUploadingField
 from imagekit.models import ImageSpecField
@@ -20,10 +21,17 @@ class Question(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # kept up to date by forum.signals, no need to count answers on every page
+    answer_count = models.PositiveIntegerField(default=0, editable=False)
+    last_activity_at = models.DateTimeField(default=timezone.now, editable=False)
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Question"
         verbose_name_plural = "Questions"
+        indexes = [
+            models.Index(fields=['-answer_count', '-created_at'], name='forum_question_popular_idx'),
+        ]
 
 
 
@@ -69,14 +77,12 @@ class Follow_section(models.Model):
     following = models.ManyToManyField(CustomUserModel, related_name='followers', blank=True)
 
 
+    # kept up to date by forum.signals, see forum.follow_graph
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True, blank=True, null=True)
     updated_at = models.DateTimeField(auto_now=True, blank=True, null=True)
-
-    def followers_count(self):
-        return self.user.followers.count()
-
-    def following_count(self):
-        return self.following.count()
     
     def __str__(self):
         return f"Follow Section of {self.user.username}"
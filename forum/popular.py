@@ -0,0 +1,51 @@
+"""
+Cached "popular questions" feed for the forum sidebar.
+
+Only the top ``FORUM_POPULAR_QUESTIONS`` questions are loaded, ordered by
+the denormalized ``Question.answer_count`` (served by an index), and kept
+in the cache behind a version stamp that ``forum.signals`` replaces when a
+question or answer changes. Rendering the sidebar costs one cache read no
+matter how big the forum gets. Both keys expire after
+``FORUM_POPULAR_TIMEOUT`` seconds, so even a missed invalidation only
+serves a stale list for that long.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Question
+
+LIMIT = getattr(settings, "FORUM_POPULAR_QUESTIONS", 10)
+TIMEOUT = getattr(settings, "FORUM_POPULAR_TIMEOUT", 60 * 10)
+
+VERSION_KEY = "forum:popular:version"
+DATA_KEY = "forum:popular:data"
+
+
+def _load():
+    return list(
+        Question.objects.select_related('author')
+        .order_by('-answer_count', '-created_at')[:LIMIT]
+    )
+
+
+def invalidate():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, TIMEOUT)
+
+
+def get_popular():
+    cached = cache.get_many([VERSION_KEY, DATA_KEY])
+    version = cached.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version, TIMEOUT):
+            version = cache.get(VERSION_KEY)
+
+    entry = cached.get(DATA_KEY)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    questions = _load()
+    cache.set(DATA_KEY, (version, questions), TIMEOUT)
+    return questions
@@ -0,0 +1,202 @@
+"""
+Full-text search over forum questions and answers.
+
+Questions (title, content) and answers (content) each have an FTS5 table,
+created by migration 0004 and kept in sync by ``forum.signals``. A search
+runs one MATCH per table, so its cost follows the number of matches, not
+the number of answers. Matching answers count towards their question:
+``RankedQuestions`` orders questions by their own BM25 score plus a
+smaller share of their answers' scores.
+
+Like ``blog_post.search`` this needs SQLite; elsewhere it falls back to
+``icontains`` without ranking.
+"""
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from blog_post.search import available, match_expression, plain_text
+from .models import Answer, Question
+
+QUESTION_TABLE = "forum_question_search"
+ANSWER_TABLE = "forum_answer_search"
+
+# bm25() weight of the question title and content
+QUESTION_WEIGHTS = (10.0, 1.0)
+# an answer match counts this much of a question match
+ANSWER_SHARE = 0.5
+
+# Question ids with a match, as a subquery
+_MATCHING_IDS = (
+    f"SELECT rowid AS question_id FROM {QUESTION_TABLE} WHERE {QUESTION_TABLE} MATCH %s "
+    f"UNION SELECT question_id FROM {ANSWER_TABLE} WHERE {ANSWER_TABLE} MATCH %s"
+)
+
+
+def _replace_rows(table, ids, rows, columns):
+    with connection.cursor() as cursor:
+        placeholders = ", ".join(["%s"] * len(ids))
+        cursor.execute(f"DELETE FROM {table} WHERE rowid IN ({placeholders})", ids)
+        if rows:
+            values = ", ".join(["%s"] * (len(columns) + 1))
+            cursor.executemany(
+                f"INSERT INTO {table}(rowid, {', '.join(columns)}) VALUES ({values})", rows
+            )
+
+
+def reindex_questions(question_ids):
+    question_ids = list(question_ids)
+    if not question_ids or not available():
+        return
+    rows = [
+        (pk, title, plain_text(content))
+        for pk, title, content in Question.objects.filter(pk__in=question_ids)
+        .values_list("pk", "title", "content")
+    ]
+    _replace_rows(QUESTION_TABLE, question_ids, rows, ("title", "content"))
+
+
+def reindex_answers(answer_ids):
+    answer_ids = list(answer_ids)
+    if not answer_ids or not available():
+        return
+    rows = [
+        (pk, question_id, plain_text(content))
+        for pk, question_id, content in Answer.objects.filter(pk__in=answer_ids)
+        .values_list("pk", "question_id", "content")
+    ]
+    _replace_rows(ANSWER_TABLE, answer_ids, rows, ("question_id", "content"))
+
+
+def filter_questions(queryset, query):
+    """Questions of ``queryset`` matching ``query`` themselves or in an answer."""
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not available():
+        return queryset.filter(
+            Q(title__icontains=query) | Q(content__icontains=query) | Q(answers__content__icontains=query)
+        ).distinct()
+    return queryset.filter(pk__in=RawSQL(_MATCHING_IDS, [expression, expression]))
+
+
+def filter_answers(queryset, query):
+    """Answers of ``queryset`` matching ``query``."""
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not available():
+        return queryset.filter(content__icontains=query)
+    return queryset.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {ANSWER_TABLE} WHERE {ANSWER_TABLE} MATCH %s", [expression])
+    )
+
+
+def attach_matching_answers(questions, query):
+    """
+    Set ``matching_answers`` on each of ``questions``: how many of its
+    answers match ``query``. One query for the whole page.
+    """
+    questions = list(questions)
+    expression = match_expression(query)
+    counts = {}
+    if questions and expression:
+        ids = [question.pk for question in questions]
+        if available():
+            placeholders = ", ".join(["%s"] * len(ids))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT question_id, count(*) FROM {ANSWER_TABLE} "
+                    f"WHERE {ANSWER_TABLE} MATCH %s AND question_id IN ({placeholders}) "
+                    f"GROUP BY question_id",
+                    [expression, *ids],
+                )
+                counts = dict(cursor.fetchall())
+        else:
+            for question_id in Answer.objects.filter(
+                question_id__in=ids, content__icontains=query
+            ).values_list("question_id", flat=True):
+                counts[question_id] = counts.get(question_id, 0) + 1
+    for question in questions:
+        question.matching_answers = counts.get(question.pk, 0)
+    return questions
+
+
+class RankedQuestions:
+    """
+    The questions matching ``query``, best first, for a ``Paginator``. A
+    page costs the ranking query plus one query for the questions, loaded
+    through ``queryset``. Each carries ``matching_answers``. Filters on
+    ``queryset`` are part of the count and ranking queries, so pages are
+    full and the total is right.
+    """
+
+    def __init__(self, query, queryset=None):
+        self.query = query
+        self.queryset = Question.objects.all() if queryset is None else queryset
+        self.expression = match_expression(query)
+        self._count = None
+
+    def _scope(self):
+        """A ``WHERE`` keeping the ids ``queryset`` allows, with its params."""
+        if not self.queryset.query.has_filters():
+            return "", []
+        sql, params = self.queryset.order_by().values("pk").query.sql_with_params()
+        return f" WHERE question_id IN ({sql})", list(params)
+
+    def count(self):
+        if self._count is None:
+            if not self.expression:
+                self._count = 0
+            elif not available():
+                self._count = filter_questions(self.queryset, self.query).count()
+            else:
+                scope, params = self._scope()
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"SELECT count(*) FROM ({_MATCHING_IDS}){scope}",
+                        [self.expression, self.expression, *params],
+                    )
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+
+        offset = key.start or 0
+        limit = (key.stop if key.stop is not None else self.count()) - offset
+        if not self.expression or limit <= 0:
+            return []
+
+        if not available():
+            questions = filter_questions(self.queryset, self.query).order_by("-created_at")
+            return attach_matching_answers(questions[offset:offset + limit], self.query)
+
+        weights = ", ".join(str(weight) for weight in QUESTION_WEIGHTS)
+        scope, params = self._scope()
+        with connection.cursor() as cursor:
+            # bm25() is negative, lower is better
+            cursor.execute(
+                f"SELECT question_id, sum(answers) FROM ("
+                f"SELECT rowid AS question_id, bm25({QUESTION_TABLE}, {weights}) AS score, 0 AS answers "
+                f"FROM {QUESTION_TABLE} WHERE {QUESTION_TABLE} MATCH %s "
+                f"UNION ALL "
+                f"SELECT question_id, bm25({ANSWER_TABLE}) * {ANSWER_SHARE}, 1 "
+                f"FROM {ANSWER_TABLE} WHERE {ANSWER_TABLE} MATCH %s"
+                f"){scope} GROUP BY question_id ORDER BY sum(score), question_id DESC LIMIT %s OFFSET %s",
+                [self.expression, self.expression, *params, limit, offset],
+            )
+            hits = cursor.fetchall()
+
+        by_id = self.queryset.in_bulk([question_id for question_id, _ in hits])
+        results = []
+        for question_id, matching_answers in hits:
+            question = by_id.get(question_id)
+            if question is not None:
+                question.matching_answers = matching_answers
+                results.append(question)
+        return results
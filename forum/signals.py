@@ -0,0 +1,111 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import CustomUserModel
+from . import follow_graph, popular, search
+from .models import Answer, Follow_section, Question
+
+
+# ── Answer counters ───────────────────────────────────────────────────────
+
+@receiver(post_save, sender=Answer)
+def answer_created(sender, instance, created, **kwargs):
+    if not created:
+        return
+    Question.objects.filter(pk=instance.question_id).update(
+        answer_count=F('answer_count') + 1,
+        last_activity_at=instance.created_at,
+    )
+    transaction.on_commit(popular.invalidate)
+
+
+@receiver(post_delete, sender=Answer)
+def answer_deleted(sender, instance, **kwargs):
+    Question.objects.filter(pk=instance.question_id, answer_count__gt=0).update(
+        answer_count=F('answer_count') - 1,
+    )
+    transaction.on_commit(popular.invalidate)
+
+
+# ── Popular questions feed ────────────────────────────────────────────────
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, **kwargs):
+    transaction.on_commit(popular.invalidate)
+
+
+# ── Full-text search index ────────────────────────────────────────────────
+
+@receiver([post_save, post_delete], sender=Question)
+def reindex_question(sender, instance, **kwargs):
+    transaction.on_commit(partial(search.reindex_questions, [instance.pk]))
+
+
+@receiver([post_save, post_delete], sender=Answer)
+def reindex_answer(sender, instance, **kwargs):
+    transaction.on_commit(partial(search.reindex_answers, [instance.pk]))
+
+
+# ── Follower / following counts ──────────────────────────────────────────
+
+@receiver(m2m_changed, sender=Follow_section.following.through)
+def following_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # forward: instance is a Follow_section, pk_set holds user ids
+    # reverse: instance is a user, pk_set holds Follow_section ids
+    if action == "pre_clear":
+        if reverse:
+            instance._cleared_follow_ids = list(
+                sender.objects.filter(customusermodel_id=instance.pk)
+                .values_list("follow_section_id", flat=True)
+            )
+        else:
+            instance._cleared_follow_ids = list(
+                instance.following.values_list("pk", flat=True)
+            )
+        return
+
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop("_cleared_follow_ids", [])
+    elif action not in ("post_add", "post_remove"):
+        return
+
+    if not pk_set:
+        return
+
+    if reverse:
+        if action == "post_add":
+            follow_graph.ensure_sections([instance.pk])
+        follow_graph.recount(section_ids=pk_set, user_ids=[instance.pk])
+    else:
+        if action == "post_add":
+            follow_graph.ensure_sections(pk_set)
+        follow_graph.recount(section_ids=[instance.pk], user_ids=pk_set)
+
+
+# Cascade deletes drop through rows without sending m2m_changed
+
+@receiver(pre_delete, sender=Follow_section)
+def follow_section_deleting(sender, instance, **kwargs):
+    instance._followed_ids = list(instance.following.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Follow_section)
+def follow_section_deleted(sender, instance, **kwargs):
+    follow_graph.recount(user_ids=instance.__dict__.pop("_followed_ids", []))
+
+
+@receiver(pre_delete, sender=CustomUserModel)
+def user_deleting(sender, instance, **kwargs):
+    instance._follower_section_ids = list(
+        follow_graph.Follow.objects.filter(customusermodel_id=instance.pk)
+        .values_list("follow_section_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=CustomUserModel)
+def user_deleted(sender, instance, **kwargs):
+    follow_graph.recount(section_ids=instance.__dict__.pop("_follower_section_ids", []))
@@ -1,3 +1,182 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
 from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import CustomUserModel
+from . import follow_graph, popular, search
+from .models import Answer, Follow_section, Question
+
+
+class PopularQuestionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUserModel.objects.create_user(email="asker@example.com", password="x")
+        cls.first = Question.objects.create(author=cls.user, title="First question")
+        cls.second = Question.objects.create(author=cls.user, title="Second question")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_until_an_answer_moves_the_order(self):
+        self.assertEqual(popular.get_popular()[0], self.second)  # newest first on a tie
+        with self.assertNumQueries(0):
+            popular.get_popular()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Answer.objects.create(question=self.first, author=self.user, content="An answer")
+        self.assertEqual(popular.get_popular()[0], self.first)
+
+    def test_missed_invalidation_expires(self):
+        with mock.patch.object(popular, "TIMEOUT", 1):
+            popular.get_popular()
+            Question.objects.filter(pk=self.second.pk).update(title="Renamed")  # no signal
+            self.assertEqual(popular.get_popular()[0].title, "Second question")
+            time.sleep(1.1)
+            self.assertEqual(popular.get_popular()[0].title, "Renamed")
+
+
+class QuestionSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.asker = CustomUserModel.objects.create_user(email="asker@example.com", password="x")
+        cls.other = CustomUserModel.objects.create_user(email="other@example.com", password="x")
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.django = Question.objects.create(author=cls.asker, title="Install Django on Windows", content="<p>Steps?</p>")
+            cls.packaging = Question.objects.create(author=cls.asker, title="Python packaging", content="<p>Wheels or eggs?</p>")
+            cls.linux = Question.objects.create(author=cls.other, title="Install Linux", content="<p>Which distro?</p>")
+            Question.objects.create(author=cls.other, title="Cooking rice", content="<p>How long?</p>")
+            Answer.objects.create(question=cls.packaging, author=cls.other, content="Install it with pip.")
+
+    def ranked(self, query, queryset=None):
+        results = search.RankedQuestions(query, queryset)
+        return [(question.pk, question.matching_answers) for question in results[0:10]], len(results)
+
+    def test_question_matches_rank_before_answer_matches(self):
+        page, total = self.ranked("install")
+        self.assertEqual(total, 3)
+        self.assertEqual({pk for pk, _ in page[:2]}, {self.django.pk, self.linux.pk})
+        self.assertEqual(page[2], (self.packaging.pk, 1))
+        self.assertEqual(self.ranked("instal")[1], 3)  # still typing
+        self.assertEqual(self.ranked("install windows")[0], [(self.django.pk, 0)])
+
+    def test_filters_of_the_queryset_apply(self):
+        mine = Question.objects.filter(author=self.asker)
+        page, total = self.ranked("install", mine)
+        self.assertEqual(total, 2)
+        self.assertEqual(page, [(self.django.pk, 0), (self.packaging.pk, 1)])
+
+        paginator = Paginator(search.RankedQuestions("install", mine), 1)
+        self.assertEqual(paginator.num_pages, 2)
+        self.assertEqual([len(paginator.page(number)) for number in (1, 2)], [1, 1])
+
+    def test_icontains_fallback(self):
+        with mock.patch.object(search, "available", return_value=False):
+            page, total = self.ranked("install", Question.objects.filter(author=self.asker))
+        self.assertEqual(total, 2)
+        self.assertEqual(sorted(page), sorted([(self.django.pk, 0), (self.packaging.pk, 1)]))
+
+    def test_questions_page(self):
+        response = self.client.get(reverse("questions_list"), {"q": "install"})
+        self.assertEqual(response.status_code, 200)
+        page = response.context["questions"]
+        self.assertEqual(page.paginator.count, 3)
+        self.assertEqual(page[2].matching_answers, 1)
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ann, cls.bob, cls.cat = [
+            CustomUserModel.objects.create_user(email=f"{name}@example.com", password="x")
+            for name in ("ann", "bob", "cat")
+        ]
+
+    def counts(self):
+        sections = {section.user_id: section for section in Follow_section.objects.all()}
+        return {
+            user.email.split("@")[0]: (sections[user.pk].following_count, sections[user.pk].followers_count)
+            for user in (self.ann, self.bob, self.cat) if user.pk in sections
+        }
+
+    def test_add_and_remove(self):
+        ann = Follow_section.objects.create(user=self.ann)
+        ann.following.add(self.bob, self.cat)
+        # the followed users got their sections
+        self.assertEqual(self.counts(), {"ann": (2, 0), "bob": (0, 1), "cat": (0, 1)})
+
+        ann.following.remove(self.bob)
+        self.assertEqual(self.counts(), {"ann": (1, 0), "bob": (0, 0), "cat": (0, 1)})
+
+    def test_add_and_remove_from_the_followed_side(self):
+        ann = Follow_section.objects.create(user=self.ann)
+        bob = Follow_section.objects.create(user=self.bob)
+        self.cat.followers.add(ann, bob)
+        self.assertEqual(self.counts(), {"ann": (1, 0), "bob": (1, 0), "cat": (0, 2)})
+
+        self.cat.followers.remove(bob)
+        self.assertEqual(self.counts(), {"ann": (1, 0), "bob": (0, 0), "cat": (0, 1)})
+
+    def test_clear(self):
+        ann = Follow_section.objects.create(user=self.ann)
+        bob = Follow_section.objects.create(user=self.bob)
+        ann.following.add(self.bob, self.cat)
+        bob.following.add(self.cat)
+
+        ann.following.clear()
+        self.assertEqual(self.counts(), {"ann": (0, 0), "bob": (1, 0), "cat": (0, 1)})
+        self.cat.followers.clear()
+        self.assertEqual(self.counts(), {"ann": (0, 0), "bob": (0, 0), "cat": (0, 0)})
+
+    def test_deleting_a_user(self):
+        Follow_section.objects.create(user=self.ann).following.add(self.bob, self.cat)
+        self.bob.delete()
+        self.assertEqual(self.counts(), {"ann": (1, 0), "cat": (0, 1)})
+
+
+class FollowListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.star = CustomUserModel.objects.create_user(email="star@example.com", password="x")
+        fans = [CustomUserModel.objects.create(email=f"fan{i:02}@example.com") for i in range(follow_graph.PAGE_SIZE + 2)]
+        follow_graph.ensure_sections(fan.pk for fan in fans)
+        # one at a time, so the newest follower is the last fan
+        for section in Follow_section.objects.filter(user__in=fans).order_by("user_id"):
+            section.following.add(cls.star)
+
+    def setUp(self):
+        self.client.force_login(self.star)
+
+    def get(self, name, offset=None):
+        url = reverse(name, args=[self.star.pk])
+        if offset is not None:
+            url += f"?offset={offset}"
+        response = self.client.get(url, HTTP_HX_REQUEST="true")
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_followers_are_paged_newest_first(self):
+        size = follow_graph.PAGE_SIZE
+        first = self.get("follower_list")
+        self.assertEqual(first.count("@example.com"), size)
+        self.assertLess(first.index(f"fan{size + 1:02}@"), first.index(f"fan{size:02}@"))
+        self.assertNotIn("fan01@", first)
+        self.assertIn(f"?offset={size}", first)
+
+        rest = self.get("follower_list", size)
+        self.assertEqual(rest.count("@example.com"), 2)
+        self.assertIn("fan00@", rest)
+        self.assertNotIn("Load more", rest)
+
+    def test_following(self):
+        self.assertIn("You aren't following anyone.", self.get("following_list"))
+        Follow_section.objects.get(user=self.star).following.add(CustomUserModel.objects.get(email="fan03@example.com"))
+        page = self.get("following_list")
+        self.assertEqual(page.count("@example.com"), 1)
+        self.assertNotIn("Load more", page)
 
-# Create your tests here.
+    def test_bad_offset(self):
+        self.assertEqual(self.get("follower_list", "x"), self.get("follower_list"))
@@ -1,5 +1,5 @@
 from django.urls import path
-from forum.views import toggle_follow,forum_user_profile_details ,forum_all_user_list, popular_question, questions_list, questions, post_answer, create_question
+from forum.views import follow_list, toggle_follow,forum_user_profile_details ,forum_all_user_list, popular_question, questions_list, questions, post_answer, create_question
 
 
 urlpatterns = [
@@ -16,6 +16,8 @@ urlpatterns = [
     path("profile/<int:pk>/",forum_user_profile_details, name="forum_user_profile_details"),
 
     path('toggle-follow/<int:user_id>/', toggle_follow, name='toggle_follow'),
+    path('followers/<int:user_id>/', follow_list, {'kind': 'followers'}, name='follower_list'),
+    path('following/<int:user_id>/', follow_list, {'kind': 'following'}, name='following_list'),
 
 
 
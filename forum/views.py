@@ -2,11 +2,11 @@ from django.shortcuts import render
 from blog_post.models import BlogPost
 from forum.models import Question, Answer
 from django.shortcuts import redirect, get_object_or_404
-from django.db.models import Q, Count
 from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
 from accounts.models import CustomUserModel
 from forum.models import Follow_section
+from forum import follow_graph, search
 from tags.models import Tag
 
 def questions(request, slug):
@@ -17,25 +17,23 @@ def questions(request, slug):
 
 
 
-    # search filter
+    # search filter (full-text, see forum/search.py)
     answers = particular_question.answers.all()
 
-    query = request.GET.get('q')    
+    query = request.GET.get('q', '').strip()
     if query:
-        answers = particular_question.answers.filter(
-            Q(content__icontains=query)
-        ).distinct()
+        answers = search.filter_answers(answers, query)
        
 
-    # filter for sort by
+    # filter for sort by, applied to the search results as well
     sort_by = request.GET.get('sort', 'best')
 
     if sort_by == 'old':
-        answers = particular_question.answers.all().order_by('created_at')
+        answers = answers.order_by('created_at')
     elif sort_by == 'top':
-        answers = particular_question.answers.all().order_by('-created_at') 
+        answers = answers.order_by('-created_at') 
     elif sort_by == 'recently':
-        answers = particular_question.answers.all().order_by('-created_at')[:5] 
+        answers = answers.order_by('-created_at')[:5] 
 
 
     #paginator section
@@ -47,6 +45,7 @@ def questions(request, slug):
         "blogs":blogs,
         "answers":answers,
         "particular_question":particular_question,
+        "query":query,
         'current_sort': sort_by.capitalize(),
         "paginator_answer":paginator_answer,
 
@@ -67,29 +66,35 @@ def questions_list(request):
     right_side_questions = Question.objects.select_related('author').prefetch_related('answers').order_by('-created_at').all()
 
 
-    query = request.GET.get('q')
-    if query:
-        questions = questions.filter(
-            Q(title__icontains=query) | Q(content__icontains=query)
-        )
-
-
-    sort = request.GET.get('sort', 'latest')
-    if sort == 'top':
-        questions = questions.annotate(ans_count=Count('answers')).order_by('-ans_count')
-    elif sort == 'best':
-        questions = questions.annotate(ans_count=Count('answers')).order_by('-ans_count', '-created_at')
-    elif sort == 'new' or sort == 'latest':
-        questions = questions.order_by("-created_at")
+    # full-text search, ranked by relevance unless another sort is picked
+    query = request.GET.get('q', '').strip()
+    sort = request.GET.get('sort', 'relevance' if query else 'latest')
+
+    if query and sort == 'relevance':
+        questions = search.RankedQuestions(query, questions)
+    else:
+        if query:
+            questions = search.filter_questions(questions, query)
+
+        if sort == 'top':
+            questions = questions.order_by('-answer_count')
+        elif sort == 'best':
+            questions = questions.order_by('-answer_count', '-created_at')
+        elif sort == 'new' or sort == 'latest':
+            questions = questions.order_by("-created_at")
   
 
     paginator = Paginator(questions, 5) 
     page_number = request.GET.get('page')
     questions = paginator.get_page(page_number)
+    if query and sort != 'relevance':
+        questions.object_list = search.attach_matching_answers(questions.object_list, query)
 
     context = {
         "blogs":blogs,
         "questions" :questions,
+        "query":query,
+        "sort":sort,
 
         "right_side_questions":right_side_questions,
 
@@ -147,26 +152,25 @@ def popular_question(request):
     right_side_questions = Question.objects.select_related('author').prefetch_related('answers').order_by('-created_at').all()
 
     
-    popular_question = Question.objects.annotate(
-        num_answers=Count('answers')
-    ).order_by('-num_answers', '-created_at')   
+    popular_question = Question.objects.select_related('author').order_by('-answer_count', '-created_at')
     
 
-    query = request.GET.get('q')
+    query = request.GET.get('q', '').strip()
     if query:
-        popular_question = popular_question.filter(
-            Q(title__icontains=query) | Q(content__icontains=query)
-        )
+        popular_question = search.filter_questions(popular_question, query)
 
 
 
     paginator = Paginator(popular_question, 5) 
     page_number = request.GET.get('page')
     popular_question = paginator.get_page(page_number)
+    if query:
+        popular_question.object_list = search.attach_matching_answers(popular_question.object_list, query)
 
     context = {
         "blogs":blogs,
         "popular_question" :popular_question,
+        "query":query,
 
         "right_side_questions":right_side_questions,
 
@@ -188,8 +192,13 @@ def forum_all_user_list(request):
     page_number = request.GET.get('page')
     all_users = paginator.get_page(page_number)
 
+    followed_ids = set()
+    if request.user.is_authenticated:
+        followed_ids = follow_graph.following_ids(request.user, [user.pk for user in all_users])
+
     context = {
         'all_users': all_users,
+        'followed_ids': followed_ids,
         'all_user':'all_user'
     }
     if request.headers.get("HX-Request"):
@@ -251,7 +260,7 @@ def toggle_follow(request, user_id):
         if target_user == request.user:
             return redirect('forum_all_user_list') 
 
-        if target_user in profile.following.all():
+        if profile.following.filter(pk=target_user.pk).exists():
             profile.following.remove(target_user)
         else:
             profile.following.add(target_user)
@@ -261,3 +270,24 @@ def toggle_follow(request, user_id):
 
 
 
+@login_required
+def follow_list(request, user_id, kind):
+    """One page of a user's followers / following, loaded into the sidebar modals."""
+    target_user = get_object_or_404(CustomUserModel, id=user_id)
+
+    try:
+        offset = max(int(request.GET.get('offset', 0)), 0)
+    except ValueError:
+        offset = 0
+
+    if kind == 'followers':
+        follow_page = follow_graph.followers_page(target_user, offset)
+    else:
+        follow_page = follow_graph.following_page(target_user, offset)
+
+    context = {
+        'follow_page': follow_page,
+        'kind': kind,
+        'list_user_id': target_user.pk,
+    }
+    return render(request, "forum/partial_follow_list.html", context)
@@ -1,10 +1,14 @@
-from .models import Advertisement
 from django.shortcuts import render
+from . import registry
+from root.context import lazy, request_cached
+
+
 def google_adds(request):
-    ads = Advertisement.objects.filter(is_active=True)
-    
     def get_ad(order):
-        return ads.filter(order=order).first()
+        # Served from the slot registry, on the first slot a template uses
+        def load():
+            return request_cached(request, "ads", registry.get_slots).get(order)
+        return lazy(request, f"ad_{order}", load)
 
     context = {
         'ad_1': get_ad(1), 
@@ -0,0 +1,55 @@
+"""
+Ad slot registry.
+
+All active ads are loaded with one query into an ``{order: ad}`` map that
+is stored in the shared cache and kept in process memory. A version key
+in the cache is replaced whenever an ``Advertisement`` is saved or
+deleted (see ``google_add.signals``), which makes every worker reload the
+map on its next request; that only works with a cache the workers share
+(see ``CACHES``). In steady state a render costs one cache read and no
+queries.
+"""
+import threading
+import uuid
+
+from django.core.cache import cache
+
+from .models import Advertisement
+
+VERSION_KEY = "ads:version"
+SLOTS_KEY = "ads:slots"
+
+_lock = threading.Lock()
+_local = {"version": None, "slots": None}
+
+
+def _load():
+    return {ad.order: ad for ad in Advertisement.objects.filter(is_active=True)}
+
+
+def invalidate():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_slots():
+    """The ``{order: ad}`` map of active ads."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY)
+
+    with _lock:
+        if _local["version"] == version:
+            return _local["slots"]
+
+    cached = cache.get(SLOTS_KEY)
+    if cached is not None and cached[0] == version:
+        slots = cached[1]
+    else:
+        slots = _load()
+        cache.set(SLOTS_KEY, (version, slots), None)
+
+    with _lock:
+        _local.update(version=version, slots=slots)
+    return slots
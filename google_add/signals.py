@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import registry
+from .models import Advertisement
+
+
+@receiver([post_save, post_delete], sender=Advertisement)
+def advertisement_changed(sender, **kwargs):
+    # Workers must not reload the map before the change is visible
+    transaction.on_commit(registry.invalidate)
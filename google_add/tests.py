@@ -1,3 +1,29 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from . import registry
+from .models import Advertisement
+
+
+class AdRegistryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ad = Advertisement.objects.create(title="Old", ad_code="<p>ad</p>", order=1)
+
+    def test_steady_state_has_no_queries(self):
+        registry.get_slots()
+        with self.assertNumQueries(0):
+            self.assertEqual(registry.get_slots()[1].title, "Old")
+
+    def test_edit_reaches_other_workers(self):
+        other_worker = {"version": None, "slots": None}
+        with mock.patch.object(registry, "_local", other_worker):
+            self.assertEqual(registry.get_slots()[1].title, "Old")
+
+        self.ad.title = "New"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ad.save()
+        with mock.patch.object(registry, "_local", other_worker):
+            self.assertEqual(registry.get_slots()[1].title, "New")
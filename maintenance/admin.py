@@ -34,7 +34,9 @@ class MaintenanceSettingsAdmin(ModelAdmin):
                 "fields": (
                     "site_under_maintenance",
                     "forum_under_maintenance",
-                    # "maintenance_until",
+                    "site_serving_mode",
+                    "forum_serving_mode",
+                    "maintenance_until",
                 ),
             },
         ),
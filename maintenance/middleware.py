@@ -1,3 +1,9 @@
+import math
+
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+
 from .models import MaintenanceSettings
 
 FORUM_PREFIXES = ("/forum/",)
@@ -12,10 +18,56 @@ EXEMPT_PREFIXES = (
 )
 
 
+# Seconds clients are told to wait when no end time is set
+DEFAULT_RETRY_AFTER = 300
+
+# section -> (settings stamp, rendered html)
+_pages = {}
+
+
 def _starts_with_any(path, prefixes):
     return any(path.startswith(p) for p in prefixes)
 
 
+def _render_page(config, section):
+    """
+    Render the maintenance page once per settings change. The template is
+    rendered without a request, so no context processor (and no query) runs.
+    """
+    stamp = (config.last_updated, config.maintenance_until)
+    cached = _pages.get(section)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    until_ms = None
+    if config.maintenance_until:
+        until_ms = int(config.maintenance_until.timestamp() * 1000)
+
+    html = render_to_string(
+        "maintenance/maintenance_page.html",
+        {"section": section, "until_ms": until_ms},
+    )
+    _pages[section] = (stamp, html)
+    return html
+
+
+def maintenance_response(request, config, section):
+    response = HttpResponse(_render_page(config, section), status=503)
+
+    retry_after = DEFAULT_RETRY_AFTER
+    if config.maintenance_until:
+        remaining = (config.maintenance_until - timezone.now()).total_seconds()
+        if remaining > 0:
+            retry_after = math.ceil(remaining)
+    response["Retry-After"] = str(retry_after)
+    response["Cache-Control"] = "no-store"
+
+    # htmx does not swap error responses, reload the whole page instead
+    if request.headers.get("HX-Request"):
+        response["HX-Refresh"] = "true"
+    return response
+
+
 class MaintenanceMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -35,6 +87,9 @@ class MaintenanceMiddleware:
         elif config.forum_under_maintenance and _starts_with_any(path, FORUM_PREFIXES):
             section = "forum"
 
+        if section and getattr(config, f"{section}_serving_mode") == "page":
+            return maintenance_response(request, config, section)
+
         request.maintenance_section = section
         request.maintenance_config  = config if section else None
 
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenancesettings',
+            name='forum_serving_mode',
+            field=models.CharField(choices=[('modal', 'Show a modal over the normal page'), ('page', 'Serve a prerendered maintenance page')], default='modal', max_length=10, verbose_name='Forum Section mode'),
+        ),
+        migrations.AddField(
+            model_name='maintenancesettings',
+            name='site_serving_mode',
+            field=models.CharField(choices=[('modal', 'Show a modal over the normal page'), ('page', 'Serve a prerendered maintenance page')], default='modal', max_length=10, verbose_name='Entire Website mode'),
+        ),
+    ]
@@ -1,9 +1,16 @@
 from django.db import models
 from django.utils import timezone
 
+from site_settings.singleton import CachedSingleton
+
 
 class MaintenanceSettings(models.Model):
 
+    SERVING_MODE_CHOICES = (
+        ("modal", "Show a modal over the normal page"),
+        ("page", "Serve a prerendered maintenance page"),
+    )
+
     site_under_maintenance = models.BooleanField(
         default=False,
         verbose_name="Entire Website",
@@ -15,6 +22,21 @@ class MaintenanceSettings(models.Model):
         help_text="Activates maintenance mode on forum pages only.",
     )
 
+    # ── How maintenance is shown ────────────────────────────────────
+    # "page" answers straight from the middleware: no view, no database.
+    site_serving_mode = models.CharField(
+        max_length=10,
+        choices=SERVING_MODE_CHOICES,
+        default="modal",
+        verbose_name="Entire Website mode",
+    )
+    forum_serving_mode = models.CharField(
+        max_length=10,
+        choices=SERVING_MODE_CHOICES,
+        default="modal",
+        verbose_name="Forum Section mode",
+    )
+
     # ── Countdown end time ──────────────────────────────────────────
     maintenance_until = models.DateTimeField(
         null=True,
@@ -49,5 +71,12 @@ class MaintenanceSettings(models.Model):
 
     @classmethod
     def get(cls):
-        obj, _ = cls.objects.get_or_create(pk=1)
-        return obj
\ No newline at end of file
+        return settings_cache.get()
+
+
+def _load_settings():
+    obj, _ = MaintenanceSettings.objects.get_or_create(pk=1)
+    return obj
+
+
+settings_cache = CachedSingleton(MaintenanceSettings, _load_settings)
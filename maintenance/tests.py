@@ -1,3 +1,76 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+
+from . import middleware
+from .models import MaintenanceSettings
+
+
+class MaintenancePageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        middleware._pages.clear()
+        patcher = mock.patch("site_settings.singleton.REVALIDATE_SECONDS", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def configure(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            MaintenanceSettings.objects.update_or_create(pk=1, defaults=fields)
+
+    def test_site_page(self):
+        self.configure(site_under_maintenance=True, site_serving_mode="page")
+        response = self.client.get("/")
+        self.assertEqual(response.status_code, 503)
+        self.assertContains(response, "Site is under maintenance", status_code=503)
+        self.assertEqual(response["Retry-After"], str(middleware.DEFAULT_RETRY_AFTER))
+        self.assertEqual(response["Cache-Control"], "no-store")
+        self.assertNotIn("HX-Refresh", response)
+
+        response = self.client.get("/forum/", HTTP_HX_REQUEST="true")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["HX-Refresh"], "true")
+
+        self.configure(maintenance_until=timezone.now() + timedelta(seconds=90))
+        self.assertIn(int(self.client.get("/")["Retry-After"]), (89, 90))
+
+        self.assertNotEqual(self.client.get("/admin/").status_code, 503)
+
+    def test_forum_page(self):
+        self.configure(forum_under_maintenance=True, forum_serving_mode="page")
+        response = self.client.get("/forum/")
+        self.assertContains(response, "Forum is under maintenance", status_code=503)
+        self.assertEqual(self.client.get("/contact/").status_code, 200)
+
+        # the modal is drawn by the normal page
+        self.configure(forum_serving_mode="modal")
+        response = self.client.get("/forum/")
+        self.assertNotEqual(response.status_code, 503)
+        self.assertEqual(response.wsgi_request.maintenance_section, "forum")
+
+    def test_rendered_again_when_the_settings_change(self):
+        self.configure(site_under_maintenance=True, site_serving_mode="page")
+        with mock.patch.object(middleware, "render_to_string", wraps=middleware.render_to_string) as render:
+            self.assertNotContains(self.client.get("/"), "var deadline", status_code=503)
+            self.client.get("/")
+            self.assertEqual(render.call_count, 1)
+
+            until = timezone.now() + timedelta(hours=1)
+            self.configure(maintenance_until=until)
+            response = self.client.get("/")
+            self.assertContains(response, f"var deadline = {int(until.timestamp() * 1000)}", status_code=503)
+            self.assertEqual(render.call_count, 2)
+
+            self.configure(maintenance_until=None)
+            self.assertNotContains(self.client.get("/"), "var deadline", status_code=503)
+            self.assertEqual(render.call_count, 3)
 
-# Create your tests here.
+    def test_no_queries(self):
+        self.configure(site_under_maintenance=True, site_serving_mode="page")
+        self.client.get("/")
+        with self.assertNumQueries(0):
+            for path in ("/", "/forum/", "/contact/"):
+                self.assertEqual(self.client.get(path).status_code, 503)
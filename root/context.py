@@ -0,0 +1,23 @@
+"""
+Helpers for the context processors listed in settings.TEMPLATES.
+
+Every render runs all context processors, including HTMX partials that
+never show the footer, ads or forum sidebar. ``lazy`` defers a value
+until a template actually touches it and memoizes it on the request, so
+keys sharing the same data (and later renders in the same request)
+compute it only once.
+"""
+from django.utils.functional import SimpleLazyObject
+
+
+def request_cached(request, key, func):
+    """Return ``func()``, computed at most once per request."""
+    cache = request.__dict__.setdefault("_context_cache", {})
+    if key not in cache:
+        cache[key] = func()
+    return cache[key]
+
+
+def lazy(request, key, func):
+    """A template value that calls ``request_cached`` on first use."""
+    return SimpleLazyObject(lambda: request_cached(request, key, func))
@@ -4,6 +4,7 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 import os
+import sys
 from dotenv import load_dotenv
 load_dotenv()
 # Quick-start development settings - unsuitable for production
@@ -174,6 +175,118 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared by all gunicorn workers: version stamps in it tell every worker
+# that settings, ads, feeds or pages changed, and its add() must be atomic
+# (view dedup, search suggestion log). Set REDIS_URL in production,
+# otherwise it is the django_cache table of the database (created by the
+# site_settings migrations). Never use a per-process cache (locmem) or the
+# file cache here. Tests get their own locmem cache, so their
+# cache.clear() never touches the site's.
+
+REDIS_URL = os.environ.get("REDIS_URL")
+TESTING = sys.argv[1:2] == ["test"]
+
+if TESTING:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "tests",
+        }
+    }
+elif REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+            "OPTIONS": {"MAX_ENTRIES": 100000},
+        }
+    }
+
+
+# Post view counter (blog_post.view_buffer)
+
+VIEW_BUFFER_FLUSH_INTERVAL = 30  # seconds between background flushes
+VIEW_BUFFER_MAX_SIZE = 500  # flush early once this many views are buffered
+VIEW_BUFFER_SEEN_TIMEOUT = 60 * 60 * 24  # how long a visitor is remembered in the cache
+
+# Settings rows (site_settings.singleton): how long a worker trusts its copy
+
+SINGLETON_REVALIDATE_SECONDS = 5
+
+
+# Homepage snapshot (blog_post.homepage)
+
+HOMEPAGE_SNAPSHOT_TIMEOUT = 60 * 10  # seconds, picks up view count changes
+
+
+# Blog API cursor pages (blog_post.pagination): largest ?page_size= allowed
+
+API_MAX_PAGE_SIZE = 50
+
+
+# Conditional GET (blog_post.conditional)
+
+CONDITIONAL_GET_WINDOW = 60 * 5  # seconds, picks up page parts no signal tracks
+
+
+# Groq moderation checks (blog_post.moderation)
+
+MODERATION_MODE = "combined"  # one JSON request per post, or "separate" for three
+MODERATION_WORKERS = 12  # threads shared by all submissions, up to three per post
+MODERATION_CALL_TIMEOUT = 15  # seconds, per request
+MODERATION_DEADLINE = 25  # seconds, for all checks of a post
+
+
+# Groq client (blog_post.groq_service)
+
+GROQ_CONNECT_TIMEOUT = 3  # seconds
+GROQ_READ_TIMEOUT = 10  # seconds
+GROQ_MAX_CONNECTIONS = 20  # kept alive and shared by all checks of a process
+GROQ_MAX_RETRIES = 1
+GROQ_BREAKER_FAILURES = 5  # failed calls in a row that open the circuit breaker
+GROQ_BREAKER_RESET_SECONDS = 30  # how long it stays open before a trial call
+
+
+# Moderation queue (blog_post.moderation_queue, `manage.py moderate_posts`)
+
+MODERATION_LEASE_SECONDS = 120  # a worker's hold on a job, then others may take it
+MODERATION_MAX_ATTEMPTS = 5
+MODERATION_RETRY_BASE_SECONDS = 30  # doubled after every failed attempt
+MODERATION_RETRY_MAX_SECONDS = 60 * 30
+
+
+# Search box typeahead (blog_post.suggest)
+
+SEARCH_SUGGEST_LIMIT = 8
+SEARCH_SUGGEST_REVALIDATE_SECONDS = 5  # how stale a worker's index may get
+
+
+# Forum sidebar (forum.popular): how many popular questions are cached
+
+FORUM_POPULAR_QUESTIONS = 10
+FORUM_POPULAR_TIMEOUT = 60 * 10  # seconds, reloaded at least this often
+
+
+# Follower / following lists (forum.follow_graph)
+
+FOLLOW_PREVIEW_SIZE = 10  # users rendered into the sidebar modals
+FOLLOW_PAGE_SIZE = 20  # users per "Load more"
+
+
+# Blog details comments (comments.threads)
+
+COMMENT_PAGE_SIZE = 3
+COMMENT_MAX_DEPTH = 20  # deeper replies attach to the parent's parent
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
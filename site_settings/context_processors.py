@@ -1,9 +1,16 @@
+from root.context import lazy, request_cached
 from .models import SiteSettings
 
 def site_settings(request):
-    settings = SiteSettings.get_settings()
+    def setting(name):
+        return lazy(
+            request,
+            f"site_settings.{name}",
+            lambda: getattr(request_cached(request, "site_settings", SiteSettings.get_settings), name),
+        )
+
     return {
-        'GOOGLE_ANALYTICS_ID': settings.google_analytics_id,
-        'SITE_TITLE': settings.site_title,
-        'META_DESCRIPTION': settings.meta_description,
+        'GOOGLE_ANALYTICS_ID': setting('google_analytics_id'),
+        'SITE_TITLE': setting('site_title'),
+        'META_DESCRIPTION': setting('meta_description'),
     }
\ No newline at end of file
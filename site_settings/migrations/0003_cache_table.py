@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:12
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # the DatabaseCache of root/settings.py, nothing to do with Redis
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('site_settings', '0002_sitesettings_score_control_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
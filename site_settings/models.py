@@ -1,4 +1,5 @@
 from django.db import models
+from .singleton import CachedSingleton
 
 class SiteSettings(models.Model):
     # Analytics
@@ -37,5 +38,12 @@ class SiteSettings(models.Model):
 
     @classmethod
     def get_settings(cls):
-        obj, created = cls.objects.get_or_create(pk=1)
-        return obj
\ No newline at end of file
+        return settings_cache.get()
+
+
+def _load_settings():
+    obj, created = SiteSettings.objects.get_or_create(pk=1)
+    return obj
+
+
+settings_cache = CachedSingleton(SiteSettings, _load_settings)
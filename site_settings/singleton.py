@@ -0,0 +1,82 @@
+"""
+Cross-worker cache for single-row settings models.
+
+``CachedSingleton`` keeps the loaded row in process memory and trusts it
+for ``SINGLETON_REVALIDATE_SECONDS``. After that it compares its copy
+with a version stamp in the shared cache (one cache read, no query) and
+only reloads when the stamp moved. Saving or deleting the model replaces
+the stamp once the transaction commits, so a change made in the admin
+reaches every gunicorn worker within the revalidation window (the stamp
+must live in a cache all workers share, see ``CACHES``). Every caller
+gets its own copy of the row, so changing one never leaks into other
+requests or threads.
+"""
+import copy
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+REVALIDATE_SECONDS = getattr(settings, "SINGLETON_REVALIDATE_SECONDS", 5)
+
+_MISSING = object()
+
+
+class CachedSingleton:
+    def __init__(self, model, load):
+        """``load`` returns the row (or None) and is only called on a miss."""
+        self.load = load
+        self.version_key = f"singleton:{model._meta.label_lower}:version"
+        self.data_key = f"singleton:{model._meta.label_lower}:data"
+
+        self._lock = threading.Lock()
+        self._obj = _MISSING
+        self._version = None
+        self._checked_at = 0.0
+
+        post_save.connect(self._changed, sender=model, weak=False)
+        post_delete.connect(self._changed, sender=model, weak=False)
+
+    def get(self):
+        return copy.copy(self._get())
+
+    def _get(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._obj is not _MISSING and now - self._checked_at < REVALIDATE_SECONDS:
+                return self._obj
+
+        version = cache.get(self.version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(self.version_key, version, None):
+                version = cache.get(self.version_key)
+
+        with self._lock:
+            if self._obj is not _MISSING and self._version == version:
+                self._checked_at = now
+                return self._obj
+
+        cached = cache.get(self.data_key)
+        if cached is not None and cached[0] == version:
+            obj = cached[1]
+        else:
+            obj = self.load()
+            cache.set(self.data_key, (version, obj), None)
+
+        with self._lock:
+            self._obj, self._version, self._checked_at = obj, version, now
+        return obj
+
+    def invalidate(self):
+        with self._lock:
+            self._obj = _MISSING
+        cache.set(self.version_key, uuid.uuid4().hex, None)
+
+    def _changed(self, sender, **kwargs):
+        # Other workers must not reload the row before the change is visible
+        transaction.on_commit(self.invalidate)
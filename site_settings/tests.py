@@ -1,3 +1,36 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
 from django.test import TestCase
 
-# Create your tests here.
+from .models import SiteSettings, _load_settings
+from .singleton import CachedSingleton
+
+
+class CachedSingletonTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("site_settings.singleton.REVALIDATE_SECONDS", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_callers_get_copies(self):
+        first = SiteSettings.get_settings()
+        first.score_control = "1"
+        second = SiteSettings.get_settings()
+        self.assertIsNot(first, second)
+        self.assertNotEqual(second.score_control, "1")
+
+    def test_change_reaches_other_workers(self):
+        # another worker: its own copy, only the shared cache in common
+        other = CachedSingleton(SiteSettings, _load_settings)
+        for signal in (post_save, post_delete):
+            signal.disconnect(other._changed, sender=SiteSettings)
+        self.assertNotEqual(other.get().score_control, "55")
+
+        settings = SiteSettings.get_settings()
+        settings.score_control = "55"
+        with self.captureOnCommitCallbacks(execute=True):
+            settings.save()
+        self.assertEqual(other.get().score_control, "55")